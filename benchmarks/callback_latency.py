@@ -0,0 +1,70 @@
+"""
+Per-callback latency benchmark
+Compares constructing a BlockchainService per callback with a shared instance
+
+Usage:
+    python -m benchmarks.callback_latency --iterations 200 --market-id 1 --backend async
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from config import Config
+from services.blockchain import BlockchainService
+
+
+async def simulate_callback(blockchain: BlockchainService, market_id: int):
+    """Do the same chain reads as the view_market_detail handler"""
+    await blockchain.get_market(market_id)
+
+
+async def run_fresh(iterations: int, market_id: int, backend: str) -> list:
+    """Old behaviour: a new service (ABI reads, key derivation, HTTP session) per callback"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        blockchain = BlockchainService(backend=backend)
+        await simulate_callback(blockchain, market_id)
+        samples.append(time.perf_counter() - start)
+        await blockchain.close()
+    return samples
+
+
+async def run_shared(iterations: int, market_id: int, backend: str) -> list:
+    """New behaviour: one long-lived service with pooled keep-alive connections"""
+    samples = []
+    blockchain = BlockchainService(backend=backend)
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await simulate_callback(blockchain, market_id)
+            samples.append(time.perf_counter() - start)
+    finally:
+        await blockchain.close()
+    return samples
+
+
+def summarize(label: str, samples: list):
+    """Print latency percentiles in milliseconds"""
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p95 = ordered[int(len(ordered) * 0.95) - 1] * 1000
+    mean = statistics.mean(samples) * 1000
+    print(f"{label:<8} mean={mean:8.2f}ms  p50={p50:8.2f}ms  p95={p95:8.2f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--market-id", type=int, default=1)
+    parser.add_argument("--backend", choices=["thread", "async"], default=Config.RPC_BACKEND)
+    args = parser.parse_args()
+    
+    print(f"RPC: {Config.MONAD_RPC_URL}  backend: {args.backend}  iterations: {args.iterations}")
+    summarize("fresh", await run_fresh(args.iterations, args.market_id, args.backend))
+    summarize("shared", await run_shared(args.iterations, args.market_id, args.backend))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+# pragma version ~=0.4.0
+"""
+@title Escalate (benchmark build)
+@notice Parimutuel YES/NO markets matching contracts/escalate_abi.json, plus
+        seedMarkets() to fill a devnet quickly. Not the production contract.
+"""
+from ethereum.ercs import IERC20
+
+MAX_QUESTION: constant(uint256) = 256
+MAX_SEED: constant(uint256) = 500
+
+struct Market:
+    question: String[MAX_QUESTION]
+    expiry: uint256
+    totalYes: uint256
+    totalNo: uint256
+    resolved: bool
+    outcome: bool
+
+token: IERC20
+resolver: address
+marketCount: public(uint256)
+_markets: HashMap[uint256, Market]
+stakes: HashMap[uint256, HashMap[address, HashMap[bool, uint256]]]
+
+
+@deploy
+def __init__(token: address, resolver: address):
+    self.token = IERC20(token)
+    self.resolver = resolver
+
+
+@external
+def createMarket(question: String[MAX_QUESTION], expiry: uint256) -> uint256:
+    assert expiry > block.timestamp, "expiry in the past"
+    market_id: uint256 = self.marketCount + 1
+    self.marketCount = market_id
+    self._markets[market_id] = Market(
+        question=question, expiry=expiry, totalYes=0, totalNo=0, resolved=False, outcome=False
+    )
+    return market_id
+
+
+@external
+def seedMarkets(count: uint256, expiry: uint256):
+    """
+    @notice Create `count` markets named "Benchmark market <id>"
+    """
+    assert count <= MAX_SEED, "too many"
+    market_id: uint256 = self.marketCount
+    for i: uint256 in range(count, bound=MAX_SEED):
+        market_id += 1
+        self._markets[market_id] = Market(
+            question=concat("Benchmark market ", uint2str(market_id)),
+            expiry=expiry + market_id,
+            totalYes=0,
+            totalNo=0,
+            resolved=False,
+            outcome=False
+        )
+    self.marketCount = market_id
+
+
+@external
+def placeBet(marketId: uint256, side: bool, amount: uint256):
+    market: Market = self._markets[marketId]
+    assert market.expiry > block.timestamp, "market closed"
+    assert not market.resolved, "market resolved"
+    assert amount > 0, "zero amount"
+    assert extcall self.token.transferFrom(msg.sender, self, amount), "transfer failed"
+
+    if side:
+        self._markets[marketId].totalYes = market.totalYes + amount
+    else:
+        self._markets[marketId].totalNo = market.totalNo + amount
+    self.stakes[marketId][msg.sender][side] += amount
+
+
+@external
+def resolveMarket(marketId: uint256, outcome: bool):
+    assert msg.sender == self.resolver, "only resolver"
+    assert marketId > 0 and marketId <= self.marketCount, "unknown market"
+    assert not self._markets[marketId].resolved, "already resolved"
+    self._markets[marketId].resolved = True
+    self._markets[marketId].outcome = outcome
+
+
+@view
+@external
+def markets(marketId: uint256) -> (String[MAX_QUESTION], uint256, uint256, uint256, bool, bool):
+    market: Market = self._markets[marketId]
+    return market.question, market.expiry, market.totalYes, market.totalNo, market.resolved, market.outcome
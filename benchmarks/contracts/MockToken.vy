@@ -0,0 +1,53 @@
+# pragma version ~=0.4.0
+"""
+@title Benchmark MON token
+@notice Minimal ERC20 with 6 decimals and open minting, for devnets only
+"""
+from ethereum.ercs import IERC20
+
+implements: IERC20
+
+name: public(String[32])
+symbol: public(String[8])
+decimals: public(uint8)
+totalSupply: public(uint256)
+balanceOf: public(HashMap[address, uint256])
+allowance: public(HashMap[address, HashMap[address, uint256]])
+
+
+@deploy
+def __init__():
+    self.name = "Benchmark MON"
+    self.symbol = "MON"
+    self.decimals = 6
+
+
+@external
+def mint(to: address, amount: uint256):
+    self.balanceOf[to] += amount
+    self.totalSupply += amount
+    log IERC20.Transfer(sender=empty(address), receiver=to, value=amount)
+
+
+@external
+def transfer(receiver: address, amount: uint256) -> bool:
+    self.balanceOf[msg.sender] -= amount
+    self.balanceOf[receiver] += amount
+    log IERC20.Transfer(sender=msg.sender, receiver=receiver, value=amount)
+    return True
+
+
+@external
+def transferFrom(sender: address, receiver: address, amount: uint256) -> bool:
+    self.allowance[sender][msg.sender] -= amount
+    self.balanceOf[sender] -= amount
+    self.balanceOf[receiver] += amount
+    log IERC20.Transfer(sender=sender, receiver=receiver, value=amount)
+    return True
+
+
+@external
+def approve(spender: address, amount: uint256) -> bool:
+    self.allowance[msg.sender][spender] = amount
+    log IERC20.Approval(owner=msg.sender, spender=spender, value=amount)
+    return True
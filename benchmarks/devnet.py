@@ -0,0 +1,366 @@
+"""
+Local EVM devnet for benchmarks
+Starts anvil (or an eth-tester JSON-RPC server), deploys the benchmark contracts and counts RPC traffic
+
+The contracts in benchmarks/contracts/ are Vyper builds matching
+contracts/escalate_abi.json and a 6-decimal ERC20; they are compiled with
+the `vyper` package (pip install vyper). eth-tester needs
+`pip install "eth-tester[py-evm]"`; anvil is used when it is on PATH.
+
+Run an eth-tester node on its own (HTTP and WebSocket on one port):
+    python -m benchmarks.devnet --port 8545
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(__file__), "contracts")
+
+# Fixed bot wallet, funded by the devnet's first account
+BOT_PRIVATE_KEY = "0x" + "b0" * 32
+
+# Markets created per seedMarkets() transaction (about 76k gas each)
+SEED_CHUNK = 250
+SEED_GAS = 25_000_000
+
+# Seeded markets expire this long after seeding (plus one second per ID)
+SEED_DURATION = 7 * 24 * 3600
+
+# MON minted to the bot wallet, in token units
+BOT_MON = 10 ** 9 * 10 ** 6
+
+
+def compile_contract(name: str) -> Tuple[list, str]:
+    """ABI and deployment bytecode of benchmarks/contracts/<name>.vy"""
+    try:
+        import vyper
+    except ImportError:
+        raise SystemExit("Benchmark contracts need the Vyper compiler: pip install vyper")
+    
+    with open(os.path.join(CONTRACTS_DIR, f"{name}.vy")) as f:
+        output = vyper.compile_code(f.read(), output_formats=["abi", "bytecode"])
+    return output["abi"], output["bytecode"]
+
+
+def to_wire(value: Any) -> Any:
+    """web3 result -> JSON-RPC wire format (hex quantities and data)"""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if hasattr(value, "items"):
+        return {key: to_wire(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_wire(item) for item in value]
+    return value
+
+
+# Transaction fields that are quantities on the wire but ints in web3
+QUANTITY_FIELDS = ("gas", "gasPrice", "maxFeePerGas", "maxPriorityFeePerGas", "value", "nonce", "chainId")
+
+
+def from_wire_transaction(transaction: Dict) -> Dict:
+    return {
+        key: int(value, 16) if key in QUANTITY_FIELDS and isinstance(value, str) else value
+        for key, value in transaction.items()
+        if value is not None
+    }
+
+
+def from_wire_block(block: Any) -> Any:
+    return int(block, 16) if isinstance(block, str) and block.startswith("0x") else block
+
+
+class EthTesterServer:
+    """
+    JSON-RPC over HTTP in front of an in-memory py-evm chain
+    
+    Serves the methods the bot and the deployment use, including batches.
+    Every transaction is mined at once (eth-tester's automine). The same
+    port takes WebSocket connections, with eth_subscribe("newHeads").
+    """
+    
+    def __init__(self):
+        from web3 import Web3
+        from web3.exceptions import TransactionNotFound
+        from web3.providers.eth_tester import EthereumTesterProvider
+        
+        self.w3 = Web3(EthereumTesterProvider())
+        self._not_found = TransactionNotFound
+        eth = self.w3.eth
+        self.methods = {
+            "eth_chainId": lambda: eth.chain_id,
+            "eth_blockNumber": lambda: eth.block_number,
+            "eth_gasPrice": lambda: eth.gas_price,
+            "eth_maxPriorityFeePerGas": lambda: eth.max_priority_fee,
+            "eth_accounts": lambda: eth.accounts,
+            "eth_getBalance": lambda address, block="latest": eth.get_balance(address, from_wire_block(block)),
+            "eth_getCode": lambda address, block="latest": eth.get_code(address, from_wire_block(block)),
+            "eth_getBlockByNumber": lambda block, full=False: eth.get_block(from_wire_block(block), full),
+            "eth_getTransactionCount": lambda address, block="latest": eth.get_transaction_count(
+                address, from_wire_block(block)
+            ),
+            "eth_feeHistory": lambda count, block, percentiles=None: eth.fee_history(
+                from_wire_block(count), from_wire_block(block), percentiles
+            ),
+            "eth_call": lambda transaction, block="latest": eth.call(
+                from_wire_transaction(transaction), from_wire_block(block)
+            ),
+            "eth_estimateGas": lambda transaction, block="latest": eth.estimate_gas(
+                from_wire_transaction(transaction), from_wire_block(block)
+            ),
+            "eth_sendTransaction": lambda transaction: eth.send_transaction(from_wire_transaction(transaction)),
+            "eth_sendRawTransaction": lambda raw: eth.send_raw_transaction(raw),
+            "eth_getTransactionReceipt": self._receipt,
+            "eth_getTransactionByHash": self._transaction,
+        }
+    
+    def _receipt(self, tx_hash: str):
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except self._not_found:
+            return None
+    
+    def _transaction(self, tx_hash: str):
+        try:
+            return self.w3.eth.get_transaction(tx_hash)
+        except self._not_found:
+            return None
+    
+    def handle_one(self, request: Dict) -> Dict:
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        method = self.methods.get(request.get("method"))
+        if method is None:
+            response["error"] = {"code": -32601, "message": f"Method {request.get('method')} not supported"}
+            return response
+        try:
+            response["result"] = to_wire(method(*request.get("params", [])))
+        except Exception as e:
+            error = {"code": -32000, "message": str(e)}
+            data = getattr(e, "data", None)
+            if isinstance(data, str):
+                error["data"] = data
+            response["error"] = error
+        return response
+    
+    async def handle(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        if isinstance(payload, list):
+            return web.json_response([self.handle_one(item) for item in payload])
+        return web.json_response(self.handle_one(payload))
+    
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        """JSON-RPC over a WebSocket; newHeads notifications come from polling the chain"""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        heads = []
+        try:
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                payload = json.loads(message.data)
+                if payload.get("method") == "eth_subscribe" and payload.get("params") == ["newHeads"]:
+                    subscription_id = hex(len(heads) + 1)
+                    heads.append(asyncio.create_task(self._send_heads(ws, subscription_id)))
+                    await ws.send_json({"jsonrpc": "2.0", "id": payload.get("id"), "result": subscription_id})
+                else:
+                    await ws.send_json(self.handle_one(payload))
+        finally:
+            for task in heads:
+                task.cancel()
+        return ws
+    
+    async def _send_heads(self, ws: web.WebSocketResponse, subscription_id: str):
+        head = self.w3.eth.block_number
+        while not ws.closed:
+            await asyncio.sleep(0.05)
+            while head < self.w3.eth.block_number:
+                head += 1
+                block = to_wire(self.w3.eth.get_block(head))
+                await ws.send_json({
+                    "jsonrpc": "2.0",
+                    "method": "eth_subscription",
+                    "params": {"subscription": subscription_id, "result": block}
+                })
+    
+    def serve(self, port: int):
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post("/", self.handle)
+        app.router.add_get("/", self.handle_ws)
+        web.run_app(app, host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+class Devnet:
+    """A devnet node in a child process: anvil if installed, otherwise eth-tester"""
+    
+    def __init__(self, kind: str = "auto", port: int = 18545):
+        """
+        Args:
+            kind: "anvil", "eth-tester" or "auto"
+            port: Port the node listens on
+        """
+        if kind == "auto":
+            kind = "anvil" if shutil.which("anvil") else "eth-tester"
+        self.kind = kind
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.ws_url = f"ws://127.0.0.1:{port}"
+        self._process: Optional[subprocess.Popen] = None
+    
+    def start(self, timeout: float = 30):
+        """Start the node and wait until it answers"""
+        if self.kind == "anvil":
+            command = ["anvil", "--port", str(self.port), "--silent", "--gas-limit", "100000000"]
+        else:
+            command = [sys.executable, "-m", "benchmarks.devnet", "--port", str(self.port)]
+        self._process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+        
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"{self.kind} exited with code {self._process.returncode}")
+            try:
+                self.web3().eth.chain_id
+                return
+            except Exception:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"{self.kind} did not start within {timeout}s")
+    
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+    
+    def web3(self):
+        from web3 import Web3
+        return Web3(Web3.HTTPProvider(self.url, request_kwargs={"timeout": 120}))
+
+
+@dataclass
+class Deployment:
+    """Addresses and keys of a deployed benchmark environment"""
+    escalate: str
+    token: str
+    bot_key: str
+    bot_address: str
+    markets: int
+
+
+def deploy(devnet: Devnet, markets: int) -> Deployment:
+    """
+    Deploy the token and Escalate contracts, fund the bot wallet and seed markets
+    
+    The bot wallet is also the resolver. Seeded markets are all open and
+    empty; deployment is identical on a fresh node, so addresses repeat.
+    """
+    from eth_account import Account
+    
+    w3 = devnet.web3()
+    deployer = w3.eth.accounts[0]
+    bot_address = Account.from_key(BOT_PRIVATE_KEY).address
+    
+    def send(transaction) -> Dict:
+        tx_hash = transaction.transact({"from": deployer, "gas": SEED_GAS})
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt.status != 1:
+            raise RuntimeError(f"Deployment transaction {tx_hash.hex()} reverted")
+        return receipt
+    
+    token_abi, token_bytecode = compile_contract("MockToken")
+    token = send(w3.eth.contract(abi=token_abi, bytecode=token_bytecode).constructor()).contractAddress
+    escalate_abi, escalate_bytecode = compile_contract("Escalate")
+    escalate = send(
+        w3.eth.contract(abi=escalate_abi, bytecode=escalate_bytecode).constructor(token, bot_address)
+    ).contractAddress
+    
+    w3.eth.wait_for_transaction_receipt(
+        w3.eth.send_transaction({"from": deployer, "to": bot_address, "value": 1000 * 10 ** 18})
+    )
+    send(w3.eth.contract(address=token, abi=token_abi).functions.mint(bot_address, BOT_MON))
+    
+    contract = w3.eth.contract(address=escalate, abi=escalate_abi)
+    expiry = w3.eth.get_block("latest").timestamp + SEED_DURATION
+    for start in range(0, markets, SEED_CHUNK):
+        send(contract.functions.seedMarkets(min(SEED_CHUNK, markets - start), expiry))
+    
+    return Deployment(escalate, token, BOT_PRIVATE_KEY, bot_address, markets)
+
+
+class RpcCounter:
+    """
+    Local JSON-RPC proxy that counts what the bot sends to the node
+    
+    Counts HTTP requests and JSON-RPC calls per method (each entry of a
+    batch counts as one call). Adds one local hop to every request.
+    """
+    
+    def __init__(self, upstream: str, port: int = 18546):
+        self.upstream = upstream
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.http_requests = 0
+        self.calls: Counter = Counter()
+        self._runner: Optional[web.AppRunner] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def start(self):
+        self._session = aiohttp.ClientSession()
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post("/", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+    
+    async def stop(self):
+        await self._runner.cleanup()
+        await self._session.close()
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        payload = json.loads(body)
+        self.http_requests += 1
+        for call in payload if isinstance(payload, list) else [payload]:
+            self.calls[call.get("method")] += 1
+        
+        async with self._session.post(
+            self.upstream, data=body, headers={"Content-Type": "application/json"}
+        ) as response:
+            return web.Response(body=await response.read(), content_type="application/json")
+    
+    def snapshot(self) -> Tuple[int, Counter]:
+        return self.http_requests, Counter(self.calls)
+    
+    def since(self, snapshot: Tuple[int, Counter]) -> Tuple[int, Counter]:
+        """HTTP requests and calls per method since an earlier snapshot"""
+        http_requests, calls = snapshot
+        return self.http_requests - http_requests, self.calls - calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8545)
+    args = parser.parse_args()
+    EthTesterServer().serve(args.port)
+
+
+if __name__ == "__main__":
+    main()
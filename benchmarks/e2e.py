@@ -0,0 +1,436 @@
+"""
+End-to-end benchmark on a local devnet
+Drives the real handler routers through a fake Telegram Bot API and reports latency and RPC calls per operation
+
+For each market count a fresh devnet (anvil, or eth-tester when anvil is
+not installed) gets the benchmark contracts and that many seeded markets,
+then the bot is wired up as main.py does: shared BlockchainService,
+MarketSyncer, FSM storage, OutboundGovernor and every router. Updates are
+fed to the dispatcher directly; the bot's replies go to a local fake Bot
+API, and its RPC traffic through a counting proxy.
+
+Each operation is one user's full flow, timed from its last update:
+    view_markets   "📊 View Markets" until the market list is shown
+    place_bet      bet_yes -> amount -> confirm, until "Bet Placed Successfully"
+    create_market  create -> question -> expiry -> confirm, until "Market Created Successfully"
+    resolve        /resolve -> market ID -> outcome -> confirm, until "Market Resolved Successfully"
+"ack" is when the handler returned (the user saw "Submitting..."), "done"
+when the final message arrived (including mining and receipt polling,
+see BLOCK_TIME). RPC counts cover every step of the flow.
+
+Settings come from the environment like the bot's (e.g. BLOCK_TIME=0.2,
+RPC_BACKEND=async); devnet addresses, keys and file paths are set here.
+MARKET_SYNC_INTERVAL defaults to an hour so background refreshes do not
+land in the measured flows; set it to include them.
+
+Usage:
+    python -m benchmarks.e2e --markets 10 1000 10000 --iterations 30 --output results.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from aiohttp import web
+
+from benchmarks import micro
+from benchmarks.devnet import Devnet, Deployment, RpcCounter, deploy
+
+
+TOKEN = "123456:BENCHMARK"
+API_PORT = 18083
+DEVNET_PORT = 18545
+PROXY_PORT = 18546
+
+# Seconds to wait for a flow's final message
+FLOW_TIMEOUT = 120
+
+# Bot settings recorded with the results
+REPORTED_SETTINGS = (
+    "RPC_BACKEND", "RPC_POOL_SIZE", "BLOCK_TIME", "MULTICALL3_ADDRESS",
+    "FSM_STORAGE", "MARKET_SYNC_INTERVAL", "APPROVAL_BUDGET"
+)
+
+
+class FakeBotAPI:
+    """Bot API that records every request and answers with plausible results"""
+    
+    def __init__(self, port: int):
+        self.port = port
+        self.requests = 0
+        self._message_ids = itertools.count(1000)
+        self._waiters: List[tuple] = []
+        self._runner: Optional[web.AppRunner] = None
+    
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+    
+    async def stop(self):
+        await self._runner.cleanup()
+    
+    def expect(self, predicate: Callable[[str, dict], bool]) -> asyncio.Future:
+        """Future resolved with the params of the first later request matching predicate(method, params)"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((predicate, future))
+        return future
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        self.requests += 1
+        
+        for waiter in list(self._waiters):
+            predicate, future = waiter
+            if not future.done() and predicate(method, params):
+                future.set_result(params)
+                self._waiters.remove(waiter)
+        
+        if method == "getMe":
+            result = {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method in ("sendMessage", "editMessageText") and "chat_id" in params:
+            chat_id = int(params["chat_id"])
+            result = {
+                "message_id": int(params.get("message_id") or next(self._message_ids)),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", "")
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+
+def text_in_chat(chat_id: int, fragment: str) -> Callable[[str, dict], bool]:
+    """Predicate: a message sent or edited in `chat_id` containing `fragment`"""
+    def predicate(method: str, params: dict) -> bool:
+        return (
+            method in ("sendMessage", "editMessageText")
+            and params.get("chat_id") == str(chat_id)
+            and fragment in params.get("text", "")
+        )
+    return predicate
+
+
+class Driver:
+    """Builds updates for one user and feeds them to the dispatcher"""
+    
+    def __init__(self, dp, bot, user_id: int):
+        self.dp = dp
+        self.bot = bot
+        self.user = {"id": user_id, "is_bot": False, "first_name": "Bench"}
+        self.chat = {"id": user_id, "type": "private"}
+        self._ids = itertools.count(user_id * 100)
+    
+    async def feed(self, update: dict):
+        from aiogram.types import Update
+        update["update_id"] = next(self._ids)
+        await self.dp.feed_update(self.bot, Update.model_validate(update, context={"bot": self.bot}))
+    
+    async def message(self, text: str):
+        message = {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": self.chat,
+            "from": self.user,
+            "text": text
+        }
+        if text.startswith("/"):
+            command = text.split()[0]
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        await self.feed({"message": message})
+    
+    async def callback(self, data: str):
+        await self.feed({
+            "callback_query": {
+                "id": str(next(self._ids)),
+                "from": self.user,
+                "chat_instance": "bench",
+                "data": data,
+                "message": {"message_id": 1, "date": int(time.time()), "chat": self.chat, "text": "menu"}
+            }
+        })
+
+
+async def timed_flow(api: FakeBotAPI, steps, last: Callable, done_fragment: Optional[str], chat_id: int) -> tuple:
+    """Run the leading steps, then time the last one until its final message"""
+    for step in steps:
+        await step()
+    
+    done = api.expect(text_in_chat(chat_id, done_fragment)) if done_fragment else None
+    start = time.perf_counter()
+    await last()
+    ack = time.perf_counter() - start
+    if done is not None:
+        await asyncio.wait_for(done, FLOW_TIMEOUT)
+    return ack, time.perf_counter() - start
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'mean_ms': statistics.mean(ordered) * 1000,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+    }
+
+
+async def run_operation(name: str, iterations: int, warmup: int, counter: RpcCounter, flow) -> dict:
+    """Run flow(i) for warm-up and measured iterations; latency and RPC calls per measured flow"""
+    for i in range(warmup):
+        await flow(-1 - i)
+    
+    snapshot = counter.snapshot()
+    acks, dones = [], []
+    for i in range(iterations):
+        ack, done = await flow(i)
+        acks.append(ack)
+        dones.append(done)
+    http_requests, calls = counter.since(snapshot)
+    
+    result = {
+        'ack': percentiles(acks),
+        'done': percentiles(dones),
+        'rpc_calls_per_op': sum(calls.values()) / iterations,
+        'rpc_http_requests_per_op': http_requests / iterations,
+        'rpc_methods_per_op': {method: count / iterations for method, count in sorted(calls.items())}
+    }
+    print(
+        f"  {name:<14} n={iterations:<4} ack p50={result['ack']['p50_ms']:8.1f}ms p99={result['ack']['p99_ms']:8.1f}ms  "
+        f"done p50={result['done']['p50_ms']:8.1f}ms p99={result['done']['p99_ms']:8.1f}ms  "
+        f"rpc/op={result['rpc_calls_per_op']:6.1f} (http {result['rpc_http_requests_per_op']:.1f})"
+    )
+    return result
+
+
+def configure(deployment: Deployment, workdir: str):
+    """
+    Point the bot's settings at the devnet and the fake API
+    
+    Config is read once, on the first import; later sizes reuse it, which
+    holds because deployment on a fresh devnet repeats the same addresses.
+    """
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": TOKEN,
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{API_PORT}",
+        "MONAD_RPC_URL": f"http://127.0.0.1:{PROXY_PORT}",
+        "PRIVATE_KEY": deployment.bot_key,
+        "CONTRACT_ADDRESS": deployment.escalate,
+        "USDC_ADDRESS": deployment.token,
+        "RESOLVER_ADDRESS": deployment.bot_address,
+        "FSM_DB_PATH": os.path.join(workdir, "fsm.db"),
+        "NONCE_DB_PATH": os.path.join(workdir, "nonces.db"),
+    })
+    # Not deployed on the devnet; market reads use JSON-RPC batches
+    os.environ.setdefault("MULTICALL3_ADDRESS", "")
+    # Keep the syncer's periodic refresh of open markets out of per-operation
+    # RPC counts; the initial sync is reported on its own
+    os.environ.setdefault("MARKET_SYNC_INTERVAL", "3600")
+
+
+class Harness:
+    """
+    The bot side shared by every market count: Bot, Dispatcher and FSM storage
+    
+    Routers are module-level and attach to one Dispatcher only, so it is
+    built once; each market count swaps in its own BlockchainService.
+    """
+    
+    def __init__(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from aiogram import Dispatcher
+        from bot import create_bot
+        from bot.handlers import include_routers
+        from bot.outbound import OutboundGovernor
+        from bot.storage import create_storage
+        from config import Config
+        
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=Config.RPC_POOL_SIZE))
+        self.bot = create_bot()
+        self.bot.session.middleware(OutboundGovernor())
+        self.storage = create_storage()
+        self.dp = Dispatcher(storage=self.storage)
+        include_routers(self.dp)
+    
+    async def close(self):
+        await self.storage.close()
+        await self.bot.session.close()
+
+
+async def bench_size(markets: int, args, workdir: str, harness: Optional[Harness]) -> tuple:
+    """Every operation against a fresh devnet with `markets` seeded markets; returns (results, harness)"""
+    devnet = Devnet(args.devnet, DEVNET_PORT)
+    devnet.start()
+    try:
+        start = time.perf_counter()
+        deployment = deploy(devnet, markets)
+        print(f"\n{markets} markets on {devnet.kind} (seeded in {time.perf_counter() - start:.1f}s)")
+        configure(deployment, workdir)
+        
+        from services.blockchain import BlockchainService
+        from services.market_store import MarketStore
+        from services.market_sync import MarketSyncer
+        
+        counter = RpcCounter(devnet.url, PROXY_PORT)
+        await counter.start()
+        api = FakeBotAPI(API_PORT)
+        await api.start()
+        
+        harness = harness or Harness()
+        blockchain = BlockchainService()
+        blockchain.start()
+        harness.dp["blockchain"] = blockchain
+        store = MarketStore(os.path.join(workdir, f"markets-{markets}.db"))
+        syncer = MarketSyncer(blockchain, store)
+        
+        try:
+            start = time.perf_counter()
+            syncer.start()
+            while store.scanned < markets:
+                await asyncio.sleep(0.05)
+            sync_time = time.perf_counter() - start
+            sync_calls = sum(counter.calls.values())
+            print(f"  initial sync   {sync_time:.2f}s, {sync_calls} RPC calls")
+            
+            results = await run_flows(markets, args, api, counter, harness.dp, harness.bot)
+            results['initial_sync'] = {'seconds': sync_time, 'rpc_calls': sync_calls}
+        finally:
+            await syncer.stop()
+            store.close()
+            await blockchain.close()
+            await api.stop()
+            await counter.stop()
+        return results, harness
+    finally:
+        devnet.stop()
+
+
+async def run_flows(markets: int, args, api: FakeBotAPI, counter: RpcCounter, dp, bot) -> dict:
+    """The four operations, in an order that leaves markets for resolve to use"""
+    users = itertools.count(10_000)
+    results = {}
+    
+    async def view_markets(i: int):
+        driver = Driver(dp, bot, next(users))
+        return await timed_flow(api, [], lambda: driver.callback("view_markets"), None, driver.chat["id"])
+    
+    async def place_bet(i: int):
+        driver = Driver(dp, bot, next(users))
+        market_id = 1 + abs(i) % markets
+        return await timed_flow(
+            api,
+            [lambda: driver.callback(f"bet_yes_{market_id}"), lambda: driver.message("1.5")],
+            lambda: driver.callback("confirm_place_bet"),
+            "Bet Placed Successfully",
+            driver.chat["id"]
+        )
+    
+    expiry = (datetime.utcnow() + timedelta(days=2)).strftime("%Y-%m-%d %H:%M")
+    
+    async def create_market(i: int):
+        driver = Driver(dp, bot, next(users))
+        return await timed_flow(
+            api,
+            [
+                lambda: driver.callback("create_market"),
+                lambda: driver.message(f"Will benchmark question {i} resolve YES?"),
+                lambda: driver.message(expiry)
+            ],
+            lambda: driver.callback("confirm_create_market"),
+            "Market Created Successfully",
+            driver.chat["id"]
+        )
+    
+    # Resolve the newest markets first (those create_market made, then seeded ones)
+    to_resolve = itertools.count(markets + args.iterations + args.warmup, -1)
+    
+    async def resolve(i: int):
+        driver = Driver(dp, bot, next(users))
+        market_id = next(to_resolve)
+        return await timed_flow(
+            api,
+            [
+                lambda: driver.message("/resolve"),
+                lambda: driver.message(str(market_id)),
+                lambda: driver.callback("outcome_yes")
+            ],
+            lambda: driver.callback("confirm_resolve"),
+            "Market Resolved Successfully",
+            driver.chat["id"]
+        )
+    
+    results['view_markets'] = await run_operation("view_markets", args.iterations, args.warmup, counter, view_markets)
+    results['place_bet'] = await run_operation("place_bet", args.iterations, args.warmup, counter, place_bet)
+    results['create_market'] = await run_operation("create_market", args.iterations, args.warmup, counter, create_market)
+    resolvable = min(args.iterations, markets + args.iterations - 1)
+    results['resolve'] = await run_operation("resolve", resolvable, args.warmup, counter, resolve)
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, nargs="+", default=[10, 1000, 10000], help="Seeded market counts")
+    parser.add_argument("--iterations", type=int, default=30, help="Measured flows per operation")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured flows per operation first")
+    parser.add_argument("--devnet", choices=["auto", "anvil", "eth-tester"], default="auto")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    report = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat() + "Z",
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'warmup': args.warmup
+        },
+        'markets': {}
+    }
+    
+    harness = None
+    with tempfile.TemporaryDirectory(prefix="escalate-bench-") as workdir:
+        try:
+            for markets in args.markets:
+                report['markets'][str(markets)], harness = await bench_size(markets, args, workdir, harness)
+        finally:
+            if harness is not None:
+                await harness.close()
+    
+    from config import Config
+    report['meta']['devnet'] = Devnet(args.devnet).kind
+    report['meta']['settings'] = {name: getattr(Config, name) for name in REPORTED_SETTINGS}
+    
+    print("\nmicro-benchmarks")
+    report['micro'] = micro.run()
+    micro.print_results(report['micro'])
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,232 @@
+"""
+FSM storage check and benchmark
+Runs the same bet-flow state changes through every FSM storage backend and compares latency
+
+The Redis backend is exercised against a local Redis-protocol stand-in
+(RespServer below: GET/SET/DEL with expiry, RESP2 or RESP3), or against a real
+server with --redis-url. Each simulated user steps through a bet flow
+(state, data, read back, clear); every read is checked against what was
+written, and a second storage instance on the same backend must see the
+other's writes, as a second worker process would.
+
+Usage:
+    python -m benchmarks.fsm_storage --users 200 --steps 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StorageKey
+
+
+RESP_PORT = 16379
+
+BOT_ID = 123456
+
+
+class RespServer:
+    """Minimal Redis-protocol server: HELLO, PING, GET, SET (EX/PX), DEL, EXISTS, FLUSHDB"""
+    
+    def __init__(self, port: int = RESP_PORT):
+        self.port = port
+        self.url = f"redis://127.0.0.1:{port}/0"
+        # key -> (value, monotonic expiry or None)
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.commands = 0
+    
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", self.port)
+    
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+    
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                command = await self._read_command(reader)
+                if command is None:
+                    break
+                writer.write(self._execute(command))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command (e.g. typed in redis-cli)
+            return line.split()
+        
+        command = []
+        for _ in range(int(line[1:])):
+            size = int((await reader.readline())[1:])
+            command.append((await reader.readexactly(size + 2))[:-2])
+        return command
+    
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+    
+    def _execute(self, command: List[bytes]) -> bytes:
+        self.commands += 1
+        name, args = command[0].upper(), command[1:]
+        
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name == b"HELLO":
+            # Server info as a map (RESP3) or a flat array (RESP2); replies below read the same in both
+            protocol = int(args[0]) if args else 2
+            fields = b"$6\r\nserver\r\n$5\r\nredis\r\n$5\r\nproto\r\n:%d\r\n" % protocol
+            return (b"%2\r\n" if protocol == 3 else b"*4\r\n") + fields
+        if name in (b"CLIENT", b"SELECT"):
+            return b"+OK\r\n"
+        if name == b"GET":
+            value = self._get(args[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET":
+            expires_at = None
+            options = [option.upper() for option in args[2:]]
+            if b"EX" in options:
+                expires_at = time.monotonic() + int(args[2 + options.index(b"EX") + 1])
+            elif b"PX" in options:
+                expires_at = time.monotonic() + int(args[2 + options.index(b"PX") + 1]) / 1000
+            self._data[args[0]] = (args[1], expires_at)
+            return b"+OK\r\n"
+        if name in (b"DEL", b"EXISTS"):
+            present = [key for key in args if self._get(key) is not None]
+            if name == b"DEL":
+                for key in present:
+                    del self._data[key]
+            return b":%d\r\n" % len(present)
+        if name == b"FLUSHDB":
+            self._data.clear()
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name
+
+
+def create_backend(backend: str, workdir: str, redis_url: str) -> BaseStorage:
+    """A fresh storage instance; instances of one backend share its data"""
+    if backend == "memory":
+        from aiogram.fsm.storage.memory import MemoryStorage
+        return MemoryStorage()
+    if backend == "sqlite":
+        from bot.storage import SQLiteStorage
+        return SQLiteStorage(os.path.join(workdir, "fsm.db"), flush_interval=0.05)
+    from aiogram.fsm.storage.redis import RedisStorage
+    return RedisStorage.from_url(redis_url, key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True))
+
+
+async def bet_flow(storage: BaseStorage, user_id: int, steps: int) -> List[float]:
+    """One user's bet flow; returns the latency of each storage call"""
+    key = StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id)
+    latencies = []
+    
+    async def timed(call):
+        start = time.perf_counter()
+        result = await call
+        latencies.append(time.perf_counter() - start)
+        return result
+    
+    for step in range(steps):
+        state = f"PlaceBetStates:step_{step}"
+        data = {'market_id': user_id, 'side': 'yes', 'step': step}
+        await timed(storage.set_state(key, state))
+        await timed(storage.set_data(key, data))
+        assert await timed(storage.get_state(key)) == state, f"user {user_id}: state lost at step {step}"
+        assert await timed(storage.get_data(key)) == data, f"user {user_id}: data lost at step {step}"
+    
+    await timed(storage.set_state(key, None))
+    await timed(storage.set_data(key, {}))
+    return latencies
+
+
+async def check_shared(backend: str, workdir: str, redis_url: str):
+    """A second instance (another worker process) sees the first one's writes"""
+    writer = create_backend(backend, workdir, redis_url)
+    reader = create_backend(backend, workdir, redis_url)
+    key = StorageKey(bot_id=BOT_ID, chat_id=-1, user_id=1)
+    try:
+        await writer.set_state(key, "CreateMarketStates:waiting_for_expiry")
+        await writer.set_data(key, {'question': 'Shared?'})
+        if hasattr(writer, "flush"):
+            await writer.flush()
+        assert await reader.get_state(key) == "CreateMarketStates:waiting_for_expiry", "state not shared"
+        assert await reader.get_data(key) == {'question': 'Shared?'}, "data not shared"
+    finally:
+        await writer.close()
+        await reader.close()
+
+
+async def run_backend(backend: str, args, workdir: str, redis_url: str) -> Dict:
+    storage = create_backend(backend, workdir, redis_url)
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(bet_flow(storage, user_id, args.steps) for user_id in range(1, args.users + 1)))
+    finally:
+        await storage.close()
+    elapsed = time.perf_counter() - start
+    
+    if backend != "memory":
+        await check_shared(backend, workdir, redis_url)
+    
+    latencies = sorted(latency for user_latencies in results for latency in user_latencies)
+    return {
+        'backend': backend,
+        'calls': len(latencies),
+        'calls_per_second': len(latencies) / elapsed,
+        'mean_us': statistics.mean(latencies) * 1e6,
+        'p99_us': latencies[int(len(latencies) * 0.99)] * 1e6
+    }
+
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix="escalate-fsm-")
+    
+    stand_in = None
+    redis_url = args.redis_url
+    if redis_url is None:
+        stand_in = RespServer()
+        await stand_in.start()
+        redis_url = stand_in.url
+    
+    try:
+        for backend in args.backends:
+            result = await run_backend(backend, args, workdir, redis_url)
+            print(
+                f"{result['backend']:7s} {result['calls']:6d} calls  "
+                f"{result['calls_per_second']:9.0f} calls/s  "
+                f"mean {result['mean_us']:7.1f}us  p99 {result['p99_us']:8.1f}us  ok"
+            )
+    finally:
+        if stand_in is not None:
+            await stand_in.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="Users running a bet flow at once")
+    parser.add_argument("--steps", type=int, default=5, help="State changes per flow")
+    parser.add_argument("--backends", nargs="+", choices=["memory", "sqlite", "redis"], default=["memory", "sqlite", "redis"])
+    parser.add_argument("--redis-url", help="Real Redis server to use instead of the local stand-in")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
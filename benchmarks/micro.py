@@ -0,0 +1,105 @@
+"""
+Rendering micro-benchmarks
+Times format_market_summary, the render cache and every keyboard builder on synthetic markets
+
+Usage:
+    python -m benchmarks.micro --json
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict
+
+
+class FakeChain:
+    """Stands in for BlockchainService where only unit conversion is needed"""
+    
+    @staticmethod
+    def parse_mon_amount(amount: int) -> float:
+        return amount / 10 ** 6
+
+
+def make_market(market_id: int, now: int) -> dict:
+    return {
+        'id': market_id,
+        'question': f"Will benchmark market {market_id} settle above its opening line?",
+        'expiry': now + 3 * 3600 + market_id * 60,
+        'total_yes': 1_234_560_000 + market_id,
+        'total_no': 987_650_000,
+        'resolved': False,
+        'outcome': False
+    }
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.2) -> Dict[str, float]:
+    """Mean time per call in microseconds, over batches lasting at least `min_time`"""
+    fn()
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return {'us_per_op': elapsed / calls * 1e6, 'ops_per_s': calls / elapsed}
+        calls *= 2
+
+
+def run() -> Dict[str, Dict[str, float]]:
+    """Every micro-benchmark, by name"""
+    from bot import keyboards, render
+    from bot.render import format_market_summary, render_market_card, render_market_list_keyboard
+    from services.market_index import ORDER_LIQUIDITY
+    
+    chain = FakeChain()
+    now = int(time.time())
+    market = make_market(1, now)
+    page = [make_market(market_id, now) for market_id in range(1, 6)]
+    picks = [(units, f"{units // 10 ** 6} MON") for units in (5_000_000, 10_000_000, 25_000_000, 100_000_000)]
+    
+    def card_uncached():
+        render.render_cache = render.RenderCache()
+        return render_market_card(market, chain, now)
+    
+    results = {
+        'format_market_summary': measure(lambda: format_market_summary(market, chain, now)),
+        'render_market_card (cached)': measure(lambda: render_market_card(market, chain, now)),
+        'render_market_card (uncached)': measure(card_uncached),
+        'render_market_list_keyboard (cached)': measure(
+            lambda: render_market_list_keyboard(page, ORDER_LIQUIDITY, "p_1_1", "n_1_5")
+        ),
+        'get_main_menu_keyboard': measure(keyboards.get_main_menu_keyboard),
+        'get_market_list_keyboard': measure(
+            lambda: keyboards.get_market_list_keyboard(page, ORDER_LIQUIDITY, "p_1_1", "n_1_5")
+        ),
+        'get_market_detail_keyboard': measure(lambda: keyboards.get_market_detail_keyboard(1)),
+        'get_inline_market_keyboard': measure(lambda: keyboards.get_inline_market_keyboard(1)),
+        'get_side_selection_keyboard': measure(lambda: keyboards.get_side_selection_keyboard(1)),
+        'get_confirmation_keyboard': measure(lambda: keyboards.get_confirmation_keyboard("confirm_place_bet")),
+        'get_bet_confirmation_keyboard': measure(lambda: keyboards.get_bet_confirmation_keyboard(picks)),
+        'get_outcome_keyboard': measure(keyboards.get_outcome_keyboard),
+        'get_cancel_keyboard': measure(keyboards.get_cancel_keyboard),
+    }
+    render.render_cache = render.RenderCache()
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, float]]):
+    for name, result in results.items():
+        print(f"  {name:<40} {result['us_per_op']:9.2f}µs  {result['ops_per_s']:12,.0f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+    
+    results = run()
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
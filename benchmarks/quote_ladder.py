@@ -0,0 +1,102 @@
+"""
+Bet quote benchmark
+Times ladder quotes with NumPy, with Python ints and with the old float math, and counts float errors
+
+Each round quotes one ladder of amounts against random pools. The float
+version is the arithmetic process_bet_amount used before quotes were
+computed in token units; its results are compared with the exact ones
+after converting back to units.
+
+Usage:
+    python -m benchmarks.quote_ladder --ladders 20000 --size 32
+"""
+import argparse
+import gc
+import random
+import time
+
+from services import quotes
+from services.quotes import ladder_columns
+
+
+UNIT = 10 ** 6
+
+
+def float_ladder(total_yes: int, total_no: int, side: bool, amounts: list) -> list:
+    """Payouts the way the handler used to compute them, back in token units"""
+    yes, no = total_yes / UNIT, total_no / UNIT
+    payouts = []
+    for amount in amounts:
+        stake = amount / UNIT
+        new_yes = yes + (stake if side else 0)
+        new_no = no + (0 if side else stake)
+        side_pool = new_yes if side else new_no
+        payouts.append(int((new_yes + new_no) * (stake / side_pool) * UNIT))
+    return payouts
+
+
+def make_rounds(count: int, size: int, seed: int) -> list:
+    """Random pools, side and ladder per round"""
+    rng = random.Random(seed)
+    rounds = []
+    for _ in range(count):
+        total_yes = rng.randint(0, 10 ** 6) * UNIT + rng.randint(0, UNIT - 1)
+        total_no = rng.randint(0, 10 ** 6) * UNIT + rng.randint(0, UNIT - 1)
+        amounts = sorted(rng.randint(1, 10 ** 4 * UNIT) for _ in range(size))
+        rounds.append((total_yes, total_no, rng.random() < 0.5, amounts))
+    return rounds
+
+
+def timed(label: str, rounds: list, quote) -> list:
+    """Run every round, print throughput and return the payouts"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        results = [quote(*round_) for round_ in rounds]
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+    
+    quoted = sum(len(round_[3]) for round_ in rounds)
+    print(
+        f"{label:<8} {elapsed * 1000:9.1f}ms  {quoted / elapsed / 1e6:6.2f}M quotes/s  "
+        f"{elapsed / len(rounds) * 1e6:7.1f}µs per ladder"
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ladders", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=32, help="Amounts per ladder")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    rounds = make_rounds(args.ladders, args.size, args.seed)
+    print(f"ladders: {args.ladders}  amounts per ladder: {args.size}")
+    
+    numpy_module = quotes.np
+    exact = None
+    if numpy_module is not None:
+        exact = [columns[0] for columns in timed("numpy", rounds, ladder_columns)]
+    else:
+        print("numpy    not installed")
+    
+    quotes.np = None
+    try:
+        python = [columns[0] for columns in timed("python", rounds, ladder_columns)]
+    finally:
+        quotes.np = numpy_module
+    
+    if exact is not None and exact != python:
+        raise SystemExit("numpy and python ladders differ")
+    
+    floats = timed("float", rounds, float_ladder)
+    wrong = sum(a != b for exact_row, float_row in zip(python, floats) for a, b in zip(exact_row, float_row))
+    quoted = args.ladders * args.size
+    print(f"float payouts off by at least one unit: {wrong} of {quoted} ({wrong / quoted:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+RPC router failover demo
+Three local stand-in nodes in front of one devnet; one is slowed, killed, revived, then another falls behind
+
+Each stand-in proxies JSON-RPC to the devnet (see benchmarks/devnet.py)
+with a few milliseconds of jitter and an occasional spike, and can be made slow, unreachable
+(HTTP 502) or lagging (eth_blockNumber reports an old head). Readers
+send eth_getBalance / eth_getBlockByNumber through an RpcRouter while a
+writer sends a self-transfer per interval, and every phase reports read
+latency, errors, hedges, which node served and where writes went.
+
+Usage:
+    python -m benchmarks.rpc_failover --phase-seconds 6 --readers 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.devnet import BOT_PRIVATE_KEY, Devnet
+
+
+DEVNET_PORT = 18545
+NODE_PORTS = (18601, 18602, 18603)
+
+# Base latency of every stand-in: uniform jitter, in seconds, plus an
+# independent spike on a small share of requests (a node's own tail)
+JITTER = (0.004, 0.012)
+SPIKE_RATE = 0.03
+SPIKE = 0.15
+
+
+class StandInNode:
+    """JSON-RPC proxy to the devnet with injectable latency, outage and lag"""
+    
+    def __init__(self, upstream: str, port: int):
+        self.upstream = upstream
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.extra_delay = 0.0
+        self.down = False
+        self.lag_blocks = 0
+        self._runner: Optional[web.AppRunner] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def start(self):
+        self._session = aiohttp.ClientSession()
+        app = web.Application()
+        app.router.add_post("/", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+    
+    async def stop(self):
+        await self._runner.cleanup()
+        await self._session.close()
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        spike = SPIKE if random.random() < SPIKE_RATE else 0.0
+        await asyncio.sleep(random.uniform(*JITTER) + spike + self.extra_delay)
+        if self.down:
+            return web.Response(status=502)
+        
+        async with self._session.post(self.upstream, data=body, headers={"Content-Type": "application/json"}) as response:
+            answer = await response.json()
+        if self.lag_blocks:
+            answer = self._lagged(json.loads(body), answer)
+        return web.json_response(answer)
+    
+    def _lagged(self, payload, answer):
+        """Report an older head on eth_blockNumber"""
+        requests = payload if isinstance(payload, list) else [payload]
+        answers = answer if isinstance(answer, list) else [answer]
+        lagging = {request.get("id") for request in requests if request.get("method") == "eth_blockNumber"}
+        for entry in answers:
+            if entry.get("id") in lagging and isinstance(entry.get("result"), str):
+                entry["result"] = hex(max(0, int(entry["result"], 16) - self.lag_blocks))
+        return answer
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Load:
+    """Readers and a writer going through the router, with per-phase tallies"""
+    
+    def __init__(self, router, address: str, account):
+        self.router = router
+        self.address = address
+        self.account = account
+        self.reset()
+    
+    def reset(self):
+        self.latencies: List[float] = []
+        self.read_errors = 0
+        self.writes = Counter()
+        self.write_errors = 0
+        self.served = {endpoint.label: endpoint.served for endpoint in self.router.endpoints}
+        self.hedges = (self.router.hedges, self.router.hedge_wins)
+    
+    async def reader(self, stop: asyncio.Event):
+        while not stop.is_set():
+            call = random.choice([
+                ("eth_getBalance", [self.address, "latest"]),
+                ("eth_getBlockByNumber", ["latest", False]),
+            ])
+            start = time.perf_counter()
+            try:
+                await self.router.request(*call)
+                self.latencies.append(time.perf_counter() - start)
+            except Exception:
+                self.read_errors += 1
+                await asyncio.sleep(0.05)
+    
+    async def writer(self, stop: asyncio.Event, interval: float):
+        chain_id = int(await self.router.request("eth_chainId", []), 16)
+        while not stop.is_set():
+            try:
+                nonce = int(await self.router.request("eth_getTransactionCount", [self.address, "pending"]), 16)
+                signed = self.account.sign_transaction({
+                    "to": self.address, "value": 0, "gas": 21000, "gasPrice": 10 ** 9,
+                    "nonce": nonce, "chainId": chain_id
+                })
+                raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+                await self.router.request("eth_sendRawTransaction", ["0x" + raw.hex().removeprefix("0x")])
+                self.writes[self.router.stats()["sticky"]] += 1
+            except Exception:
+                self.write_errors += 1
+            await asyncio.sleep(interval)
+    
+    def report(self, phase: str, seconds: float) -> Dict:
+        served = {
+            endpoint.label: endpoint.served - self.served[endpoint.label]
+            for endpoint in self.router.endpoints
+        }
+        hedges = self.router.hedges - self.hedges[0]
+        return {
+            'phase': phase,
+            'reads_per_s': len(self.latencies) / seconds,
+            'p50_ms': percentile(self.latencies, 0.5) * 1000,
+            'p99_ms': percentile(self.latencies, 0.99) * 1000,
+            'read_errors': self.read_errors,
+            'hedges': hedges,
+            'hedge_wins': self.router.hedge_wins - self.hedges[1],
+            'served': served,
+            'writes': dict(self.writes),
+            'write_errors': self.write_errors,
+            'ejected': [endpoint.label for endpoint in self.router.endpoints if endpoint.ejected]
+        }
+
+
+def print_phase(result: Dict):
+    served = "  ".join(f"{label.split(':')[-1]}={count}" for label, count in result['served'].items())
+    writes = ", ".join(f"{label.split(':')[-1]}: {count}" for label, count in result['writes'].items()) or "-"
+    print(
+        f"{result['phase']:<22} {result['reads_per_s']:7.0f} reads/s  p50 {result['p50_ms']:6.1f}ms  "
+        f"p99 {result['p99_ms']:7.1f}ms  errors {result['read_errors']:<3} hedges {result['hedges']:>4} "
+        f"(won {result['hedge_wins']:>3})  served {served}  writes [{writes}] failed {result['write_errors']}  "
+        f"ejected {','.join(label.split(':')[-1] for label in result['ejected']) or '-'}"
+    )
+
+
+async def run(args):
+    devnet = Devnet(args.devnet, DEVNET_PORT)
+    devnet.start()
+    nodes = [StandInNode(devnet.url, port) for port in NODE_PORTS]
+    try:
+        from eth_account import Account
+        
+        # Fund the writer, and mine some blocks so lag can be measured
+        w3 = devnet.web3()
+        account = Account.from_key(BOT_PRIVATE_KEY)
+        deployer = w3.eth.accounts[0]
+        w3.eth.send_transaction({"from": deployer, "to": account.address, "value": 10 ** 21})
+        for _ in range(2 * args.max_lag + 5):
+            w3.eth.send_transaction({"from": deployer, "to": deployer, "value": 0})
+        
+        # Settings are read when config is first imported
+        os.environ.update({
+            "RPC_PROBE_INTERVAL": str(args.probe_interval),
+            "RPC_MAX_BLOCK_LAG": str(args.max_lag),
+            "RPC_HEDGE": "false" if args.no_hedge else "true",
+        })
+        from services.rpc import BACKENDS
+        from services.rpc_router import RpcRouter
+        
+        for node in nodes:
+            await node.start()
+        router = RpcRouter(
+            [node.url for node in nodes],
+            lambda url: BACKENDS[args.backend](url, 20, 10)
+        )
+        load = Load(router, account.address, account)
+        stop = asyncio.Event()
+        tasks = [asyncio.create_task(load.reader(stop)) for _ in range(args.readers)]
+        tasks.append(asyncio.create_task(load.writer(stop, args.write_interval)))
+        
+        # Let the router measure every node before picking on the favourite
+        await asyncio.sleep(1)
+        load.reset()
+        
+        def favourite() -> StandInNode:
+            label = router.stats()['sticky'] or router._ranked()[0].label
+            return next(node for node in nodes if node.url.endswith(label.split(":")[-1]))
+        
+        target = favourite()
+        other = next(node for node in nodes if node is not target)
+        port = target.port
+        
+        def slow():
+            target.extra_delay = args.slow_ms / 1000
+        
+        def kill():
+            target.down = True
+        
+        def revive():
+            target.down = False
+            target.extra_delay = 0.0
+        
+        def lag():
+            other.lag_blocks = 2 * args.max_lag
+        
+        phases = [
+            ("healthy", None),
+            (f"{port} +{args.slow_ms}ms", slow),
+            (f"{port} down", kill),
+            (f"{port} back", revive),
+            (f"{other.port} lagging", lag),
+        ]
+        results = []
+        for name, action in phases:
+            if action is not None:
+                action()
+            load.reset()
+            await asyncio.sleep(args.phase_seconds)
+            result = load.report(name, args.phase_seconds)
+            print_phase(result)
+            results.append(result)
+        
+        stop.set()
+        await asyncio.gather(*tasks)
+        print(json.dumps(router.stats(), indent=2))
+        await router.close()
+        
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({'phases': results, 'router': router.stats()}, f, indent=2)
+    finally:
+        for node in nodes:
+            if node._runner is not None:
+                await node.stop()
+        devnet.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phase-seconds", type=float, default=6)
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent read loops")
+    parser.add_argument("--write-interval", type=float, default=0.5, help="Seconds between writes")
+    parser.add_argument("--slow-ms", type=float, default=250, help="Latency added to the slowed node")
+    parser.add_argument("--probe-interval", type=float, default=1)
+    parser.add_argument("--max-lag", type=int, default=5)
+    parser.add_argument("--no-hedge", action="store_true", help="Disable hedged reads for comparison")
+    parser.add_argument("--backend", choices=["thread", "async"], default="async")
+    parser.add_argument("--devnet", choices=["auto", "anvil", "eth-tester"], default="auto")
+    parser.add_argument("--output", help="Write phase results as JSON to this file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Viral market burst demo
+Many users open the same market at once; compares RPC calls and latency with read coalescing on and off
+
+A fresh devnet (see benchmarks/devnet.py) gets the benchmark contracts and
+some seeded markets. Each wave starts with an empty market cache (as after
+the market changed), then every viewer at once reads the hot market, the
+market count and a page of markets around it, as the market card and list
+handlers do. RPC traffic goes through a counting proxy, and each mode
+reports calls per wave, viewer latency and the coalescing ratio.
+
+Usage:
+    python -m benchmarks.viral_spike --viewers 200 --waves 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.devnet import Devnet, RpcCounter, deploy
+
+
+DEVNET_PORT = 18545
+PROXY_PORT = 18546
+
+# Markets on the page shown around the hot one
+PAGE_SIZE = 5
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def burst(blockchain, counter: RpcCounter, args, coalesce: bool) -> Dict:
+    """Run the waves with coalescing on or off and report what reached the node"""
+    from services.singleflight import SingleFlight
+    
+    blockchain.read_flight = SingleFlight(coalesce)
+    page = list(range(args.hot, args.hot + PAGE_SIZE))
+    
+    async def viewer() -> float:
+        start = time.perf_counter()
+        await asyncio.gather(
+            blockchain.get_market(args.hot),
+            blockchain.get_market_count(),
+            blockchain.get_markets(page)
+        )
+        return time.perf_counter() - start
+    
+    latencies = []
+    snapshot = counter.snapshot()
+    for _ in range(args.waves):
+        blockchain.market_cache.invalidate()
+        latencies.extend(await asyncio.gather(*(viewer() for _ in range(args.viewers))))
+    http_requests, calls = counter.since(snapshot)
+    
+    return {
+        'coalesce': coalesce,
+        'rpc_calls_per_wave': sum(calls.values()) / args.waves,
+        'http_requests_per_wave': http_requests / args.waves,
+        'calls': dict(calls),
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'reads': blockchain.read_flight.stats()
+    }
+
+
+def print_result(result: Dict):
+    print(
+        f"coalesce={'on ' if result['coalesce'] else 'off'}  "
+        f"{result['rpc_calls_per_wave']:7.1f} RPC calls/wave  "
+        f"{result['http_requests_per_wave']:7.1f} HTTP requests/wave  "
+        f"p50 {result['p50_ms']:7.1f}ms  p99 {result['p99_ms']:7.1f}ms  "
+        f"coalescing ratio {result['reads']['coalescing_ratio']:.3f}"
+    )
+
+
+async def run(args):
+    devnet = Devnet(args.devnet, DEVNET_PORT)
+    devnet.start()
+    try:
+        deployment = deploy(devnet, args.markets)
+        workdir = tempfile.mkdtemp(prefix="escalate-spike-")
+        
+        # Settings are read when config is first imported
+        os.environ.update({
+            "MONAD_RPC_URL": f"http://127.0.0.1:{PROXY_PORT}",
+            "PRIVATE_KEY": deployment.bot_key,
+            "CONTRACT_ADDRESS": deployment.escalate,
+            "USDC_ADDRESS": deployment.token,
+            "RESOLVER_ADDRESS": deployment.bot_address,
+            "NONCE_DB_PATH": os.path.join(workdir, "nonces.db"),
+            "RPC_BACKEND": args.backend,
+        })
+        os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:BENCHMARK")
+        os.environ.setdefault("MULTICALL3_ADDRESS", "")
+        from services.blockchain import BlockchainService
+        
+        counter = RpcCounter(devnet.url, PROXY_PORT)
+        await counter.start()
+        blockchain = BlockchainService()
+        try:
+            results = []
+            for coalesce in (False, True):
+                result = await burst(blockchain, counter, args, coalesce)
+                print_result(result)
+                results.append(result)
+        finally:
+            await blockchain.close()
+            await counter.stop()
+        
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({'devnet': devnet.kind, 'viewers': args.viewers, 'results': results}, f, indent=2)
+    finally:
+        devnet.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--viewers", type=int, default=200, help="Users opening the market in each wave")
+    parser.add_argument("--waves", type=int, default=10)
+    parser.add_argument("--markets", type=int, default=20, help="Markets seeded on the devnet")
+    parser.add_argument("--hot", type=int, default=1, help="ID of the viral market")
+    parser.add_argument("--backend", choices=["thread", "async"], default="async")
+    parser.add_argument("--devnet", choices=["auto", "anvil", "eth-tester"], default="auto")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
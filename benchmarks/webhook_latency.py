@@ -0,0 +1,233 @@
+"""
+Update intake latency benchmark
+Compares long polling with webhook mode against a local fake Telegram Bot API
+
+The fake API serves getUpdates (long polling) or pushes updates to the
+bot's webhook, and timestamps the sendMessage each /start update triggers,
+so the measured latency is update delivery + handling + reply.
+
+Usage:
+    python -m benchmarks.webhook_latency --updates 2000 --rate 500 --handler-delay 0.02
+"""
+import argparse
+import asyncio
+import secrets
+import statistics
+import time
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.filters import Command
+from aiogram.types import Message
+from aiohttp import ClientSession, TCPConnector, web
+
+from bot.webhook import SECRET_HEADER, WebhookServer
+
+
+TOKEN = "123456:BENCHMARK"
+API_PORT = 18081
+WEBHOOK_PORT = 18082
+
+
+class FakeTelegramAPI:
+    """Minimal Bot API: getMe, getUpdates, set/deleteWebhook and sendMessage"""
+    
+    def __init__(self, port: int):
+        self.port = port
+        self.pending = []
+        self.new_updates = asyncio.Event()
+        self.sent_at = {}
+        self.replied_at = {}
+        self.all_replied = asyncio.Event()
+        self.expected = 0
+        self._runner = None
+    
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+    
+    async def stop(self):
+        await self._runner.cleanup()
+    
+    def reset(self, expected: int):
+        self.pending.clear()
+        self.sent_at.clear()
+        self.replied_at.clear()
+        self.all_replied.clear()
+        self.expected = expected
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        
+        if method == "getMe":
+            result = {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method == "getUpdates":
+            result = await self._get_updates(int(params.get("offset", 0)), float(params.get("timeout", 0)))
+        elif method == "sendMessage":
+            chat_id = int(params["chat_id"])
+            self.replied_at[chat_id] = time.perf_counter()
+            if len(self.replied_at) >= self.expected:
+                self.all_replied.set()
+            result = {
+                "message_id": chat_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", "")
+            }
+        else:
+            # setWebhook, deleteWebhook
+            result = True
+        
+        return web.json_response({"ok": True, "result": result})
+    
+    async def _get_updates(self, offset: int, timeout: float) -> list:
+        self.pending = [update for update in self.pending if update["update_id"] >= offset]
+        if not self.pending and timeout:
+            self.new_updates.clear()
+            try:
+                await asyncio.wait_for(self.new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(self.pending[:100])
+    
+    def make_update(self, update_id: int) -> dict:
+        chat_id = 1_000_000 + update_id
+        self.sent_at[chat_id] = time.perf_counter()
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+                "text": "/start",
+                "entities": [{"type": "bot_command", "offset": 0, "length": 6}]
+            }
+        }
+    
+    def latencies(self) -> list:
+        return [self.replied_at[chat_id] - sent for chat_id, sent in self.sent_at.items() if chat_id in self.replied_at]
+
+
+def build_dispatcher(handler_delay: float) -> Dispatcher:
+    """Dispatcher with a /start handler standing in for the real one"""
+    router = Router()
+    
+    @router.message(Command("start"))
+    async def cmd_start(message: Message):
+        if handler_delay:
+            # Stands in for the chain reads a real handler makes
+            await asyncio.sleep(handler_delay)
+        await message.answer("🎯 Welcome to Escalate")
+    
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+def make_bot() -> Bot:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{API_PORT}"))
+    return Bot(token=TOKEN, session=session)
+
+
+async def send_updates(count: int, rate: float, deliver):
+    """Deliver `count` updates at a fixed rate (open loop)"""
+    start = time.perf_counter()
+    tasks = []
+    for update_id in range(1, count + 1):
+        delay = start + (update_id - 1) / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(deliver(update_id)))
+    await asyncio.gather(*tasks)
+
+
+async def run_polling(api: FakeTelegramAPI, count: int, rate: float, handler_delay: float) -> list:
+    """Latency with dp.start_polling against the fake getUpdates"""
+    api.reset(count)
+    bot = make_bot()
+    dp = build_dispatcher(handler_delay)
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=10))
+    await asyncio.sleep(0.5)
+    
+    async def deliver(update_id: int):
+        api.pending.append(api.make_update(update_id))
+        api.new_updates.set()
+    
+    await send_updates(count, rate, deliver)
+    await asyncio.wait_for(api.all_replied.wait(), timeout=60)
+    
+    await dp.stop_polling()
+    await polling
+    return api.latencies()
+
+
+async def run_webhook(api: FakeTelegramAPI, count: int, rate: float, handler_delay: float, workers: int) -> list:
+    """Latency with WebhookServer receiving pushes from the fake API"""
+    api.reset(count)
+    bot = make_bot()
+    dp = build_dispatcher(handler_delay)
+    secret = secrets.token_urlsafe(16)
+    server = WebhookServer(
+        dp, bot, secret,
+        host="127.0.0.1", port=WEBHOOK_PORT, path="/webhook",
+        workers=workers, queue_size=count, drain_timeout=10
+    )
+    await server.start()
+    
+    # Telegram opens at most 40 connections to a webhook by default
+    async with ClientSession(connector=TCPConnector(limit=40)) as session:
+        async def deliver(update_id: int):
+            async with session.post(
+                f"http://127.0.0.1:{WEBHOOK_PORT}/webhook",
+                json=api.make_update(update_id),
+                headers={SECRET_HEADER: secret}
+            ) as response:
+                response.raise_for_status()
+        
+        await send_updates(count, rate, deliver)
+        await asyncio.wait_for(api.all_replied.wait(), timeout=60)
+    
+    await server.stop()
+    await bot.session.close()
+    return api.latencies()
+
+
+def summarize(label: str, samples: list):
+    """Print latency percentiles in milliseconds"""
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p95 = ordered[int(len(ordered) * 0.95) - 1] * 1000
+    p99 = ordered[int(len(ordered) * 0.99) - 1] * 1000
+    mean = statistics.mean(samples) * 1000
+    print(f"{label:<8} n={len(samples):<6} mean={mean:8.2f}ms  p50={p50:8.2f}ms  p95={p95:8.2f}ms  p99={p99:8.2f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=200, help="Updates per second")
+    parser.add_argument("--handler-delay", type=float, default=0.0, help="Seconds each handler waits")
+    parser.add_argument("--workers", type=int, default=16, help="Webhook worker count")
+    args = parser.parse_args()
+    
+    api = FakeTelegramAPI(API_PORT)
+    await api.start()
+    try:
+        print(
+            f"updates: {args.updates}  rate: {args.rate}/s  "
+            f"handler delay: {args.handler_delay * 1000:.0f}ms  webhook workers: {args.workers}"
+        )
+        summarize("polling", await run_polling(api, args.updates, args.rate, args.handler_delay))
+        summarize("webhook", await run_webhook(api, args.updates, args.rate, args.handler_delay, args.workers))
+    finally:
+        await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1 +1,14 @@
 """Bot package"""
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from config import Config
+
+
+def create_bot() -> Bot:
+    """Bot for Config.TELEGRAM_BOT_TOKEN, on Config.TELEGRAM_API_URL if set (e.g. a local Bot API server)"""
+    if Config.TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(Config.TELEGRAM_API_URL))
+        return Bot(token=Config.TELEGRAM_BOT_TOKEN, session=session)
+    return Bot(token=Config.TELEGRAM_BOT_TOKEN)
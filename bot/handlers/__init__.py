@@ -1 +1,10 @@
 """Bot handlers package"""
+from aiogram import Dispatcher
+
+from bot.handlers import start, markets, create, bet, resolve, inline
+
+
+def include_routers(dp: Dispatcher):
+    """Register every handler router on a dispatcher"""
+    for module in (start, markets, create, bet, resolve, inline):
+        dp.include_router(module.router)
@@ -3,51 +3,34 @@ Betting handlers
 Implements FSM flow for placing bets on markets
 """
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, Message
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 from aiogram.fsm.context import FSMContext
 from datetime import datetime
+from typing import Optional, Tuple
 
 from bot.states import PlaceBetStates
 from bot.keyboards import (
-    get_confirmation_keyboard,
+    get_bet_confirmation_keyboard,
     get_cancel_keyboard,
-    get_main_menu_keyboard,
-    get_market_list_keyboard
+    get_main_menu_keyboard
 )
+from bot.render import render_market_list_keyboard, render_market_summary
+from config import Config
 from services.blockchain import BlockchainService
+from services.quotes import Quote, format_units, quote_ladder, to_units
 
 router = Router()
 
 
 @router.callback_query(F.data == "place_bet")
-async def start_place_bet(callback: CallbackQuery, state: FSMContext):
+async def start_place_bet(callback: CallbackQuery, state: FSMContext, blockchain: BlockchainService):
     """Start bet placement flow by showing markets"""
     await callback.answer("Loading markets...")
     
     try:
-        blockchain = BlockchainService()
-        
-        # Get active markets
-        market_count = await blockchain.get_market_count()
-        
-        if market_count == 0:
-            await callback.message.edit_text(
-                "📊 *No markets available*\n\n"
-                "Create a market first!",
-                reply_markup=get_main_menu_keyboard(),
-                parse_mode="Markdown"
-            )
-            return
-        
-        # Fetch active markets
-        active_markets = []
-        now = int(datetime.utcnow().timestamp())
-        
-        for market_id in range(1, market_count + 1):
-            market = await blockchain.get_market(market_id)
-            
-            if market and not market['resolved'] and market['expiry'] > now:
-                active_markets.append(market)
+        # First page of active markets from the market index
+        active_markets, _, _ = await blockchain.get_active_markets_page(size=5)
         
         if not active_markets:
             await callback.message.edit_text(
@@ -58,38 +41,15 @@ async def start_place_bet(callback: CallbackQuery, state: FSMContext):
             )
             return
         
-        # Build message with market details
+        # Build message from the cached market summaries
         message_text = "💰 *Select a market to bet on:*\n━━━━━━━━━━━━━━━━━━━━\n\n"
-        
-        for market in active_markets[:5]:
-            total_yes = blockchain.parse_mon_amount(market['total_yes'])
-            total_no = blockchain.parse_mon_amount(market['total_no'])
-            total_pool = total_yes + total_no
-            
-            # Calculate expiry time
-            expiry_dt = datetime.fromtimestamp(market['expiry'])
-            time_left = expiry_dt - datetime.utcnow()
-            
-            if time_left.days > 0:
-                time_str = f"{time_left.days}d {time_left.seconds // 3600}h"
-            elif time_left.seconds >= 3600:
-                time_str = f"{time_left.seconds // 3600}h {(time_left.seconds % 3600) // 60}m"
-            else:
-                time_str = f"{time_left.seconds // 60}m"
-            
-            message_text += (
-                f"📈 *Market #{market['id']}*\n"
-                f"❓ {market['question']}\n\n"
-                f"💰 *Pool:* {total_pool:.2f} MON\n"
-                f"  ✅ YES: {total_yes:.2f} MON\n"
-                f"  ❌ NO: {total_no:.2f} MON\n"
-                f"⏰ *Expires in:* {time_str}\n"
-                f"━━━━━━━━━━━━━━━━━━━━\n\n"
-            )
+        now = int(datetime.utcnow().timestamp())
+        for market in active_markets:
+            message_text += render_market_summary(market, blockchain, now) + "\n━━━━━━━━━━━━━━━━━━━━\n\n"
         
         await callback.message.edit_text(
             message_text,
-            reply_markup=get_market_list_keyboard(active_markets[:5]),
+            reply_markup=render_market_list_keyboard(active_markets),
             parse_mode="Markdown"
         )
         
@@ -101,156 +61,256 @@ async def start_place_bet(callback: CallbackQuery, state: FSMContext):
         )
 
 
+async def begin_bet(
+    state: FSMContext,
+    blockchain: BlockchainService,
+    side: str,
+    market_id: int
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Start a bet on one side of a market
+    
+    Args:
+        state: FSM context of the user's private chat
+        blockchain: Blockchain service
+        side: "yes" or "no"
+        market_id: Market to bet on
+    
+    Returns:
+        (amount prompt, None) once the state awaits the amount,
+        or (None, error to show the user)
+    """
+    market = await blockchain.get_market(market_id)
+    
+    if not market:
+        return None, "Market not found"
+    
+    # Check if market is still active
+    now = int(datetime.utcnow().timestamp())
+    if market['resolved']:
+        return None, "This market has been resolved"
+    
+    if market['expiry'] <= now:
+        return None, "This market has expired"
+    
+    # Save bet details
+    await state.update_data(
+        market_id=market_id,
+        side=side,
+        side_bool=(side == "yes"),
+        question=market['question']
+    )
+    await state.set_state(PlaceBetStates.entering_amount)
+    
+    side_emoji = "✅ YES" if side == "yes" else "❌ NO"
+    
+    prompt = (
+        f"💰 *Place Bet*\n\n"
+        f"*Market:* {market['question']}\n"
+        f"*Side:* {side_emoji}\n\n"
+        f"Enter the amount in MON you want to bet.\n\n"
+        f"Example: `10` or `25.50`"
+    )
+    return prompt, None
+
+
 @router.callback_query(F.data.startswith("bet_yes_") | F.data.startswith("bet_no_"))
-async def select_bet_side(callback: CallbackQuery, state: FSMContext):
+async def select_bet_side(callback: CallbackQuery, state: FSMContext, blockchain: BlockchainService):
     """Handle bet side selection"""
     parts = callback.data.split("_")
     side = parts[1]  # "yes" or "no"
     market_id = int(parts[2])
     
     try:
-        blockchain = BlockchainService()
-        market = await blockchain.get_market(market_id)
+        prompt, error = await begin_bet(state, blockchain, side, market_id)
         
-        if not market:
-            await callback.answer("Market not found", show_alert=True)
+        if error:
+            await callback.answer(error, show_alert=True)
             return
         
-        # Check if market is still active
-        now = int(datetime.utcnow().timestamp())
-        if market['resolved']:
-            await callback.answer("This market has been resolved", show_alert=True)
+        if callback.message is not None:
+            await callback.message.edit_text(
+                prompt,
+                reply_markup=get_cancel_keyboard(),
+                parse_mode="Markdown"
+            )
+            await callback.answer()
             return
         
-        if market['expiry'] <= now:
-            await callback.answer("This market has expired", show_alert=True)
+        # Pressed on a card shared through inline mode. Such callbacks have
+        # no chat, so the FSM state above belongs to the user's private chat
+        # with the bot, and the bet continues there.
+        try:
+            await callback.bot.send_message(
+                callback.from_user.id,
+                prompt,
+                reply_markup=get_cancel_keyboard(),
+                parse_mode="Markdown"
+            )
+        except TelegramForbiddenError:
+            # The user has never started the bot; open it with a deep link
+            # that starts the same bet (see cmd_start_bet)
+            await state.clear()
+            me = await callback.bot.me()
+            await callback.answer(url=f"https://t.me/{me.username}?start={callback.data}")
             return
         
-        # Save bet details
-        await state.update_data(
-            market_id=market_id,
-            side=side,
-            side_bool=(side == "yes"),
-            question=market['question']
-        )
-        await state.set_state(PlaceBetStates.entering_amount)
-        
-        side_emoji = "✅ YES" if side == "yes" else "❌ NO"
-        
-        await callback.message.edit_text(
-            f"💰 *Place Bet*\n\n"
-            f"*Market:* {market['question']}\n"
-            f"*Side:* {side_emoji}\n\n"
-            f"Enter the amount in MON you want to bet.\n\n"
-            f"Example: `10` or `25.50`",
-            reply_markup=get_cancel_keyboard(),
-            parse_mode="Markdown"
-        )
-        await callback.answer()
+        await callback.answer("💬 Continue in your chat with the bot")
         
     except Exception as e:
         await callback.answer(f"Error: {str(e)}", show_alert=True)
 
 
+# Quick-pick amounts offered on the confirmation screen, in token units
+QUICK_PICK_UNITS = [to_units(amount) for amount in Config.QUICK_PICK_AMOUNTS]
+
+# Largest accepted bet, in token units
+MAX_BET_UNITS = 1_000_000 * 10 ** Config.USDC_DECIMALS
+
+
+def bet_amount_error(amount_units: int) -> Optional[str]:
+    """Why an amount cannot be bet, or None if it can"""
+    if amount_units <= 0:
+        return "❌ Amount must be greater than 0."
+    if amount_units > MAX_BET_UNITS:
+        return "❌ Amount too large. Maximum bet is 1,000,000 MON."
+    return None
+
+
+def format_profit(quote: Quote) -> Tuple[str, str]:
+    """Emoji and text for a quote's profit"""
+    profit_percent = quote.profit * 100 / quote.amount
+    if quote.profit > 0:
+        return "📈", f"+{format_units(quote.profit)} MON (+{profit_percent:.1f}%)"
+    elif quote.profit < 0:
+        return "📉", f"{format_units(quote.profit)} MON ({profit_percent:.1f}%)"
+    else:
+        return "➖", "0.00 MON (0%)"
+
+
+def format_bet_confirmation(data: dict, market: dict, amount_units: int) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Confirmation text and keyboard for a bet
+    
+    The chosen amount and every quick pick are quoted in one pass against
+    the market's current pools.
+    
+    Args:
+        data: FSM data of the bet (question, side)
+        market: Current market data
+        amount_units: Chosen amount in token units
+    """
+    side = data['side']
+    side_emoji = "✅ YES" if side == "yes" else "❌ NO"
+    
+    picks = [units for units in QUICK_PICK_UNITS if units != amount_units]
+    quotes = quote_ladder(market['total_yes'], market['total_no'], side == "yes", [amount_units] + picks)
+    chosen = quotes[0]
+    profit_emoji, profit_text = format_profit(chosen)
+    
+    text = (
+        "📋 *Confirm Bet*\n\n"
+        f"*Market:* {data['question']}\n"
+        f"*Side:* {side_emoji}\n"
+        f"*Amount:* {format_units(amount_units)} MON\n\n"
+        f"💰 *Potential Returns (if you win):*\n"
+        f"  • Payout: {format_units(chosen.payout)} MON\n"
+        f"  • Profit: {profit_emoji} {profit_text}\n"
+        f"  • {side.upper()} odds after your bet: {chosen.probability_bps / 100:.1f}%\n\n"
+    )
+    
+    if picks:
+        text += "⚡ *Quick picks (payout if you win):*\n"
+        for pick in quotes[1:]:
+            text += (
+                f"  • {format_units(pick.amount, None)} MON → {format_units(pick.payout)} MON "
+                f"({pick.profit * 100 / pick.amount:+.1f}%)\n"
+            )
+        text += "\n"
+    
+    text += (
+        "⚠️ This will:\n"
+        "1. Approve MON spending (if needed)\n"
+        "2. Place your bet on-chain\n\n"
+        "Proceed?"
+    )
+    
+    keyboard = get_bet_confirmation_keyboard([(units, f"{format_units(units, None)} MON") for units in picks])
+    return text, keyboard
+
+
 @router.message(PlaceBetStates.entering_amount)
-async def process_bet_amount(message: Message, state: FSMContext):
+async def process_bet_amount(message: Message, state: FSMContext, blockchain: BlockchainService):
     """Process bet amount"""
     try:
-        amount = float(message.text.strip())
-        
-        # Validate amount
-        if amount <= 0:
-            await message.answer(
-                "❌ Amount must be greater than 0.",
-                parse_mode="Markdown"
-            )
-            return
-        
-        if amount > 1000000:
-            await message.answer(
-                "❌ Amount too large. Maximum bet is 1,000,000 MON.",
-                parse_mode="Markdown"
-            )
+        amount_units = to_units(message.text)
+    except ValueError as e:
+        # Plain text: the error may quote what the user typed
+        await message.answer(f"❌ {e}. Please enter an amount in MON.\n\nExample: 10 or 25.50")
+        return
+    
+    # Validate amount
+    error = bet_amount_error(amount_units)
+    if error is not None:
+        await message.answer(error, parse_mode="Markdown")
+        return
+    
+    # Save amount
+    await state.update_data(amount=blockchain.parse_mon_amount(amount_units), amount_units=amount_units)
+    await state.set_state(PlaceBetStates.confirming_bet)
+    
+    # Quote against the current pools (served from the market cache or store)
+    data = await state.get_data()
+    market = await blockchain.get_market(data['market_id'])
+    
+    confirmation_text, keyboard = format_bet_confirmation(data, market, amount_units)
+    await message.answer(
+        confirmation_text,
+        reply_markup=keyboard,
+        parse_mode="Markdown"
+    )
+
+
+@router.callback_query(F.data.startswith("bet_amount_"), PlaceBetStates.confirming_bet)
+async def pick_bet_amount(callback: CallbackQuery, state: FSMContext, blockchain: BlockchainService):
+    """Switch the bet to a quick-pick amount"""
+    try:
+        # Callback data comes from the client; only the amounts offered are accepted
+        amount_units = int(callback.data.split("_")[2])
+        if amount_units not in QUICK_PICK_UNITS or bet_amount_error(amount_units) is not None:
+            await callback.answer("❌ That amount is not on offer.", show_alert=True)
             return
         
-        # Save amount
-        await state.update_data(amount=amount)
-        await state.set_state(PlaceBetStates.confirming_bet)
-        
-        # Get saved data
+        await state.update_data(amount=blockchain.parse_mon_amount(amount_units), amount_units=amount_units)
         data = await state.get_data()
-        question = data['question']
-        side = data['side']
-        side_bool = data['side_bool']
-        market_id = data['market_id']
-        side_emoji = "✅ YES" if side == "yes" else "❌ NO"
-        
-        # Get market data to calculate profit/loss
-        blockchain = BlockchainService()
-        market = await blockchain.get_market(market_id)
-        
-        current_yes = blockchain.parse_mon_amount(market['total_yes'])
-        current_no = blockchain.parse_mon_amount(market['total_no'])
-        
-        # Calculate new pools after bet
-        new_yes = current_yes + (amount if side_bool else 0)
-        new_no = current_no + (amount if not side_bool else 0)
-        total_pool = new_yes + new_no
-        
-        # Calculate potential payout and profit
-        if side_bool:  # Betting YES
-            # If YES wins, you get (total_pool * your_share_of_yes_pool)
-            your_share = amount / new_yes if new_yes > 0 else 0
-            potential_payout = total_pool * your_share
-        else:  # Betting NO
-            your_share = amount / new_no if new_no > 0 else 0
-            potential_payout = total_pool * your_share
-        
-        profit = potential_payout - amount
-        profit_percent = (profit / amount * 100) if amount > 0 else 0
-        
-        # Format profit/loss display
-        if profit > 0:
-            profit_emoji = "📈"
-            profit_text = f"+{profit:.2f} MON (+{profit_percent:.1f}%)"
-        elif profit < 0:
-            profit_emoji = "📉"
-            profit_text = f"{profit:.2f} MON ({profit_percent:.1f}%)"
-        else:
-            profit_emoji = "➖"
-            profit_text = "0.00 MON (0%)"
-        
-        # Show confirmation
-        confirmation_text = (
-            "📋 *Confirm Bet*\n\n"
-            f"*Market:* {question}\n"
-            f"*Side:* {side_emoji}\n"
-            f"*Amount:* {amount:.2f} MON\n\n"
-            f"💰 *Potential Returns (if you win):*\n"
-            f"  • Payout: {potential_payout:.2f} MON\n"
-            f"  • Profit: {profit_emoji} {profit_text}\n\n"
-            "⚠️ This will:\n"
-            "1. Approve MON spending\n"
-            "2. Place your bet on-chain\n\n"
-            "Proceed?"
-        )
+        market = await blockchain.get_market(data['market_id'])
         
-        await message.answer(
+        confirmation_text, keyboard = format_bet_confirmation(data, market, amount_units)
+        await callback.message.edit_text(
             confirmation_text,
-            reply_markup=get_confirmation_keyboard("confirm_place_bet"),
+            reply_markup=keyboard,
             parse_mode="Markdown"
         )
+        await callback.answer()
         
-    except ValueError:
-        await message.answer(
-            "❌ Invalid amount. Please enter a number.\n\n"
-            "Example: `10` or `25.50`",
-            parse_mode="Markdown"
-        )
+    except Exception as e:
+        await callback.answer(f"Error: {str(e)}", show_alert=True)
+
+
+def format_bet_error(error: Exception) -> str:
+    """Format bet failure message"""
+    return (
+        "❌ *Bet Placement Failed*\n\n"
+        f"Error: {str(error)}\n\n"
+        "Please check:\n"
+        "• You have sufficient MON balance\n"
+        "• The market is still active\n"
+        "• Your wallet has enough gas"
+    )
 
 
 @router.callback_query(F.data == "confirm_place_bet", PlaceBetStates.confirming_bet)
-async def confirm_place_bet(callback: CallbackQuery, state: FSMContext):
+async def confirm_place_bet(callback: CallbackQuery, state: FSMContext, blockchain: BlockchainService):
     """Confirm and execute bet placement"""
     await callback.answer("Processing bet...")
     
@@ -261,73 +321,78 @@ async def confirm_place_bet(callback: CallbackQuery, state: FSMContext):
     amount = data['amount']
     question = data['question']
     side = data['side']
+    side_emoji = "✅ YES" if side == "yes" else "❌ NO"
     
     try:
-        blockchain = BlockchainService()
-        
-        # Convert amount to token units
-        amount_wei = blockchain.format_mon_amount(amount)
-        
-        # Step 1: Approve USDC
-        await callback.message.edit_text(
-            "⏳ *Step 1/2: Approving MON...*\n\n"
-            "Please wait while we approve the token spending.",
-            parse_mode="Markdown"
-        )
+        # Token units, parsed exactly from the user's input
+        amount_wei = data['amount_units']
         
-        approve_tx = await blockchain.approve_mon(amount_wei)
-        
-        # Step 2: Place bet
         await callback.message.edit_text(
-            "⏳ *Step 2/2: Placing bet...*\n\n"
-            "Submitting your bet to the blockchain.",
+            "⏳ *Submitting bet...*\n\n"
+            "Placing your bet on-chain.",
             parse_mode="Markdown"
         )
         
-        bet_tx = await blockchain.place_bet(market_id, side_bool, amount_wei)
-        
-        # Get updated market data
-        updated_market = await blockchain.get_market(market_id)
-        total_yes = blockchain.parse_mon_amount(updated_market['total_yes'])
-        total_no = blockchain.parse_mon_amount(updated_market['total_no'])
+        # Queued; approves first only if the tracked allowance is too low
+        bet_tx = await blockchain.place_bet(market_id, side_bool, amount_wei, user_id=callback.from_user.id)
         
         # Clear state
         await state.clear()
         
-        side_emoji = "✅ YES" if side == "yes" else "❌ NO"
-        
-        # Show success message with updated pools
-        success_text = (
-            "✅ *Bet Placed Successfully!*\n\n"
+        await callback.message.edit_text(
+            "⏳ *Bet Submitted*\n\n"
             f"*Market:* {question}\n"
             f"*Side:* {side_emoji}\n"
             f"*Amount:* {amount:.2f} MON\n\n"
-            f"*Updated Pools:*\n"
-            f"  ✅ YES: {total_yes:.2f} MON\n"
-            f"  ❌ NO: {total_no:.2f} MON\n\n"
-            f"*Transaction Hash:*\n`{bet_tx}`"
-        )
-        
-        await callback.message.edit_text(
-            success_text,
-            reply_markup=get_main_menu_keyboard(),
+            "Waiting for confirmation...",
             parse_mode="Markdown"
         )
         
+        message = callback.message
+        
+        async def on_bet_confirmed(pending):
+            """Show the result once the bet is mined"""
+            try:
+                await pending.wait()
+                
+                # Get updated market data
+                updated_market = await blockchain.get_market(market_id)
+                total_yes = blockchain.parse_mon_amount(updated_market['total_yes'])
+                total_no = blockchain.parse_mon_amount(updated_market['total_no'])
+                
+                # Show success message with updated pools
+                success_text = (
+                    "✅ *Bet Placed Successfully!*\n\n"
+                    f"*Market:* {question}\n"
+                    f"*Side:* {side_emoji}\n"
+                    f"*Amount:* {amount:.2f} MON\n\n"
+                    f"*Updated Pools:*\n"
+                    f"  ✅ YES: {total_yes:.2f} MON\n"
+                    f"  ❌ NO: {total_no:.2f} MON\n\n"
+                    f"*Transaction Hash:*\n`{pending.tx_hash}`"
+                )
+                
+                await message.edit_text(
+                    success_text,
+                    reply_markup=get_main_menu_keyboard(),
+                    parse_mode="Markdown"
+                )
+                
+            except Exception as e:
+                await message.edit_text(
+                    format_bet_error(e),
+                    reply_markup=get_main_menu_keyboard(),
+                    parse_mode="Markdown"
+                )
+        
+        # Handler returns now; the callback fires once the queued bet is mined
+        bet_tx.add_callback(on_bet_confirmed)
+        
     except Exception as e:
         await state.clear()
         
-        error_text = (
-            "❌ *Bet Placement Failed*\n\n"
-            f"Error: {str(e)}\n\n"
-            "Please check:\n"
-            "• You have sufficient MON balance\n"
-            "• The market is still active\n"
-            "• Your wallet has enough gas"
-        )
-        
         await callback.message.edit_text(
-            error_text,
+            format_bet_error(e),
             reply_markup=get_main_menu_keyboard(),
             parse_mode="Markdown"
         )
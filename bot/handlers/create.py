@@ -118,8 +118,17 @@ async def process_expiry(message: Message, state: FSMContext):
         )
 
 
+def format_creation_error(error: Exception) -> str:
+    """Format market creation failure message"""
+    return (
+        "❌ *Market Creation Failed*\n\n"
+        f"Error: {str(error)}\n\n"
+        "Please try again or contact support."
+    )
+
+
 @router.callback_query(F.data == "confirm_create_market", CreateMarketStates.confirming)
-async def confirm_create_market(callback: CallbackQuery, state: FSMContext):
+async def confirm_create_market(callback: CallbackQuery, state: FSMContext, blockchain: BlockchainService):
     """Confirm and execute market creation"""
     await callback.answer("Creating market...")
     
@@ -137,38 +146,58 @@ async def confirm_create_market(callback: CallbackQuery, state: FSMContext):
         )
         
         # Create market on blockchain
-        blockchain = BlockchainService()
-        tx_hash, market_id = await blockchain.create_market(question, expiry)
+        create_tx = await blockchain.create_market(question, expiry, user_id=callback.from_user.id)
         
         # Clear state
         await state.clear()
         
-        # Show success message
-        success_text = (
-            "✅ *Market Created Successfully!*\n\n"
-            f"*Market ID:* #{market_id}\n"
-            f"*Question:* {question}\n\n"
-            f"*Transaction Hash:*\n`{tx_hash}`\n\n"
-            "Your market is now live and accepting bets!"
-        )
-        
         await callback.message.edit_text(
-            success_text,
-            reply_markup=get_main_menu_keyboard(),
+            "⏳ *Market Submitted*\n\n"
+            f"*Question:* {question}\n\n"
+            "Waiting for confirmation...",
             parse_mode="Markdown"
         )
         
+        message = callback.message
+        
+        async def on_market_created(pending):
+            """Show the result once the creation is mined"""
+            try:
+                receipt = await pending.wait()
+                
+                # The new market ID comes from this transaction, not the latest marketCount
+                market_id = await blockchain.get_created_market_id(receipt)
+                
+                # Show success message
+                success_text = (
+                    "✅ *Market Created Successfully!*\n\n"
+                    f"*Market ID:* #{market_id}\n"
+                    f"*Question:* {question}\n\n"
+                    f"*Transaction Hash:*\n`{pending.tx_hash}`\n\n"
+                    "Your market is now live and accepting bets!"
+                )
+                
+                await message.edit_text(
+                    success_text,
+                    reply_markup=get_main_menu_keyboard(),
+                    parse_mode="Markdown"
+                )
+                
+            except Exception as e:
+                await message.edit_text(
+                    format_creation_error(e),
+                    reply_markup=get_main_menu_keyboard(),
+                    parse_mode="Markdown"
+                )
+        
+        # Handler returns now; the callback fires once the queued creation is mined
+        create_tx.add_callback(on_market_created)
+        
     except Exception as e:
         await state.clear()
         
-        error_text = (
-            "❌ *Market Creation Failed*\n\n"
-            f"Error: {str(e)}\n\n"
-            "Please try again or contact support."
-        )
-        
         await callback.message.edit_text(
-            error_text,
+            format_creation_error(e),
             reply_markup=get_main_menu_keyboard(),
             parse_mode="Markdown"
         )
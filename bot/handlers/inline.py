@@ -0,0 +1,57 @@
+"""
+Inline query handler
+Answers "@bot <keywords>" with matching market cards that can be bet on from any chat
+"""
+import logging
+from datetime import datetime
+
+from aiogram import Router
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+
+from bot.render import format_time_remaining, render_inline_card
+from config import Config
+from services.blockchain import BlockchainService
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+
+def format_result_description(market: dict, blockchain: BlockchainService, now: int) -> str:
+    """One-line odds, liquidity and time left shown under an inline result"""
+    total_yes = blockchain.parse_mon_amount(market['total_yes'])
+    total_no = blockchain.parse_mon_amount(market['total_no'])
+    total_liquidity = total_yes + total_no
+    yes_prob = (total_yes / total_liquidity) * 100 if total_liquidity > 0 else 50.0
+    
+    return (
+        f"YES {yes_prob:.0f}% · NO {100-yes_prob:.0f}% · "
+        f"{total_liquidity:.2f} MON · {format_time_remaining(market['expiry'], now)}"
+    )
+
+
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery, blockchain: BlockchainService):
+    """Search active markets by question keywords"""
+    try:
+        markets = await blockchain.search_markets(inline_query.query, Config.INLINE_RESULTS)
+    except Exception as e:
+        logger.warning(f"Inline search for '{inline_query.query}' failed: {e}")
+        markets = []
+    
+    now = int(datetime.utcnow().timestamp())
+    results = []
+    for market in markets:
+        text, keyboard = render_inline_card(market, blockchain, now)
+        results.append(
+            InlineQueryResultArticle(
+                id=str(market['id']),
+                title=f"#{market['id']} {market['question']}",
+                description=format_result_description(market, blockchain, now),
+                input_message_content=InputTextMessageContent(message_text=text, parse_mode="Markdown"),
+                reply_markup=keyboard
+            )
+        )
+    
+    # Results are the same for everyone, so Telegram may share them between users
+    await inline_query.answer(results, cache_time=Config.INLINE_CACHE_TIME, is_personal=False)
@@ -16,11 +16,9 @@ router = Router()
 
 
 @router.message(Command("resolve"))
-async def cmd_resolve(message: Message, state: FSMContext):
+async def cmd_resolve(message: Message, state: FSMContext, blockchain: BlockchainService):
     """Handle /resolve command (resolver only)"""
     try:
-        blockchain = BlockchainService()
-        
         # Check if user is resolver
         if blockchain.wallet_address.lower() != Config.RESOLVER_ADDRESS.lower():
             await message.answer(
@@ -48,7 +46,7 @@ async def cmd_resolve(message: Message, state: FSMContext):
 
 
 @router.message(ResolveMarketStates.entering_market_id)
-async def process_market_id(message: Message, state: FSMContext):
+async def process_market_id(message: Message, state: FSMContext, blockchain: BlockchainService):
     """Process market ID for resolution"""
     try:
         market_id = int(message.text.strip())
@@ -61,7 +59,6 @@ async def process_market_id(message: Message, state: FSMContext):
             return
         
         # Fetch market
-        blockchain = BlockchainService()
         market = await blockchain.get_market(market_id)
         
         if not market:
@@ -143,8 +140,17 @@ async def process_outcome(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
+def format_resolution_error(error: Exception) -> str:
+    """Format resolution failure message"""
+    return (
+        "❌ *Resolution Failed*\n\n"
+        f"Error: {str(error)}\n\n"
+        "Please try again or contact support."
+    )
+
+
 @router.callback_query(F.data == "confirm_resolve", ResolveMarketStates.confirming_resolution)
-async def confirm_resolution(callback: CallbackQuery, state: FSMContext):
+async def confirm_resolution(callback: CallbackQuery, state: FSMContext, blockchain: BlockchainService):
     """Confirm and execute market resolution"""
     await callback.answer("Resolving market...")
     
@@ -153,6 +159,7 @@ async def confirm_resolution(callback: CallbackQuery, state: FSMContext):
     outcome_bool = data['outcome_bool']
     outcome = data['outcome']
     question = data['question']
+    outcome_emoji = "✅ YES" if outcome == "yes" else "❌ NO"
     
     try:
         await callback.message.edit_text(
@@ -161,39 +168,55 @@ async def confirm_resolution(callback: CallbackQuery, state: FSMContext):
             parse_mode="Markdown"
         )
         
-        blockchain = BlockchainService()
-        tx_hash = await blockchain.resolve_market(market_id, outcome_bool)
+        resolve_tx = await blockchain.resolve_market(market_id, outcome_bool, user_id=callback.from_user.id)
         
         await state.clear()
         
-        outcome_emoji = "✅ YES" if outcome == "yes" else "❌ NO"
-        
-        success_text = (
-            "✅ *Market Resolved Successfully!*\n\n"
+        await callback.message.edit_text(
+            "⏳ *Resolution Submitted*\n\n"
             f"*Market ID:* #{market_id}\n"
-            f"*Question:* {question}\n"
             f"*Outcome:* {outcome_emoji}\n\n"
-            f"*Transaction Hash:*\n`{tx_hash}`\n\n"
-            "Winners can now claim their winnings."
-        )
-        
-        await callback.message.edit_text(
-            success_text,
-            reply_markup=get_main_menu_keyboard(),
+            "Waiting for confirmation...",
             parse_mode="Markdown"
         )
         
+        message = callback.message
+        
+        async def on_market_resolved(pending):
+            """Show the result once the resolution is mined"""
+            try:
+                await pending.wait()
+                
+                success_text = (
+                    "✅ *Market Resolved Successfully!*\n\n"
+                    f"*Market ID:* #{market_id}\n"
+                    f"*Question:* {question}\n"
+                    f"*Outcome:* {outcome_emoji}\n\n"
+                    f"*Transaction Hash:*\n`{pending.tx_hash}`\n\n"
+                    "Winners can now claim their winnings."
+                )
+                
+                await message.edit_text(
+                    success_text,
+                    reply_markup=get_main_menu_keyboard(),
+                    parse_mode="Markdown"
+                )
+                
+            except Exception as e:
+                await message.edit_text(
+                    format_resolution_error(e),
+                    reply_markup=get_main_menu_keyboard(),
+                    parse_mode="Markdown"
+                )
+        
+        # Handler returns now; the callback fires once the queued resolution is mined
+        resolve_tx.add_callback(on_market_resolved)
+        
     except Exception as e:
         await state.clear()
         
-        error_text = (
-            "❌ *Resolution Failed*\n\n"
-            f"Error: {str(e)}\n\n"
-            "Please try again or contact support."
-        )
-        
         await callback.message.edit_text(
-            error_text,
+            format_resolution_error(e),
             reply_markup=get_main_menu_keyboard(),
             parse_mode="Markdown"
         )
@@ -3,15 +3,39 @@ Start command handler
 Displays main menu and handles navigation
 """
 from aiogram import Router, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject, CommandStart
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
-from bot.keyboards import get_main_menu_keyboard
+from bot.handlers.bet import begin_bet
+from bot.keyboards import get_cancel_keyboard, get_main_menu_keyboard
+from services.blockchain import BlockchainService
 
 router = Router()
 
 
+@router.message(CommandStart(deep_link=True, magic=F.args.regexp(r"^bet_(yes|no)_\d+$")))
+async def cmd_start_bet(message: Message, command: CommandObject, state: FSMContext, blockchain: BlockchainService):
+    """Handle /start bet_<side>_<id>, sent by an inline market card's deep link"""
+    await state.clear()
+    
+    _, side, market_id = command.args.split("_")
+    prompt, error = await begin_bet(state, blockchain, side, int(market_id))
+    
+    if error:
+        await message.answer(
+            f"❌ {error}",
+            reply_markup=get_main_menu_keyboard()
+        )
+        return
+    
+    await message.answer(
+        prompt,
+        reply_markup=get_cancel_keyboard(),
+        parse_mode="Markdown"
+    )
+
+
 @router.message(Command("start"))
 async def cmd_start(message: Message, state: FSMContext):
     """Handle /start command"""
@@ -3,7 +3,17 @@ Inline keyboards for Escalate Bot
 Provides Polymarket-style interactive keyboards
 """
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+
+# Telegram rejects buttons whose callback data is longer than this (in bytes)
+MAX_CALLBACK_DATA = 64
+
+
+def callback_button(text: str, callback_data: str) -> InlineKeyboardButton:
+    """Button whose callback data must fit Telegram's limit"""
+    assert len(callback_data.encode()) <= MAX_CALLBACK_DATA, f"Callback data too long: {callback_data}"
+    return InlineKeyboardButton(text=text, callback_data=callback_data)
 
 
 def get_main_menu_keyboard() -> InlineKeyboardMarkup:
@@ -16,12 +26,20 @@ def get_main_menu_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_market_list_keyboard(markets: List[Dict]) -> InlineKeyboardMarkup:
+def get_market_list_keyboard(
+    markets: List[Dict],
+    order: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
     """
     Get keyboard for market listing
     
     Args:
         markets: List of market dictionaries
+        order: Page sort order ('e' expiry, 'l' liquidity); adds paging and sort buttons
+        prev_cursor: Cursor of the previous page, if any
+        next_cursor: Cursor of the next page, if any
     """
     keyboard = []
     
@@ -45,6 +63,22 @@ def get_market_list_keyboard(markets: List[Dict]) -> InlineKeyboardMarkup:
             )
         ])
     
+    # Add paging and sort buttons (callback data carries the page cursor)
+    if order is not None:
+        nav_row = []
+        if prev_cursor:
+            nav_row.append(callback_button("◀️ Prev", f"markets_page_{order}_{prev_cursor}"))
+        if next_cursor:
+            nav_row.append(callback_button("Next ▶️", f"markets_page_{order}_{next_cursor}"))
+        if nav_row:
+            keyboard.append(nav_row)
+        
+        if order == "e":
+            sort_button = InlineKeyboardButton(text="🔀 Sort by Liquidity", callback_data="markets_page_l")
+        else:
+            sort_button = InlineKeyboardButton(text="🔀 Sort by Expiry", callback_data="markets_page_e")
+        keyboard.append([sort_button])
+    
     # Add back button
     keyboard.append([
         InlineKeyboardButton(text="🔙 Back to Menu", callback_data="back_to_menu")
@@ -71,6 +105,39 @@ def get_market_detail_keyboard(market_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+def get_inline_market_keyboard(market_id: int) -> InlineKeyboardMarkup:
+    """Get keyboard for a market card shared through inline mode"""
+    keyboard = [
+        [
+            InlineKeyboardButton(
+                text="✅ Bet YES",
+                callback_data=f"bet_yes_{market_id}"
+            ),
+            InlineKeyboardButton(
+                text="❌ Bet NO",
+                callback_data=f"bet_no_{market_id}"
+            )
+        ]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def get_bet_confirmation_keyboard(quick_picks: List[Tuple[int, str]]) -> InlineKeyboardMarkup:
+    """Get bet confirmation keyboard with quick-pick amounts (token units, label)"""
+    keyboard = [
+        [
+            InlineKeyboardButton(text=label, callback_data=f"bet_amount_{units}")
+            for units, label in quick_picks[i:i + 4]
+        ]
+        for i in range(0, len(quick_picks), 4)
+    ]
+    keyboard.append([
+        InlineKeyboardButton(text="✅ Confirm", callback_data="confirm_place_bet"),
+        InlineKeyboardButton(text="❌ Cancel", callback_data="cancel")
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
 def get_confirmation_keyboard(confirm_data: str, cancel_data: str = "cancel") -> InlineKeyboardMarkup:
     """Get confirmation keyboard"""
     keyboard = [
@@ -0,0 +1,259 @@
+"""
+Live market cards for Escalate Bot
+Keeps recently shown market messages up to date by editing them when their markets change
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set, Tuple
+
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, TelegramObject
+
+from bot.outbound import TokenBucket
+from bot.render import render_market_card, render_market_list
+from config import Config
+from services.events import MARKET
+
+
+logger = logging.getLogger(__name__)
+
+CardKey = Tuple[int, int]
+
+
+@dataclass
+class LiveCard:
+    """A sent market message: a market card, or a page of the market list"""
+    chat_id: int
+    message_id: int
+    # Markets shown, in display order, as last rendered
+    markets: Dict[int, Dict]
+    text: str
+    # (order, prev_cursor, next_cursor) of a market list page; None for a single card
+    page: Optional[Tuple[Optional[str], Optional[str], Optional[str]]] = None
+    tracked_at: float = field(default_factory=time.monotonic)
+
+
+class LiveCards:
+    """
+    Edits market messages in place when their markets change
+    
+    Handlers register the messages they render (track_card, track_list);
+    their markets stay hot, so the head feed re-reads them every block and
+    publishes changes on the event bus. Changed cards are re-rendered once
+    per `interval`, and edited only when the text differs from what was
+    sent. Edits across all chats share a budget of `edit_rate` per second
+    (on top of the OutboundGovernor's per-chat pacing); cards over budget
+    wait for the next round, oldest first.
+    
+    A card is dropped `idle` seconds after it was rendered, when the user
+    taps a button on it (the handler owns the message from then on, and
+    re-tracks it if it shows markets again), or when Telegram refuses the
+    edit (deleted or too old).
+    """
+    
+    def __init__(
+        self,
+        bot: Bot,
+        blockchain,
+        edit_rate: Optional[float] = None,
+        idle: Optional[float] = None,
+        interval: Optional[float] = None,
+        max_cards: Optional[int] = None
+    ):
+        """
+        Args:
+            bot: Bot used for the edits
+            blockchain: BlockchainService (event bus, hot markets, amounts)
+            edit_rate: Live edits per second across all chats (defaults to Config.LIVE_EDIT_RATE)
+            idle: Seconds a card is kept up to date (defaults to Config.LIVE_CARD_IDLE)
+            interval: Seconds between edit rounds (defaults to Config.LIVE_EDIT_INTERVAL)
+            max_cards: Most cards tracked; the oldest are dropped (defaults to Config.LIVE_CARD_MAX)
+        """
+        self.bot = bot
+        self.blockchain = blockchain
+        self.edit_rate = edit_rate or Config.LIVE_EDIT_RATE
+        self.idle = idle or Config.LIVE_CARD_IDLE
+        self.interval = interval or Config.LIVE_EDIT_INTERVAL
+        self.max_cards = max_cards or Config.LIVE_CARD_MAX
+        self._budget = TokenBucket(self.edit_rate, self.edit_rate * self.interval)
+        
+        self._cards: "OrderedDict[CardKey, LiveCard]" = OrderedDict()
+        self._by_market: Dict[int, Set[CardKey]] = {}
+        # Cards whose markets changed since their last edit, oldest first
+        self._dirty: "OrderedDict[CardKey, None]" = OrderedDict()
+        self._subscription = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._edits: Set[asyncio.Task] = set()
+        
+        # Counters for reporting
+        self.edited = 0
+        self.unchanged = 0
+        self.deferred = 0
+        self.expired = 0
+        self.failed = 0
+    
+    def attach(self, dp: Dispatcher):
+        """Stop updating a card once a button on it is pressed"""
+        dp.callback_query.middleware(self)
+    
+    async def __call__(self, handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        if isinstance(event, CallbackQuery) and event.message is not None:
+            self.forget(event.message.chat.id, event.message.message_id)
+        return await handler(event, data)
+    
+    def track_card(self, chat_id: int, message_id: int, market: Dict, text: str):
+        """A market card was just sent (or edited in) as this message"""
+        self._track(LiveCard(chat_id, message_id, {market['id']: market}, text))
+    
+    def track_list(
+        self,
+        chat_id: int,
+        message_id: int,
+        markets,
+        text: str,
+        order: Optional[str] = None,
+        prev_cursor: Optional[str] = None,
+        next_cursor: Optional[str] = None
+    ):
+        """A page of the market list was just sent (or edited in) as this message"""
+        page = {market['id']: market for market in markets}
+        self._track(LiveCard(chat_id, message_id, page, text, (order, prev_cursor, next_cursor)))
+    
+    def _track(self, card: LiveCard):
+        key = (card.chat_id, card.message_id)
+        self.forget(*key)
+        self._cards[key] = card
+        for market_id, market in card.markets.items():
+            self._by_market.setdefault(market_id, set()).add(key)
+            self.blockchain.hot_markets.touch(market)
+        
+        while len(self._cards) > self.max_cards:
+            self.forget(*next(iter(self._cards)))
+    
+    def forget(self, chat_id: int, message_id: int):
+        """Stop updating a message"""
+        key = (chat_id, message_id)
+        card = self._cards.pop(key, None)
+        if card is None:
+            return
+        self._dirty.pop(key, None)
+        for market_id in card.markets:
+            keys = self._by_market.get(market_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_market[market_id]
+    
+    def start(self):
+        """Follow market changes and edit cards in the background"""
+        if not self._tasks:
+            self._subscription = self.blockchain.events.subscribe(MARKET)
+            self._tasks = {asyncio.create_task(self._follow()), asyncio.create_task(self._run())}
+    
+    async def stop(self):
+        """Stop editing; edits already sent are awaited"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._edits:
+            await asyncio.gather(*self._edits, return_exceptions=True)
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+    
+    async def _follow(self):
+        """Mark the cards showing each changed market"""
+        async for _, market in self._subscription:
+            for key in self._by_market.get(market['id'], ()):
+                self._cards[key].markets[market['id']] = market
+                self._dirty[key] = None
+    
+    async def _run(self):
+        """One edit round per interval"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Live card round failed: {e}")
+    
+    def flush(self):
+        """Drop idle cards, keep shown markets hot and start the edits the budget allows"""
+        cutoff = time.monotonic() - self.idle
+        while self._cards:
+            key, card = next(iter(self._cards.items()))
+            if card.tracked_at >= cutoff:
+                break
+            self.forget(*key)
+            self.expired += 1
+        
+        # Shown markets stay hot for as long as their cards are tracked
+        for market_id, keys in self._by_market.items():
+            self.blockchain.hot_markets.touch(self._cards[next(iter(keys))].markets[market_id])
+        
+        for key in list(self._dirty):
+            card = self._cards[key]
+            text, keyboard = self._render(card)
+            if text == card.text:
+                del self._dirty[key]
+                self.unchanged += 1
+                continue
+            if self._budget.take() > 0:
+                self.deferred += len(self._dirty)
+                break
+            
+            del self._dirty[key]
+            task = asyncio.create_task(self._edit(card, text, keyboard))
+            self._edits.add(task)
+            task.add_done_callback(self._edits.discard)
+    
+    def _render(self, card: LiveCard) -> Tuple[str, InlineKeyboardMarkup]:
+        markets = list(card.markets.values())
+        if card.page is None:
+            return render_market_card(markets[0], self.blockchain)
+        return render_market_list(markets, self.blockchain, *card.page)
+    
+    async def _edit(self, card: LiveCard, text: str, keyboard: InlineKeyboardMarkup):
+        # Set first, so a round running meanwhile does not send the same text again
+        sent_text, card.text = card.text, text
+        try:
+            await self.bot.edit_message_text(
+                text=text,
+                chat_id=card.chat_id,
+                message_id=card.message_id,
+                reply_markup=keyboard,
+                parse_mode="Markdown"
+            )
+            self.edited += 1
+        except TelegramBadRequest as e:
+            if "not modified" in str(e):
+                return
+            # Deleted, or too old to edit
+            self.failed += 1
+            self.forget(card.chat_id, card.message_id)
+        except Exception as e:
+            # Try again next round
+            self.failed += 1
+            logger.warning(f"Live card edit failed: {e}")
+            key = (card.chat_id, card.message_id)
+            if self._cards.get(key) is card:
+                card.text = sent_text
+                self._dirty[key] = None
+    
+    def stats(self) -> Dict:
+        """Cards tracked and what became of their changes"""
+        return {
+            'cards': len(self._cards),
+            'markets': len(self._by_market),
+            'pending': len(self._dirty),
+            'edited': self.edited,
+            'unchanged': self.unchanged,
+            'deferred': self.deferred,
+            'expired': self.expired,
+            'failed': self.failed
+        }
@@ -0,0 +1,47 @@
+"""
+Handler metrics for Escalate Bot
+Times every aiogram handler and counts its errors and concurrent runs (see services/metrics.py)
+"""
+import time
+from typing import Any, Dict
+
+from aiogram import Dispatcher
+from aiogram.types import TelegramObject
+
+from services.metrics import HANDLER_ERRORS, HANDLER_IN_FLIGHT, HANDLER_LATENCY
+
+
+def handler_name(data: Dict[str, Any]) -> str:
+    """<module>.<function> of the handler aiogram picked (e.g. bet.confirm_place_bet)"""
+    callback = data["handler"].callback
+    module = getattr(callback, "__module__", "") or ""
+    return f"{module.rsplit('.', 1)[-1]}.{getattr(callback, '__name__', type(callback).__name__)}"
+
+
+class HandlerMetrics:
+    """
+    Inner middleware recording latency, errors and in-flight runs per handler
+    
+    Inner middlewares run once a handler has matched, so updates nobody
+    handles are not counted.
+    """
+    
+    def attach(self, dp: Dispatcher):
+        """Instrument every event type of the dispatcher and its routers"""
+        for name, observer in dp.observers.items():
+            if name != "update":
+                observer.middleware(self)
+    
+    async def __call__(self, handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        name = handler_name(data)
+        in_flight = HANDLER_IN_FLIGHT.labels(name)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            HANDLER_LATENCY.labels(name).observe(time.perf_counter() - start)
+            in_flight.dec()
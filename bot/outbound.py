@@ -0,0 +1,297 @@
+"""
+Outbound Telegram rate limiting for Escalate Bot
+Paces messages per chat and globally, merges queued edits and retries flood-control errors
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageCaption, EditMessageReplyMarkup, EditMessageText, TelegramMethod
+
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# Edits that fully replace a message's state, so a newer one supersedes a queued older one
+COALESCED_METHODS = (EditMessageText, EditMessageCaption, EditMessageReplyMarkup)
+
+# Queue wait samples kept for the stats
+WAIT_SAMPLES = 1000
+
+# Per-chat buckets kept before idle ones are dropped
+MAX_CHAT_BUCKETS = 10000
+
+
+class TokenBucket:
+    """Allows `rate` operations per second with bursts of up to `burst`"""
+    
+    def __init__(self, rate: float, burst: float):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+    
+    def take(self) -> float:
+        """Take a token if one is available, otherwise return the seconds until one is"""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    async def acquire(self):
+        """Wait for a token and take it"""
+        delay = self.take()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.take()
+    
+    def block(self, seconds: float):
+        """Hand out no tokens for the next `seconds` (after a 429)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+    
+    def idle(self) -> bool:
+        """True if the bucket is back to full, so forgetting it changes nothing"""
+        now = time.monotonic()
+        return now >= self.blocked_until and self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+@dataclass
+class OutboundRequest:
+    """A request waiting in a chat's queue, with every caller waiting for it"""
+    method: TelegramMethod
+    make_request: NextRequestMiddlewareType
+    futures: List[asyncio.Future]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class OutboundGovernor(BaseRequestMiddleware):
+    """
+    Request middleware that paces the bot's outgoing messages
+    
+    Requests addressed to a chat (sends, edits, deletes) wait in that chat's
+    queue and go out in order when both the chat's token bucket and the
+    global one allow. Private chats get `chat_rate` per second, groups and
+    channels `group_rate`; both may burst to `chat_burst`. Requests without
+    a chat (getUpdates, answerCallbackQuery, inline edits) are not queued.
+    
+    While an edit is still queued, a newer edit of the same kind to the same
+    message takes its place, so only the latest text is sent and every
+    caller gets that result. A 429 pauses the chat for `retry_after` seconds
+    and the request is retried, up to `max_retries` times. A 429 that hits
+    the bot as a whole (a request without a chat, or a second chat while an
+    earlier chat's pause is still running) pauses every chat and the global
+    bucket for `retry_after` seconds.
+    """
+    
+    def __init__(
+        self,
+        global_rate: Optional[float] = None,
+        chat_rate: Optional[float] = None,
+        chat_burst: Optional[float] = None,
+        group_rate: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ):
+        """
+        Args:
+            global_rate: Messages per second across all chats, 0 for no limit (defaults to Config.TG_GLOBAL_RATE)
+            chat_rate: Messages per second per private chat (defaults to Config.TG_CHAT_RATE)
+            chat_burst: Messages a chat may get at once (defaults to Config.TG_CHAT_BURST)
+            group_rate: Messages per second per group or channel (defaults to Config.TG_GROUP_RATE)
+            max_retries: Retries after a 429 (defaults to Config.TG_MAX_RETRIES)
+        """
+        global_rate = Config.TG_GLOBAL_RATE if global_rate is None else global_rate
+        self.chat_rate = chat_rate or Config.TG_CHAT_RATE
+        self.chat_burst = chat_burst or Config.TG_CHAT_BURST
+        self.group_rate = group_rate or Config.TG_GROUP_RATE
+        self.max_retries = Config.TG_MAX_RETRIES if max_retries is None else max_retries
+        
+        # One second's worth of burst globally
+        self._global = TokenBucket(global_rate, global_rate) if global_rate > 0 else None
+        self._buckets: Dict[Union[int, str], TokenBucket] = {}
+        # chat -> requests not yet sent, in order
+        self._queues: Dict[Union[int, str], Deque[OutboundRequest]] = {}
+        self._tasks = set()
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        # Bot-wide flood control: no request goes out before this monotonic time
+        self._paused_until = 0.0
+        # Chat of the latest 429 and when its pause ends
+        self._flooded_chat: Optional[Union[int, str]] = None
+        self._flooded_until = 0.0
+        
+        # Counters for reporting
+        self.sent = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.failed = 0
+        self.paused = 0
+    
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod) -> Any:
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await self._send(make_request, bot, method)
+        
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(chat_id)
+        
+        if queue is None:
+            self._queues[chat_id] = deque([OutboundRequest(method, make_request, [future])])
+            task = asyncio.create_task(self._run_chat(chat_id, bot))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif not self._coalesce(queue, method, make_request, future):
+            queue.append(OutboundRequest(method, make_request, [future]))
+        
+        return await future
+    
+    def _coalesce(
+        self,
+        queue: Deque[OutboundRequest],
+        method: TelegramMethod,
+        make_request: NextRequestMiddlewareType,
+        future: asyncio.Future
+    ) -> bool:
+        """Put an edit in place of a queued edit of the same message; False if there is none"""
+        if not isinstance(method, COALESCED_METHODS):
+            return False
+        
+        for request in queue:
+            if type(request.method) is type(method) and request.method.message_id == method.message_id:
+                request.method = method
+                request.make_request = make_request
+                request.futures.append(future)
+                self.coalesced += 1
+                return True
+        return False
+    
+    def _bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) >= MAX_CHAT_BUCKETS:
+                for key in [key for key, b in self._buckets.items() if key not in self._queues and b.idle()]:
+                    del self._buckets[key]
+            
+            # Negative IDs and @usernames are groups and channels
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            bucket = TokenBucket(self.chat_rate if is_private else self.group_rate, self.chat_burst)
+            self._buckets[chat_id] = bucket
+        return bucket
+    
+    async def _run_chat(self, chat_id: Union[int, str], bot: Bot):
+        """Send a chat's queued requests in order as the buckets allow"""
+        queue = self._queues[chat_id]
+        bucket = self._bucket(chat_id)
+        
+        while queue:
+            await bucket.acquire()
+            if self._global is not None:
+                await self._global.acquire()
+            await self._wait_pause()
+            
+            # Taken only now, so edits arriving during the wait still merge into it
+            request = queue.popleft()
+            futures = [future for future in request.futures if not future.done()]
+            if not futures:
+                # Every caller gave up
+                continue
+            
+            self._waits.append(time.monotonic() - request.enqueued_at)
+            try:
+                result = await self._send(request.make_request, bot, request.method, bucket)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for future in futures:
+                    if not future.done():
+                        future.set_result(result)
+        
+        del self._queues[chat_id]
+    
+    async def _wait_pause(self):
+        """Wait out a bot-wide flood control pause"""
+        delay = self._paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._paused_until - time.monotonic()
+    
+    def _flood(self, chat_id: Optional[Union[int, str]], retry_after: float):
+        """Pause every chat too if a 429 looks bot-wide rather than per chat"""
+        now = time.monotonic()
+        bot_wide = chat_id is None or (self._flooded_chat != chat_id and self._flooded_until > now)
+        self._flooded_chat, self._flooded_until = chat_id, now + retry_after
+        if not bot_wide:
+            return
+        
+        self.paused += 1
+        self._paused_until = max(self._paused_until, now + retry_after)
+        if self._global is not None:
+            self._global.block(retry_after)
+    
+    async def _send(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+        bucket: Optional[TokenBucket] = None
+    ) -> Any:
+        """Make a request, waiting out 429s"""
+        attempt = 0
+        while True:
+            try:
+                result = await make_request(bot, method)
+                self.sent += 1
+                return result
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries:
+                    self.failed += 1
+                    raise
+                attempt += 1
+                self.retried += 1
+                logger.warning(f"Flood control on {type(method).__name__}, retrying in {e.retry_after}s")
+                self._flood(getattr(method, 'chat_id', None), e.retry_after)
+                
+                if bucket is None:
+                    await asyncio.sleep(e.retry_after)
+                else:
+                    bucket.block(e.retry_after)
+                    await bucket.acquire()
+                await self._wait_pause()
+            except Exception:
+                self.failed += 1
+                raise
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, send counters and queue wait times"""
+        waits = sorted(self._waits)
+        return {
+            'queued': sum(len(queue) for queue in self._queues.values()),
+            'chats_waiting': len(self._queues),
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'retried': self.retried,
+            'failed': self.failed,
+            'paused': self.paused,
+            'wait_mean': sum(waits) / len(waits) if waits else 0.0,
+            'wait_p95': waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            'wait_max': waits[-1] if waits else 0.0
+        }
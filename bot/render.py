@@ -0,0 +1,249 @@
+"""
+Market card rendering for Escalate Bot
+Formats market text and keyboards once per market state and reuses them
+"""
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.keyboards import get_inline_market_keyboard, get_market_detail_keyboard, get_market_list_keyboard
+from config import Config
+from services.market_index import ORDER_EXPIRY
+
+
+# Rough per-button memory of an InlineKeyboardButton model beyond its strings
+BUTTON_OVERHEAD = 400
+
+
+def format_time_remaining(expiry: int, now: Optional[int] = None) -> str:
+    """Format time remaining until expiry"""
+    if now is None:
+        now = int(datetime.utcnow().timestamp())
+    remaining = expiry - now
+    
+    if remaining <= 0:
+        return "Expired"
+    
+    hours = remaining // 3600
+    minutes = (remaining % 3600) // 60
+    
+    if hours > 24:
+        days = hours // 24
+        return f"{days}d {hours % 24}h"
+    elif hours > 0:
+        return f"{hours}h {minutes}m"
+    else:
+        return f"{minutes}m"
+
+
+def format_market_summary(market: dict, blockchain, now: Optional[int] = None) -> str:
+    """Format market summary in Polymarket style"""
+    total_yes = blockchain.parse_mon_amount(market['total_yes'])
+    total_no = blockchain.parse_mon_amount(market['total_no'])
+    total_liquidity = total_yes + total_no
+    
+    time_remaining = format_time_remaining(market['expiry'], now)
+    
+    # Calculate implied probability
+    if total_liquidity > 0:
+        yes_prob = (total_yes / total_liquidity) * 100
+    else:
+        yes_prob = 50.0
+    
+    text = (
+        f"*Market #{market['id']}*\n"
+        f"❓ {market['question']}\n\n"
+        f"📊 *Pools:*\n"
+        f"  ✅ YES: {total_yes:.2f} MON ({yes_prob:.1f}%)\n"
+        f"  ❌ NO: {total_no:.2f} MON ({100-yes_prob:.1f}%)\n\n"
+        f"💰 *Total Liquidity:* {total_liquidity:.2f} MON\n"
+        f"⏰ *Expires in:* {time_remaining}\n"
+    )
+    
+    if market['resolved']:
+        outcome_text = "YES ✅" if market['outcome'] else "NO ❌"
+        text += f"\n🏁 *Resolved:* {outcome_text}"
+    
+    return text
+
+
+def expiry_bucket(expiry: int, now: int) -> int:
+    """
+    Whole minutes left until expiry (-1 once expired)
+    
+    format_time_remaining() only depends on this value, so text rendered
+    within one bucket stays correct until the next minute starts.
+    """
+    remaining = expiry - now
+    return remaining // 60 if remaining > 0 else -1
+
+
+def market_state_key(market: Dict, now: int) -> Tuple:
+    """Everything a rendered market card depends on"""
+    return (
+        market['id'],
+        market['total_yes'],
+        market['total_no'],
+        market['resolved'],
+        market['outcome'],
+        expiry_bucket(market['expiry'], now)
+    )
+
+
+def keyboard_size(keyboard: InlineKeyboardMarkup) -> int:
+    """Approximate memory held by a keyboard"""
+    return sum(
+        BUTTON_OVERHEAD + sys.getsizeof(button.text) + sys.getsizeof(button.callback_data or "")
+        for row in keyboard.inline_keyboard
+        for button in row
+    )
+
+
+class RenderCache:
+    """
+    LRU cache of rendered messages bounded by approximate memory use
+    
+    Each entry carries an estimated size (string sizes plus a fixed cost per
+    keyboard button); least recently used entries are evicted once the
+    total passes `max_bytes`. Keys include the full market state, so
+    entries never need invalidating: a changed market simply renders under
+    a new key and the old entry ages out.
+    """
+    
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_bytes: Memory budget (defaults to Config.RENDER_CACHE_BYTES)
+        """
+        self.max_bytes = max_bytes or Config.RENDER_CACHE_BYTES
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self.bytes = 0
+        
+        # Counters for tuning
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+    
+    def set(self, key: Hashable, value: Any, size: int):
+        """Store a value with its estimated size, evicting old entries past the budget"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        
+        self._entries[key] = (value, size)
+        self.bytes += size
+        
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict:
+        """Cache size and hit counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions
+        }
+
+
+# Shared by every handler in the process
+render_cache = RenderCache()
+
+
+def render_market_card(market: Dict, blockchain, now: Optional[int] = None) -> Tuple[str, InlineKeyboardMarkup]:
+    """Market detail text and keyboard, rendered once per market state and minute"""
+    if now is None:
+        now = int(datetime.utcnow().timestamp())
+    key = ('card',) + market_state_key(market, now)
+    
+    card = render_cache.get(key)
+    if card is None:
+        text = format_market_summary(market, blockchain, now)
+        keyboard = get_market_detail_keyboard(market['id'])
+        card = (text, keyboard)
+        render_cache.set(key, card, sys.getsizeof(text) + keyboard_size(keyboard))
+    return card
+
+
+def render_market_summary(market: Dict, blockchain, now: Optional[int] = None) -> str:
+    """Market summary text (the card's text), from the cache when possible"""
+    return render_market_card(market, blockchain, now)[0]
+
+
+def render_inline_card(market: Dict, blockchain, now: Optional[int] = None) -> Tuple[str, InlineKeyboardMarkup]:
+    """Market card for inline results: the summary text with only the bet buttons"""
+    if now is None:
+        now = int(datetime.utcnow().timestamp())
+    key = ('inline',) + market_state_key(market, now)
+    
+    card = render_cache.get(key)
+    if card is None:
+        text = render_market_summary(market, blockchain, now)
+        keyboard = get_inline_market_keyboard(market['id'])
+        card = (text, keyboard)
+        # The text is shared with the detail card, only the keyboard is extra
+        render_cache.set(key, card, keyboard_size(keyboard))
+    return card
+
+
+def render_market_list_keyboard(
+    markets: List[Dict],
+    order: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
+    """Market list keyboard; it only depends on the IDs and cursors, so pages reuse it"""
+    key = ('list', tuple(market['id'] for market in markets), order, prev_cursor, next_cursor)
+    
+    keyboard = render_cache.get(key)
+    if keyboard is None:
+        keyboard = get_market_list_keyboard(markets, order, prev_cursor, next_cursor)
+        render_cache.set(key, keyboard, keyboard_size(keyboard))
+    return keyboard
+
+
+def render_market_list(
+    markets: List[Dict],
+    blockchain,
+    order: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None,
+    now: Optional[int] = None
+) -> Tuple[str, InlineKeyboardMarkup]:
+    """A page of active markets: header, one cached summary per market, and the page keyboard"""
+    if now is None:
+        now = int(datetime.utcnow().timestamp())
+    sort_label = "ending soonest" if order == ORDER_EXPIRY else "most liquid"
+    header = (
+        "📊 *Active Prediction Markets*\n"
+        f"_Sorted by {sort_label}_\n"
+        f"━━━━━━━━━━━━━━━━━━━━\n\n"
+    )
+    
+    text = header
+    for market in markets:
+        text += render_market_summary(market, blockchain, now) + "\n━━━━━━━━━━━━━━━━━━━━\n\n"
+    return text, render_market_list_keyboard(markets, order, prev_cursor, next_cursor)
@@ -0,0 +1,441 @@
+"""
+Multi-process update handling for Escalate Bot
+A front process shards updates by chat to worker processes that run the handlers
+"""
+import asyncio
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from eth_account import Account
+
+from bot import create_bot
+from bot.handlers import include_routers
+from bot.live import LiveCards
+from bot.metrics import HandlerMetrics
+from bot.outbound import OutboundGovernor
+from bot.storage import create_storage
+from config import Config
+from services.blockchain import BlockchainService
+from services.market_store import MarketStore
+from services.market_sync import MarketSyncer
+from services.metrics import MetricsServer
+from services.nonce import SharedNonceManager
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds between worker heartbeats and between supervisor health checks
+HEARTBEAT_INTERVAL = 1.0
+# Seconds a new worker gets to import, connect and send its first heartbeat
+STARTUP_TIMEOUT = 60.0
+
+
+@dataclass
+class WorkerHandle:
+    """Front-side view of one worker process"""
+    index: int
+    process: Any
+    inbox: Any
+    outbox: Any
+    started_at: float = field(default_factory=time.monotonic)
+    last_beat: Optional[float] = None
+    # Updates forwarded to the worker and not yet reported done
+    pending: int = 0
+    restarts: int = 0
+    reported: Dict = field(default_factory=dict)
+
+
+class ShardSupervisor:
+    """
+    Runs the handler worker processes and routes updates to them
+    
+    Attached to the front process's dispatcher as an outer middleware, so
+    updates from either polling or the webhook are forwarded instead of
+    handled. Every update from a chat goes to worker `chat_id % count`
+    (inline queries, which have no chat, by user ID), which handles one
+    chat's updates in arrival order; forwarding must therefore happen
+    sequentially (polling without tasks, one webhook worker).
+    
+    At most `max_pending` updates may be outstanding per worker; beyond that
+    forwarding waits, which stalls polling or fills the webhook queue.
+    A worker that exits or misses heartbeats for `heartbeat_timeout`
+    seconds is killed and started again; its outstanding updates are lost.
+    """
+    
+    def __init__(
+        self,
+        count: int,
+        max_pending: Optional[int] = None,
+        heartbeat_timeout: Optional[float] = None,
+        drain_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            count: Number of worker processes
+            max_pending: Outstanding updates per worker (defaults to Config.SHARD_MAX_PENDING)
+            heartbeat_timeout: Seconds without a heartbeat before a restart (defaults to Config.SHARD_HEARTBEAT_TIMEOUT)
+            drain_timeout: Seconds workers get to finish on stop (defaults to Config.SHARD_DRAIN_TIMEOUT)
+        """
+        self.count = count
+        self.max_pending = max_pending or Config.SHARD_MAX_PENDING
+        self.heartbeat_timeout = heartbeat_timeout or Config.SHARD_HEARTBEAT_TIMEOUT
+        self.drain_timeout = drain_timeout if drain_timeout is not None else Config.SHARD_DRAIN_TIMEOUT
+        
+        # Spawned children import the code fresh instead of inheriting the running loop
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: Dict[int, WorkerHandle] = {}
+        self._capacity: Optional[asyncio.Condition] = None
+        self._health_task: Optional[asyncio.Task] = None
+        
+        # Counters for reporting
+        self.forwarded = 0
+        self.lost = 0
+    
+    def attach(self, dp: Dispatcher):
+        """Forward the dispatcher's updates and tie the workers to its startup/shutdown"""
+        dp.update.outer_middleware(self)
+        dp.startup.register(self.start)
+        dp.shutdown.register(self.stop)
+    
+    async def start(self):
+        """Start the worker processes and the health checks"""
+        # The stored primary key nonce may be stale from an earlier run; the first allocation re-reads it
+        nonces = SharedNonceManager(None, Account.from_key(Config.PRIVATE_KEY).address, Config.NONCE_DB_PATH)
+        await nonces.reset()
+        nonces.close()
+        
+        self._capacity = asyncio.Condition()
+        for index in range(self.count):
+            self._spawn(index)
+        
+        self._health_task = asyncio.create_task(self._check_health())
+        logger.info(f"Started {self.count} worker processes")
+    
+    async def stop(self):
+        """Let the workers finish their updates, then stop them"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        
+        for worker in self._workers.values():
+            worker.inbox.put(None)
+        
+        deadline = time.monotonic() + self.drain_timeout
+        while any(w.process.is_alive() for w in self._workers.values()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        
+        for worker in self._workers.values():
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.index} did not stop in time, killing it")
+                worker.process.kill()
+            worker.process.join()
+            self._close_outbox(worker)
+        
+        logger.info(f"Workers stopped: {self.stats()}")
+    
+    def _spawn(self, index: int, restarts: int = 0):
+        # Separate queue and pipe per worker, so a worker killed mid-write
+        # cannot leave a lock held or a message torn for the others
+        inbox = self._context.Queue()
+        outbox, writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, self.count, inbox, writer),
+            name=f"escalate-worker-{index}"
+        )
+        process.start()
+        writer.close()
+        
+        worker = WorkerHandle(index, process, inbox, outbox, restarts=restarts)
+        self._workers[index] = worker
+        asyncio.get_running_loop().add_reader(outbox.fileno(), self._read_outbox, worker)
+    
+    def _close_outbox(self, worker: WorkerHandle):
+        if not worker.outbox.closed:
+            asyncio.get_running_loop().remove_reader(worker.outbox.fileno())
+            worker.outbox.close()
+    
+    async def _restart(self, worker: WorkerHandle, reason: str):
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join()
+        # Count what it finished before it died
+        self._read_outbox(worker)
+        self._close_outbox(worker)
+        
+        self.lost += worker.pending
+        logger.error(
+            f"Worker {worker.index} (pid {worker.process.pid}) {reason}; "
+            f"restarting, {worker.pending} updates lost"
+        )
+        self._spawn(worker.index, worker.restarts + 1)
+        
+        async with self._capacity:
+            self._capacity.notify_all()
+    
+    async def _check_health(self):
+        """Restart workers that died or stopped sending heartbeats"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            now = time.monotonic()
+            for worker in list(self._workers.values()):
+                if not worker.process.is_alive():
+                    await self._restart(worker, f"exited with code {worker.process.exitcode}")
+                elif worker.last_beat is None:
+                    if now - worker.started_at > STARTUP_TIMEOUT:
+                        await self._restart(worker, f"did not start within {STARTUP_TIMEOUT:.0f}s")
+                elif now - worker.last_beat > self.heartbeat_timeout:
+                    await self._restart(worker, f"sent no heartbeat for {now - worker.last_beat:.0f}s")
+    
+    def _read_outbox(self, worker: WorkerHandle):
+        """Take the reports waiting in a worker's pipe"""
+        done = 0
+        try:
+            while worker.outbox.poll():
+                kind, payload = worker.outbox.recv()
+                worker.last_beat = time.monotonic()
+                if kind == "done":
+                    done += payload
+                else:
+                    worker.reported = payload
+        except (EOFError, OSError):
+            # The worker exited; the health check restarts it
+            self._close_outbox(worker)
+        
+        if done:
+            worker.pending = max(worker.pending - done, 0)
+            asyncio.ensure_future(self._release())
+    
+    async def _release(self):
+        async with self._capacity:
+            self._capacity.notify_all()
+    
+    async def __call__(self, handler, event: Update, data: Dict[str, Any]) -> Any:
+        """Outer middleware: forward the update instead of handling it here"""
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        key = chat.id if chat else (user.id if user else 0)
+        await self.forward(key, event)
+    
+    async def forward(self, key: int, update: Update):
+        """Send an update to the worker that owns `key`, waiting while it is full"""
+        index = key % self.count
+        async with self._capacity:
+            await self._capacity.wait_for(lambda: self._workers[index].pending < self.max_pending)
+        
+        worker = self._workers[index]
+        worker.pending += 1
+        worker.inbox.put((key, update.model_dump_json(exclude_unset=True)))
+        self.forwarded += 1
+    
+    def stats(self) -> Dict:
+        """Forwarding counters and per-worker state"""
+        now = time.monotonic()
+        return {
+            'forwarded': self.forwarded,
+            'lost': self.lost,
+            'workers': [
+                {
+                    'index': worker.index,
+                    'pid': worker.process.pid,
+                    'alive': worker.process.is_alive(),
+                    'pending': worker.pending,
+                    'restarts': worker.restarts,
+                    'heartbeat_age': round(now - worker.last_beat, 1) if worker.last_beat else None,
+                    **worker.reported
+                }
+                for worker in self._workers.values()
+            ]
+        }
+
+
+class ShardWorker:
+    """
+    Worker-side loop: handles the updates the supervisor sends to this process
+    
+    Updates of one chat run one after another in arrival order, different
+    chats run concurrently. Each finished update and a periodic heartbeat
+    are reported back on the outbox.
+    """
+    
+    def __init__(
+        self,
+        index: int,
+        dp: Dispatcher,
+        bot: Bot,
+        inbox,
+        outbox,
+        outbound: Optional[OutboundGovernor] = None
+    ):
+        """
+        Args:
+            index: Worker number
+            dp: Dispatcher with the handler routers
+            bot: Bot to handle updates with
+            inbox: Queue of (chat key, update JSON) from the supervisor; None stops the worker
+            outbox: Pipe connection for reports to the supervisor
+            outbound: The bot's outbound governor, reported with the heartbeat
+        """
+        self.index = index
+        self.dp = dp
+        self.bot = bot
+        self.inbox = inbox
+        self.outbox = outbox
+        self.outbound = outbound
+        
+        # chat key -> updates waiting behind the one being handled
+        self._chats: Dict[int, Deque[Update]] = {}
+        self._tasks = set()
+        self._stopping = asyncio.Event()
+        
+        # Counters for reporting
+        self.handled = 0
+        self.failed = 0
+    
+    def _report(self, kind: str, payload: Any):
+        self.outbox.send((kind, payload))
+    
+    async def run(self):
+        """Handle updates until told to stop, then finish the ones already received"""
+        loop = asyncio.get_running_loop()
+        threading.Thread(target=self._read_inbox, args=(loop,), name="shard-inbox", daemon=True).start()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        
+        await self._stopping.wait()
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        
+        heartbeat.cancel()
+    
+    def _read_inbox(self, loop: asyncio.AbstractEventLoop):
+        """Hand supervisor messages to the event loop (runs in a thread)"""
+        while True:
+            message = self.inbox.get()
+            loop.call_soon_threadsafe(self._received, message)
+            if message is None:
+                return
+    
+    def _received(self, message: Optional[tuple]):
+        if message is None:
+            self._stopping.set()
+            return
+        
+        key, raw = message
+        update = Update.model_validate_json(raw, context={"bot": self.bot})
+        if key in self._chats:
+            self._chats[key].append(update)
+            return
+        
+        self._chats[key] = deque([update])
+        task = asyncio.create_task(self._run_chat(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run_chat(self, key: int):
+        """Handle a chat's queued updates in order"""
+        queue = self._chats[key]
+        while queue:
+            update = queue[0]
+            try:
+                response = await self.dp.feed_update(self.bot, update)
+                if isinstance(response, TelegramMethod):
+                    await self.dp.silent_call_request(bot=self.bot, result=response)
+                self.handled += 1
+            except Exception as e:
+                self.failed += 1
+                logger.exception(f"Update {update.update_id} failed: {e}")
+            finally:
+                queue.popleft()
+                self._report("done", 1)
+        del self._chats[key]
+    
+    async def _heartbeat(self):
+        while True:
+            self._report("beat", {
+                'handled': self.handled,
+                'failed': self.failed,
+                'active_chats': len(self._chats),
+                'outbound': self.outbound.stats() if self.outbound else None
+            })
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+
+def worker_main(index: int, count: int, inbox, outbox):
+    """Entry point of a worker process"""
+    # Shutdown is coordinated by the front process, which sends None
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - worker-{index} - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(_serve_worker(index, count, inbox, outbox))
+
+
+async def _serve_worker(index: int, count: int, inbox, outbox):
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=Config.RPC_POOL_SIZE)
+    )
+    
+    # Each worker bets from its own hot keys; the shared primary key coordinates nonces on disk
+    blockchain = BlockchainService(
+        signer_keys=Config.SIGNER_PRIVATE_KEYS[index::count],
+        nonce_db=Config.NONCE_DB_PATH
+    )
+    blockchain.start()
+    
+    # The front process syncs the market store; workers only follow it
+    market_store = MarketStore(Config.MARKET_DB_PATH, read_only=True)
+    market_syncer = MarketSyncer(blockchain, market_store, follow=True)
+    market_syncer.start()
+    
+    bot = create_bot()
+    # Telegram's limit is per bot, so the workers split the global rate
+    outbound = OutboundGovernor(global_rate=Config.TG_GLOBAL_RATE / count)
+    bot.session.middleware(outbound)
+    dp = Dispatcher(storage=create_storage(), blockchain=blockchain)
+    include_routers(dp)
+    
+    # Each worker keeps its own chats' market cards up to date, within its share of the edit budget
+    live_cards = None
+    if Config.LIVE_EDIT_RATE > 0:
+        live_cards = LiveCards(bot, blockchain, edit_rate=Config.LIVE_EDIT_RATE / count)
+        live_cards.attach(dp)
+        live_cards.start()
+        dp["live_cards"] = live_cards
+    
+    # Each worker serves its own metrics on the port after the front process's
+    metrics_server = None
+    if Config.METRICS_PORT:
+        HandlerMetrics().attach(dp)
+        metrics_server = MetricsServer(port=Config.METRICS_PORT + 1 + index)
+        await metrics_server.start()
+    
+    worker = ShardWorker(index, dp, bot, inbox, outbox, outbound)
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    logger.info(f"Worker {index} ready with {len(blockchain.signers.hot)} signers")
+    try:
+        await worker.run()
+    finally:
+        try:
+            await dp.emit_shutdown(bot=bot, **workflow_data)
+        finally:
+            if live_cards is not None:
+                await live_cards.stop()
+            await bot.session.close()
+            await market_syncer.stop()
+            market_store.close()
+            await blockchain.close()
+            if metrics_server is not None:
+                await metrics_server.stop()
@@ -0,0 +1,191 @@
+"""
+FSM storage backends for Escalate Bot
+Keeps create/bet/resolve flows across restarts and between bot processes
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fsm (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT NOT NULL DEFAULT '{}'
+);
+"""
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM storage in a SQLite file with a write-behind buffer
+    
+    Writes land in an in-memory buffer and are flushed in one transaction
+    every `flush_interval` seconds (immediately when it is 0), and on
+    close. Reads check the buffer first, then the database. Only unflushed
+    writes are held in memory, so several processes can share one file
+    (WAL mode); a key written by another process is visible after its next
+    flush. The SQLite calls run in a thread, so a flush waiting for another
+    process's write lock never blocks the event loop.
+    """
+    
+    def __init__(self, path: str, flush_interval: float = 0.5):
+        """
+        Args:
+            path: SQLite database file
+            flush_interval: Seconds between buffer flushes (0 writes through)
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        
+        # Used from worker threads, one call at a time under self._db_lock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        
+        # key -> {'state': ..., 'data': ...} with only the parts written since the last flush
+        self._buffer: Dict[str, Dict[str, Any]] = {}
+        # The buffer being written by the flush in progress, still served to reads
+        self._flushing: Dict[str, Dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    async def _write(self, key: StorageKey, part: str, value: Any):
+        """Buffer one part of a record and schedule a flush"""
+        self._buffer.setdefault(self.key_builder.build(key), {})[part] = value
+        
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        # From here on close() waits for the flush (through the lock) instead of cancelling it
+        self._flush_task = None
+        try:
+            await self.flush()
+        except sqlite3.Error as e:
+            logger.error(f"FSM storage flush failed: {e}")
+    
+    async def flush(self):
+        """Write every buffered change in one transaction"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            
+            self._flushing, self._buffer = self._buffer, {}
+            try:
+                await asyncio.to_thread(self._store, self._flushing)
+            except sqlite3.Error:
+                # Keep the changes for the next attempt, without overwriting newer writes
+                for key, parts in self._flushing.items():
+                    self._buffer[key] = {**parts, **self._buffer.get(key, {})}
+                raise
+            finally:
+                self._flushing = {}
+    
+    def _store(self, buffer: Dict[str, Dict[str, Any]]):
+        """Write a buffer in one transaction (runs in a thread)"""
+        with self._db_lock, self._db:
+            for key, parts in buffer.items():
+                if 'state' in parts:
+                    self._db.execute(
+                        "INSERT INTO fsm (key, state) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET state = excluded.state",
+                        (key, parts['state'])
+                    )
+                if 'data' in parts:
+                    self._db.execute(
+                        "INSERT INTO fsm (key, data) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET data = excluded.data",
+                        (key, parts['data'])
+                    )
+            # Finished flows leave nothing worth keeping
+            self._db.executemany(
+                "DELETE FROM fsm WHERE key = ? AND state IS NULL AND data = '{}'",
+                [(key,) for key in buffer]
+            )
+    
+    def _select(self, key: str, part: str) -> Optional[tuple]:
+        """Read one part of a stored record (runs in a thread)"""
+        with self._db_lock:
+            return self._db.execute(f"SELECT {part} FROM fsm WHERE key = ?", (key,)).fetchone()
+    
+    async def _read(self, key: StorageKey, part: str) -> Any:
+        """Read one part of a record, from the buffers if it has not been flushed yet"""
+        built = self.key_builder.build(key)
+        for buffer in (self._buffer, self._flushing):
+            buffered = buffer.get(built, {})
+            if part in buffered:
+                return buffered[part]
+        
+        row = await asyncio.to_thread(self._select, built, part)
+        if row is None:
+            return None if part == 'state' else '{}'
+        return row[0]
+    
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key, 'state', state.state if isinstance(state, State) else state)
+    
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self._read(key, 'state')
+    
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._write(key, 'data', json.dumps(dict(data)))
+    
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return json.loads(await self._read(key, 'data'))
+    
+    async def close(self) -> None:
+        """Flush pending writes and close the database"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        self._db.close()
+
+
+def create_storage() -> BaseStorage:
+    """
+    Build the FSM storage selected by Config.FSM_STORAGE
+    
+    - memory: aiogram MemoryStorage (lost on restart, one process only)
+    - sqlite: SQLiteStorage at Config.FSM_DB_PATH
+    - redis: aiogram RedisStorage at Config.REDIS_URL (any Redis-protocol
+      server; needs the optional `redis` package)
+    """
+    backend = Config.FSM_STORAGE.lower()
+    
+    if backend == "memory":
+        return MemoryStorage()
+    
+    if backend == "sqlite":
+        return SQLiteStorage(Config.FSM_DB_PATH, Config.FSM_FLUSH_INTERVAL)
+    
+    if backend == "redis":
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError:
+            raise ValueError("FSM_STORAGE=redis needs the redis package (pip install redis)")
+        return RedisStorage.from_url(
+            Config.REDIS_URL,
+            key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        )
+    
+    raise ValueError(f"Unknown FSM_STORAGE '{Config.FSM_STORAGE}', expected memory, sqlite or redis")
@@ -0,0 +1,240 @@
+"""
+Webhook update intake for Escalate Bot
+Receives updates over HTTP, acknowledges them at once and handles them on a bounded queue
+"""
+import asyncio
+import hmac
+import logging
+import secrets
+import signal
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from aiohttp import web
+
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def chat_key(update: Update) -> int:
+    """Chat an update belongs to (the user for updates without a chat, e.g. inline queries)"""
+    context = UserContextMiddleware.resolve_event_context(update)
+    if context.chat is not None:
+        return context.chat.id
+    return context.user.id if context.user is not None else 0
+
+
+class WebhookServer:
+    """
+    aiohttp server that feeds webhook updates to the dispatcher
+    
+    Each POST is checked against the secret token, parsed and put on a
+    bounded queue, and answered with 200 straight away; `workers` tasks take
+    updates off the queue and run them through the dispatcher. Updates of
+    one chat run one after another in arrival order: a worker that takes an
+    update for a chat already being handled leaves it to the worker handling
+    that chat and moves on. When the queue is full the request is answered with 503 so Telegram redelivers
+    the update later instead of the bot buffering without limit.
+    
+    stop() closes the listener first, then waits up to `drain_timeout`
+    seconds for queued updates to finish before cancelling the workers.
+    """
+    
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        secret: str,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        path: Optional[str] = None,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        drain_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            dp: Dispatcher with the bot's routers
+            bot: Bot the updates belong to
+            secret: Expected value of the secret token header
+            host: Listen address (defaults to Config.WEBHOOK_HOST)
+            port: Listen port (defaults to Config.WEBHOOK_PORT)
+            path: URL path of the webhook (defaults to Config.WEBHOOK_PATH)
+            workers: Concurrent update handlers (defaults to Config.WEBHOOK_WORKERS)
+            queue_size: Updates accepted but not yet handled (defaults to Config.WEBHOOK_QUEUE_SIZE)
+            drain_timeout: Seconds to finish queued updates on stop (defaults to Config.WEBHOOK_DRAIN_TIMEOUT)
+        """
+        self.dp = dp
+        self.bot = bot
+        self.secret = secret
+        self.host = host or Config.WEBHOOK_HOST
+        self.port = port or Config.WEBHOOK_PORT
+        self.path = path or Config.WEBHOOK_PATH
+        self.workers = workers or Config.WEBHOOK_WORKERS
+        self.drain_timeout = drain_timeout if drain_timeout is not None else Config.WEBHOOK_DRAIN_TIMEOUT
+        
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or Config.WEBHOOK_QUEUE_SIZE)
+        self._runner: Optional[web.AppRunner] = None
+        self._workers: list = []
+        # chat key -> updates waiting behind the one being handled
+        self._chats: Dict[int, Deque[Update]] = {}
+        
+        # Counters for reporting
+        self.received = 0
+        self.unauthorized = 0
+        self.rejected = 0
+        self.handled = 0
+        self.failed = 0
+        self.max_queued = 0
+    
+    async def start(self):
+        """Start the workers and begin listening"""
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+        
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logger.info(f"Webhook listening on {self.host}:{self.port}{self.path} with {self.workers} workers")
+    
+    async def stop(self):
+        """Stop accepting updates, finish the queued ones and stop the workers"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        
+        if self._queue.qsize():
+            logger.info(f"Draining {self._queue.qsize()} queued updates")
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Webhook drain timed out, dropping {self._queue.qsize()} updates")
+        
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        """Check, parse and enqueue one update"""
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), self.secret.encode()):
+            self.unauthorized += 1
+            return web.Response(status=401)
+        
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except ValueError as e:
+            logger.warning(f"Malformed webhook update: {e}")
+            return web.Response(status=400)
+        
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return web.Response(status=503)
+        
+        self.received += 1
+        self.max_queued = max(self.max_queued, self._queue.qsize())
+        return web.Response()
+    
+    async def _work(self):
+        """Take updates off the queue and handle each chat's updates in order"""
+        while True:
+            update = await self._queue.get()
+            key = chat_key(update)
+            if key in self._chats:
+                # Another worker is on this chat; it takes this update next
+                self._chats[key].append(update)
+                continue
+            
+            queue = self._chats[key] = deque([update])
+            try:
+                while queue:
+                    await self._feed(queue[0])
+                    queue.popleft()
+                    self._queue.task_done()
+            finally:
+                del self._chats[key]
+    
+    async def _feed(self, update: Update):
+        """Run one update through the dispatcher"""
+        try:
+            response = await self.dp.feed_update(self.bot, update)
+            if isinstance(response, TelegramMethod):
+                await self.dp.silent_call_request(bot=self.bot, result=response)
+            self.handled += 1
+        except Exception as e:
+            self.failed += 1
+            logger.exception(f"Update {update.update_id} failed: {e}")
+    
+    def stats(self) -> Dict:
+        """Intake counters and queue depth"""
+        return {
+            'received': self.received,
+            'unauthorized': self.unauthorized,
+            'rejected': self.rejected,
+            'handled': self.handled,
+            'failed': self.failed,
+            'queued': self._queue.qsize(),
+            'active_chats': len(self._chats),
+            'max_queued': self.max_queued
+        }
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, workers: Optional[int] = None):
+    """
+    Serve updates through the webhook until SIGINT/SIGTERM
+    
+    Registers Config.WEBHOOK_URL with Telegram (with a generated secret
+    token when Config.WEBHOOK_SECRET is empty) and runs the dispatcher's
+    startup and shutdown hooks around the server, like start_polling does.
+    
+    Args:
+        dp: Dispatcher to feed
+        bot: Bot the webhook belongs to
+        workers: Update handler tasks (defaults to Config.WEBHOOK_WORKERS)
+    """
+    secret = Config.WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    server = WebhookServer(dp, bot, secret, workers=workers)
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: KeyboardInterrupt still ends the run
+            pass
+    
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    try:
+        await server.start()
+        await bot.set_webhook(
+            url=Config.WEBHOOK_URL.rstrip("/") + server.path,
+            secret_token=secret,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+        logger.info(f"Webhook registered at {Config.WEBHOOK_URL}")
+        
+        await stop_event.wait()
+        logger.info("Stopping webhook server")
+    finally:
+        # The webhook stays registered so Telegram holds updates until the next start
+        await server.stop()
+        logger.info(f"Webhook stats: {server.stats()}")
+        try:
+            await dp.emit_shutdown(bot=bot, **workflow_data)
+        finally:
+            await bot.session.close()
@@ -13,17 +13,122 @@ class Config:
     
     # Telegram Bot Configuration
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+    TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")  # Bot API server base URL (empty = api.telegram.org)
+    BOT_MODE = os.getenv("BOT_MODE", "polling")  # "polling" or "webhook"
+    
+    # Outbound Message Rate Limits (Telegram flood control)
+    TG_GLOBAL_RATE = float(os.getenv("TG_GLOBAL_RATE", "30"))  # Messages per second across all chats, split between BOT_WORKERS (0 = no limit)
+    TG_CHAT_RATE = float(os.getenv("TG_CHAT_RATE", "1"))  # Messages per second per private chat
+    TG_CHAT_BURST = float(os.getenv("TG_CHAT_BURST", "3"))  # Messages a chat may get at once
+    TG_GROUP_RATE = float(os.getenv("TG_GROUP_RATE", "0.33"))  # Messages per second per group (20/minute)
+    TG_MAX_RETRIES = int(os.getenv("TG_MAX_RETRIES", "3"))  # Retries after a 429 Too Many Requests
+    
+    # Live Market Cards (market messages edited as their pools change)
+    LIVE_EDIT_RATE = float(os.getenv("LIVE_EDIT_RATE", "5"))  # Live edits per second across all chats, split between BOT_WORKERS (0 = off)
+    LIVE_EDIT_INTERVAL = float(os.getenv("LIVE_EDIT_INTERVAL", "2"))  # Seconds between edit rounds
+    LIVE_CARD_IDLE = float(os.getenv("LIVE_CARD_IDLE", "600"))  # Seconds a shown card is kept up to date
+    LIVE_CARD_MAX = int(os.getenv("LIVE_CARD_MAX", "5000"))  # Most cards tracked at once
+    
+    # Worker Process Configuration
+    BOT_WORKERS = int(os.getenv("BOT_WORKERS", "1"))  # Handler processes (1 = handle in the main process)
+    SHARD_MAX_PENDING = int(os.getenv("SHARD_MAX_PENDING", "1000"))  # Forwarded updates outstanding per worker
+    SHARD_HEARTBEAT_TIMEOUT = float(os.getenv("SHARD_HEARTBEAT_TIMEOUT", "30"))  # Seconds before a silent worker is restarted
+    SHARD_DRAIN_TIMEOUT = float(os.getenv("SHARD_DRAIN_TIMEOUT", "10"))  # Seconds workers get to finish on shutdown
+    NONCE_DB_PATH = os.getenv("NONCE_DB_PATH", "nonces.db")  # Primary key nonces shared by worker processes
+    
+    # Webhook Configuration (BOT_MODE=webhook)
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # Public HTTPS base URL Telegram posts to
+    WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")  # Listen address of the local server
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+    WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # Secret token header (empty = random per start)
+    WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "16"))  # Updates handled concurrently
+    WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))  # Accepted updates waiting for a worker
+    WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "10"))  # Seconds to finish queued updates on stop
+    
+    # Metrics Configuration
+    METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")  # Listen address of the /metrics endpoint
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # Prometheus /metrics port (0 = disabled; workers use the next ports)
     
     # Blockchain Configuration
     MONAD_RPC_URL = os.getenv("MONAD_RPC_URL")
+    # More endpoints of the same chain (comma-separated); requests are routed by endpoint health
+    MONAD_RPC_EXTRA_URLS = [
+        url.strip() for url in os.getenv("MONAD_RPC_EXTRA_URLS", "").split(",") if url.strip()
+    ]
+    MONAD_RPC_URLS = ([MONAD_RPC_URL] if MONAD_RPC_URL else []) + MONAD_RPC_EXTRA_URLS
+    MONAD_WS_URL = os.getenv("MONAD_WS_URL", "")  # newHeads subscription (empty = poll the head over HTTP)
     PRIVATE_KEY = os.getenv("PRIVATE_KEY")
     CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
     USDC_ADDRESS = os.getenv("USDC_ADDRESS")
     RESOLVER_ADDRESS = os.getenv("RESOLVER_ADDRESS")
     
+    # Hot signer keys for bets and market creation (comma-separated; empty = PRIVATE_KEY only)
+    SIGNER_PRIVATE_KEYS = [
+        key.strip() for key in os.getenv("SIGNER_PRIVATE_KEYS", "").split(",") if key.strip()
+    ]
+    
+    # RPC Connection Configuration
+    RPC_BACKEND = os.getenv("RPC_BACKEND", "thread")  # "thread" (web3 in worker threads) or "async" (aiohttp)
+    RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "20"))  # Keep-alive HTTP connections
+    RPC_TIMEOUT = int(os.getenv("RPC_TIMEOUT", "30"))  # Seconds per RPC request
+    RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", "50"))  # Market reads per batch/multicall
+    RPC_COALESCE = os.getenv("RPC_COALESCE", "true").lower() in ("1", "true", "yes")  # Identical concurrent reads share one call
+    BLOCK_TIME = float(os.getenv("BLOCK_TIME", "1.0"))  # Seconds; head block and receipt polling interval
+    RECEIPT_TIMEOUT = int(os.getenv("RECEIPT_TIMEOUT", "120"))  # Seconds before a pending tx is given up
+    MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")  # Empty to disable
+    
+    # Multi-endpoint Routing (with MONAD_RPC_EXTRA_URLS)
+    RPC_HEDGE = os.getenv("RPC_HEDGE", "true").lower() in ("1", "true", "yes")  # Duplicate reads that miss the endpoint's p95 latency
+    RPC_HEDGE_MIN_DELAY = float(os.getenv("RPC_HEDGE_MIN_DELAY", "0.05"))  # Seconds; floor of the hedge deadline
+    RPC_EJECT_AFTER = int(os.getenv("RPC_EJECT_AFTER", "3"))  # Consecutive failures before an endpoint is ejected
+    RPC_PROBE_INTERVAL = float(os.getenv("RPC_PROBE_INTERVAL", "5"))  # Seconds between endpoint health probes
+    RPC_MAX_BLOCK_LAG = int(os.getenv("RPC_MAX_BLOCK_LAG", "5"))  # Blocks an endpoint may trail the others
+    
+    # Gas Configuration
+    GAS_STRATEGY = os.getenv("GAS_STRATEGY", "normal")  # "cheap", "normal" or "fast"
+    GAS_LIMIT_MULTIPLIER = float(os.getenv("GAS_LIMIT_MULTIPLIER", "1.2"))  # Safety margin on estimates
+    GAS_ESTIMATE_TTL = int(os.getenv("GAS_ESTIMATE_TTL", "600"))  # Seconds before re-estimating
+    
+    # Transaction Queue Configuration
+    TX_MAX_IN_FLIGHT = int(os.getenv("TX_MAX_IN_FLIGHT", "16"))  # Queued txs sent but not yet mined
+    
+    # Market Cache Configuration
+    MARKET_CACHE_SIZE = int(os.getenv("MARKET_CACHE_SIZE", "1000"))  # Markets kept in memory
+    MARKET_CACHE_TTL = float(os.getenv("MARKET_CACHE_TTL", "5"))  # Max staleness in seconds
+    HOT_MARKET_TTL = float(os.getenv("HOT_MARKET_TTL", "300"))  # Seconds a viewed market is refreshed every block
+    HOT_MARKET_MAX = int(os.getenv("HOT_MARKET_MAX", "200"))  # Most markets refreshed per block
+    
+    # Render Cache Configuration
+    RENDER_CACHE_BYTES = int(os.getenv("RENDER_CACHE_BYTES", str(8 * 1024 * 1024)))  # Memory for rendered market cards
+    
+    # FSM Storage Configuration
+    FSM_STORAGE = os.getenv("FSM_STORAGE", "sqlite")  # "memory", "sqlite" or "redis"
+    FSM_DB_PATH = os.getenv("FSM_DB_PATH", "fsm.db")  # SQLite file for conversation state
+    FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "0.5"))  # Seconds between write-behind flushes
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")  # Used when FSM_STORAGE=redis
+    
+    # Market Index Configuration
+    MARKET_DB_PATH = os.getenv("MARKET_DB_PATH", "markets.db")  # SQLite file for the synced market index
+    MARKET_SYNC_INTERVAL = float(os.getenv("MARKET_SYNC_INTERVAL", "2"))  # Seconds between sync rounds
+    
+    # Inline Mode Configuration (enable with /setinline in @BotFather)
+    INLINE_RESULTS = int(os.getenv("INLINE_RESULTS", "10"))  # Markets per inline answer (Telegram allows 50)
+    INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "5"))  # Seconds Telegram may reuse an answer
+    
     # USDC Configuration
     USDC_DECIMALS = 6  # Standard USDC decimals
     
+    # Approval Configuration
+    # MON approved at once when the allowance runs short (0 = approve each bet exactly)
+    APPROVAL_BUDGET = float(os.getenv("APPROVAL_BUDGET", "0"))
+    
+    # Bet Confirmation Configuration
+    # MON amounts offered as quick picks, with their returns, when confirming a bet
+    QUICK_PICK_AMOUNTS = [
+        amount.strip() for amount in os.getenv("QUICK_PICK_AMOUNTS", "5,10,25,100").split(",") if amount.strip()
+    ]
+    
     # Market Configuration
     MIN_MARKET_DURATION_MINUTES = 5
     
@@ -50,6 +155,35 @@ class Config:
                 f"Please check your .env file"
             )
         
+        if cls.BOT_MODE not in ("polling", "webhook"):
+            raise ValueError("BOT_MODE must be 'polling' or 'webhook'")
+        if cls.BOT_MODE == "webhook" and not cls.WEBHOOK_URL:
+            raise ValueError("WEBHOOK_URL is required when BOT_MODE=webhook")
+        
+        if cls.BOT_WORKERS > 1:
+            if cls.FSM_STORAGE.lower() == "memory":
+                raise ValueError("BOT_WORKERS > 1 needs a shared FSM_STORAGE (sqlite or redis)")
+            if len(cls.SIGNER_PRIVATE_KEYS) < cls.BOT_WORKERS:
+                raise ValueError("BOT_WORKERS > 1 needs at least one SIGNER_PRIVATE_KEYS entry per worker")
+        
+        if cls.RPC_EJECT_AFTER < 1:
+            raise ValueError("RPC_EJECT_AFTER must be at least 1")
+        if cls.LIVE_EDIT_RATE > 0 and cls.LIVE_EDIT_INTERVAL <= 0:
+            raise ValueError("LIVE_EDIT_INTERVAL must be positive")
+        if cls.MONAD_WS_URL and not cls.MONAD_WS_URL.startswith(("ws://", "wss://")):
+            raise ValueError("MONAD_WS_URL must be a ws:// or wss:// URL")
+        
+        if not 0 <= cls.METRICS_PORT <= 65535 - cls.BOT_WORKERS:
+            raise ValueError("METRICS_PORT must be a port number (0 to disable), leaving room for BOT_WORKERS")
+        
+        if not 1 <= cls.INLINE_RESULTS <= 50:
+            raise ValueError("INLINE_RESULTS must be between 1 and 50")
+        try:
+            if not all(float(amount) > 0 for amount in cls.QUICK_PICK_AMOUNTS):
+                raise ValueError
+        except ValueError:
+            raise ValueError("QUICK_PICK_AMOUNTS must be comma-separated positive MON amounts")
+        
         # Validate addresses format
         if cls.CONTRACT_ADDRESS and not cls.CONTRACT_ADDRESS.startswith("0x"):
             raise ValueError("CONTRACT_ADDRESS must start with 0x")
@@ -4,12 +4,22 @@ Production-grade prediction market bot for Monad testnet
 """
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from concurrent.futures import ThreadPoolExecutor
+from aiogram import Dispatcher
 
 from config import Config
 from services.blockchain import BlockchainService
-from bot.handlers import start, markets, create, bet, resolve
+from services.market_store import MarketStore
+from services.market_sync import MarketSyncer
+from services.metrics import MetricsServer
+from bot import create_bot
+from bot.handlers import include_routers
+from bot.live import LiveCards
+from bot.metrics import HandlerMetrics
+from bot.outbound import OutboundGovernor
+from bot.sharding import ShardSupervisor
+from bot.storage import create_storage
+from bot.webhook import run_webhook
 
 # Configure logging
 logging.basicConfig(
@@ -26,8 +36,23 @@ async def main():
         Config.validate()
         logger.info("✅ Configuration validated")
         
-        # Test blockchain connection
+        # Size the thread pool used for blocking RPC calls to match the
+        # HTTP connection pool, so every worker can hold a keep-alive socket
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=Config.RPC_POOL_SIZE)
+        )
+        
+        # Prometheus endpoint; RPC calls are instrumented when it is enabled
+        metrics_server = None
+        if Config.METRICS_PORT:
+            metrics_server = MetricsServer()
+            await metrics_server.start()
+        
+        # Shared blockchain service, injected into every handler
         blockchain = BlockchainService()
+        blockchain.start()
+        
+        # Test blockchain connection
         is_connected = await blockchain.check_connection()
         
         if not is_connected:
@@ -35,25 +60,71 @@ async def main():
             logger.warning(f"⚠️  RPC URL: {Config.MONAD_RPC_URL}")
         else:
             logger.info(f"✅ Connected to blockchain at {Config.MONAD_RPC_URL}")
+            if len(Config.MONAD_RPC_URLS) > 1:
+                logger.info(f"✅ Routing RPC requests over {len(Config.MONAD_RPC_URLS)} endpoints")
             logger.info(f"✅ Wallet address: {blockchain.wallet_address}")
+            logger.info(f"✅ Signers for bets and markets: {len(blockchain.signers.hot)}")
+        
+        # Local market index; handlers read markets from it
+        market_store = MarketStore(Config.MARKET_DB_PATH)
+        market_syncer = MarketSyncer(blockchain, market_store)
+        market_syncer.start()
+        logger.info(f"✅ Market index at {Config.MARKET_DB_PATH} (synced up to #{market_store.scanned})")
         
         # Initialize bot and dispatcher
-        bot = Bot(token=Config.TELEGRAM_BOT_TOKEN)
-        storage = MemoryStorage()
-        dp = Dispatcher(storage=storage)
+        bot = create_bot()
+        live_cards = None
+        sharded = Config.BOT_WORKERS > 1
+        if sharded:
+            # Handlers run in worker processes; this process only forwards updates
+            dp = Dispatcher()
+            ShardSupervisor(Config.BOT_WORKERS).attach(dp)
+            logger.info(f"✅ Forwarding updates to {Config.BOT_WORKERS} worker processes")
+        else:
+            # Pace outgoing messages to stay under Telegram's flood limits
+            outbound = OutboundGovernor()
+            bot.session.middleware(outbound)
+            
+            storage = create_storage()
+            logger.info(f"✅ FSM storage: {Config.FSM_STORAGE}")
+            dp = Dispatcher(storage=storage, blockchain=blockchain)
+            if metrics_server is not None:
+                HandlerMetrics().attach(dp)
+            
+            # Market cards users opened are edited as their pools change
+            if Config.LIVE_EDIT_RATE > 0:
+                live_cards = LiveCards(bot, blockchain)
+                live_cards.attach(dp)
+                live_cards.start()
+                dp["live_cards"] = live_cards
         
-        # Register routers
-        dp.include_router(start.router)
-        dp.include_router(markets.router)
-        dp.include_router(create.router)
-        dp.include_router(bet.router)
-        dp.include_router(resolve.router)
+        # Register routers (in sharded mode they only decide which update types to receive)
+        include_routers(dp)
         
         logger.info("✅ All handlers registered")
-        logger.info("🚀 Starting Escalate bot...")
+        logger.info(f"🚀 Starting Escalate bot ({Config.BOT_MODE})...")
         
-        # Start polling
-        await dp.start_polling(bot)
+        try:
+            # Forwarding must stay in arrival order when sharded
+            if Config.BOT_MODE == "webhook":
+                await run_webhook(dp, bot, workers=1 if sharded else None)
+            else:
+                # Polling fails while a webhook from an earlier webhook run is registered
+                await bot.delete_webhook()
+                await dp.start_polling(bot, handle_as_tasks=not sharded)
+        finally:
+            if not sharded:
+                logger.info(f"Outbound message stats: {outbound.stats()}")
+            if live_cards is not None:
+                await live_cards.stop()
+                logger.info(f"Live cards: {live_cards.stats()}")
+            logger.info(f"Read coalescing: {blockchain.read_flight.stats()}")
+            logger.info(f"Head feed: {blockchain.head_feed.stats()}")
+            await market_syncer.stop()
+            market_store.close()
+            await blockchain.close()
+            if metrics_server is not None:
+                await metrics_server.stop()
         
     except ValueError as e:
         logger.error(f"❌ Configuration error: {e}")
@@ -0,0 +1,67 @@
+"""
+Contract ABI helpers
+Encodes calls and decodes results locally so only raw JSON-RPC goes over the wire
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+
+CONTRACTS_DIR = Path(__file__).parent.parent / "contracts"
+
+# 0x-prefixed selector -> function name, for every codec created (labels eth_call metrics)
+FUNCTION_NAMES: Dict[str, str] = {}
+
+
+@lru_cache(maxsize=None)
+def load_abi(filename: str) -> List[Dict]:
+    """Load a contract ABI from the contracts directory (read once per process)"""
+    with open(CONTRACTS_DIR / filename, "r") as f:
+        return json.load(f)
+
+
+def _canonical_type(param: Dict) -> str:
+    """Canonical ABI type string, expanding tuples"""
+    abi_type = param['type']
+    if abi_type.startswith('tuple'):
+        components = ','.join(_canonical_type(c) for c in param['components'])
+        return f"({components}){abi_type[len('tuple'):]}"
+    return abi_type
+
+
+class ContractCodec:
+    """ABI encoder/decoder for one deployed contract"""
+    
+    def __init__(self, address: str, abi: List[Dict]):
+        """
+        Args:
+            address: Contract address
+            abi: Contract ABI
+        """
+        self.address = Web3.to_checksum_address(address)
+        self._functions: Dict[str, Tuple[bytes, List[str], List[str]]] = {}
+        
+        for item in abi:
+            if item.get('type') != 'function':
+                continue
+            inputs = [_canonical_type(p) for p in item.get('inputs', [])]
+            outputs = [_canonical_type(p) for p in item.get('outputs', [])]
+            selector = Web3.keccak(text=f"{item['name']}({','.join(inputs)})")[:4]
+            self._functions[item['name']] = (selector, inputs, outputs)
+            FUNCTION_NAMES[Web3.to_hex(selector)] = item['name']
+    
+    def encode(self, fn_name: str, *args) -> str:
+        """Encode calldata for a function call as a 0x-prefixed hex string"""
+        selector, inputs, _ = self._functions[fn_name]
+        return Web3.to_hex(selector + encode(inputs, list(args)))
+    
+    def decode(self, fn_name: str, data: Union[str, bytes]) -> Tuple:
+        """Decode the return data of a function call (hex string or raw bytes)"""
+        _, _, outputs = self._functions[fn_name]
+        if isinstance(data, str):
+            data = Web3.to_bytes(hexstr=data)
+        return decode(outputs, data)
@@ -0,0 +1,68 @@
+"""
+Local ERC-20 allowance tracking
+Lets bets skip the approve transaction while the existing allowance covers them
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class AllowanceTracker:
+    """
+    In-memory view of one owner's token allowance for the Escalate contract
+    
+    Read from the chain once, then decremented locally as bets are sent and
+    overwritten when an approval is sent. Any failed bet or approval resets
+    it so the next bet re-reads the on-chain value. The chain's `latest`
+    value does not yet include bets that are sent but not mined, so those
+    are tracked until settle() and deducted from every re-read. Hold `lock` while
+    checking, approving and broadcasting a bet, so that the nonce order of
+    the transactions matches the local accounting.
+    """
+    
+    def __init__(self, read_allowance: Callable[[], Awaitable[int]]):
+        """
+        Args:
+            read_allowance: Coroutine function returning the on-chain allowance
+        """
+        self._read_allowance = read_allowance
+        self._allowance: Optional[int] = None
+        # Bet amounts sent but not mined (or dropped) yet
+        self._in_flight = 0
+        self.lock = asyncio.Lock()
+        
+        # Counters for reporting
+        self.approvals_sent = 0
+        self.approvals_skipped = 0
+    
+    async def current(self) -> int:
+        """Tracked allowance, read from the chain (less the bets in flight) if unknown"""
+        if self._allowance is None:
+            self._allowance = max(await self._read_allowance() - self._in_flight, 0)
+        return self._allowance
+    
+    def consume(self, amount: int):
+        """Deduct a bet that is about to be sent; settle() it once it is mined or dropped"""
+        if self._allowance is not None:
+            self._allowance = max(self._allowance - amount, 0)
+        self._in_flight += amount
+    
+    def settle(self, amount: int):
+        """A consumed bet was mined, reverted or never sent; re-reads no longer deduct it"""
+        self._in_flight = max(self._in_flight - amount, 0)
+    
+    def set(self, amount: int):
+        """Record an approval that is about to be sent (approve overwrites the allowance)"""
+        self._allowance = amount
+    
+    def reset(self):
+        """Forget the tracked value; the next check re-reads it from the chain"""
+        self._allowance = None
+    
+    def stats(self) -> Dict:
+        """Tracked allowance and approval counters"""
+        return {
+            'allowance': self._allowance,
+            'in_flight': self._in_flight,
+            'approvals_sent': self.approvals_sent,
+            'approvals_skipped': self.approvals_skipped
+        }
@@ -2,273 +2,922 @@
 Blockchain service for interacting with Escalate smart contract
 Handles all Web3 interactions asynchronously
 """
-import json
 import asyncio
-from typing import Dict, Optional, Tuple
-from pathlib import Path
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from web3 import Web3
-from web3.exceptions import ContractLogicError, TransactionNotFound
-from eth_account import Account
 from config import Config
+from services.abi import ContractCodec, load_abi
+from services.cache import MarketCache
+from services.events import EventBus
+from services.gas import FIXED_GAS_LIMIT, GasOracle
+from services.heads import HeadFeed, HotMarkets
+from services.market_index import ORDER_EXPIRY, MarketIndex
+from services.market_search import MarketSearchIndex
+from services.market_store import MarketStore
+from services.nonce import is_nonce_error
+from services.receipts import PendingTransaction, ReceiptTracker
+from services.scheduler import (
+    PRIORITY_BET,
+    PRIORITY_CREATION,
+    PRIORITY_RESOLUTION,
+    QueuedTransaction,
+    TxScheduler
+)
+from services.signers import Signer, SignerPool
+from services.singleflight import SingleFlight
+from services.rpc import RpcError, create_backend
+
+
+logger = logging.getLogger(__name__)
 
 
 class BlockchainService:
-    """Service for blockchain interactions"""
+    """
+    Service for blockchain interactions
     
-    def __init__(self):
-        """Initialize Web3 connection and contracts"""
-        # Initialize Web3
-        self.w3 = Web3(Web3.HTTPProvider(Config.MONAD_RPC_URL))
-        
-        # Load account from private key
-        self.account = Account.from_key(Config.PRIVATE_KEY)
-        self.wallet_address = self.account.address
-        
-        # Load ABIs
-        contracts_dir = Path(__file__).parent.parent / "contracts"
+    A single instance is meant to be created at startup and shared by all
+    handlers, so the ABIs, the signing account and the HTTP connection
+    pool are set up once per process instead of once per callback.
+    
+    Calls are ABI-encoded locally and sent as raw JSON-RPC through the
+    backend selected by Config.RPC_BACKEND ('thread' or 'async').
+    """
+    
+    def __init__(
+        self,
+        rpc_urls: Optional[List[str]] = None,
+        pool_size: Optional[int] = None,
+        backend: Optional[str] = None,
+        signer_keys: Optional[List[str]] = None,
+        nonce_db: Optional[str] = None
+    ):
+        """
+        Initialize RPC backend and contracts
         
-        with open(contracts_dir / "escalate_abi.json", "r") as f:
-            escalate_abi = json.load(f)
+        Args:
+            rpc_urls: RPC endpoints, routed by health when several (defaults to Config.MONAD_RPC_URLS)
+            pool_size: Keep-alive connections per RPC endpoint (defaults to Config.RPC_POOL_SIZE)
+            backend: RPC backend name (defaults to Config.RPC_BACKEND)
+            signer_keys: Hot keys for bets and market creation (defaults to Config.SIGNER_PRIVATE_KEYS)
+            nonce_db: SQLite file for primary key nonces shared between processes (None = in memory)
+        """
+        self.rpc = create_backend(rpc_urls, backend, pool_size)
         
-        with open(contracts_dir / "erc20_abi.json", "r") as f:
-            erc20_abi = json.load(f)
+        # Signing keys: the primary wallet resolves, the hot pool bets and creates
+        self.signers = SignerPool(
+            self.rpc,
+            Config.PRIVATE_KEY,
+            Config.SIGNER_PRIVATE_KEYS if signer_keys is None else signer_keys,
+            self.get_allowance,
+            nonce_db
+        )
+        self.wallet_address = self.signers.primary.address
+        self.gas_oracle = GasOracle(self.rpc)
+        self.receipt_tracker = ReceiptTracker(self.rpc)
+        self.tx_scheduler = TxScheduler()
         
-        # Initialize contract instances
-        self.escalate_contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(Config.CONTRACT_ADDRESS),
-            abi=escalate_abi
+        # Initialize contract codecs
+        self.escalate_contract = ContractCodec(
+            Config.CONTRACT_ADDRESS,
+            load_abi("escalate_abi.json")
         )
         
-        self.usdc_contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(Config.USDC_ADDRESS),
-            abi=erc20_abi
+        self.usdc_contract = ContractCodec(
+            Config.USDC_ADDRESS,
+            load_abi("erc20_abi.json")
         )
+        
+        # Multicall3 for batched reads (disabled if not deployed on this chain)
+        self.multicall_contract: Optional[ContractCodec] = None
+        if Config.MULTICALL3_ADDRESS:
+            self.multicall_contract = ContractCodec(
+                Config.MULTICALL3_ADDRESS,
+                load_abi("multicall3_abi.json")
+            )
+        self.batch_size = max(1, Config.RPC_BATCH_SIZE)
+        
+        # Concurrent identical reads share one RPC call
+        self.read_flight = SingleFlight(Config.RPC_COALESCE)
+        
+        # Decoded market snapshots, tagged with the block they were read at
+        self.market_cache = MarketCache(Config.MARKET_CACHE_SIZE, Config.MARKET_CACHE_TTL)
+        
+        # Active market IDs sorted for paginated browsing, and their
+        # questions indexed for inline search
+        self.market_search = MarketSearchIndex()
+        self.market_index = MarketIndex(self.market_search)
+        self._index_lock = asyncio.Lock()
+        
+        # Persistent market index, attached by the MarketSyncer when running.
+        # Markets changed by our own transactions (ID -> Unix time of the
+        # change) are read from the chain until the store has caught up.
+        self.market_store: Optional[MarketStore] = None
+        self._stale_markets: Dict[int, float] = {}
+        
+        # Block of the receipt of our latest change to each market (with the
+        # monotonic time it arrived); reads started at an older head are dropped
+        self._changed_blocks: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+        
+        self._chain_id: Optional[int] = None
+        self._head_block: Optional[int] = None
+        self._head_checked_at = 0.0
+        
+        # Markets users are looking at are refreshed once per block; new
+        # blocks and changed markets are published on the event bus
+        self.events = EventBus()
+        self.hot_markets = HotMarkets()
+        self.head_feed = HeadFeed(self)
+    
+    def start(self):
+        """Start background tasks (receipt polling, head feed); call from a running event loop"""
+        self.receipt_tracker.start()
+        self.head_feed.start()
+    
+    async def close(self):
+        """Stop background tasks and release pooled RPC connections"""
+        await self.head_feed.stop()
+        await self.tx_scheduler.stop()
+        await self.gas_oracle.stop()
+        await self.receipt_tracker.stop()
+        await self.rpc.close()
+    
+    async def _call(self, contract: ContractCodec, fn_name: str, *args) -> Tuple:
+        """Execute a read-only contract call and decode its result (shared with identical calls in flight)"""
+        async def call():
+            result = await self.rpc.request('eth_call', [
+                {'to': contract.address, 'data': contract.encode(fn_name, *args)},
+                'latest'
+            ])
+            return contract.decode(fn_name, result)
+        
+        return await self.read_flight.do((fn_name, contract.address, args, 'latest'), call)
+    
+    def _build_transaction(self, contract: ContractCodec, fn_name: str, *args) -> Dict[str, Any]:
+        """Build an unsigned contract transaction (nonce and fees are added on send)"""
+        return {
+            'to': contract.address,
+            'data': contract.encode(fn_name, *args),
+            'value': 0
+        }
+    
+    async def get_chain_id(self) -> int:
+        """Get chain ID (fetched once)"""
+        if self._chain_id is None:
+            self._chain_id = int(await self.rpc.request('eth_chainId', []), 16)
+        return self._chain_id
     
-    async def _send_transaction(self, transaction) -> Tuple[str, bool]:
+    async def get_block_number(self) -> int:
+        """Latest block number, refreshed from the RPC at most once per Config.BLOCK_TIME"""
+        if self._head_block is None or time.monotonic() - self._head_checked_at >= Config.BLOCK_TIME:
+            block = await self.read_flight.do(('eth_blockNumber',), lambda: self.rpc.request('eth_blockNumber', []))
+            self._note_block(int(block, 16))
+            self._head_checked_at = time.monotonic()
+        return self._head_block
+    
+    def _note_block(self, block_number: int):
+        """Record a block number seen on chain (the head only moves forward)"""
+        if self._head_block is None or block_number > self._head_block:
+            self._head_block = block_number
+    
+    def note_head(self, block_number: int):
+        """Take a new head from the head feed; get_block_number() needs no RPC call until it is a block old"""
+        self._note_block(block_number)
+        self._head_checked_at = time.monotonic()
+    
+    async def _broadcast(self, transaction: Dict[str, Any], signer: Signer) -> str:
         """
-        Send a transaction and wait for receipt
+        Assign a nonce, sign and broadcast a transaction
+        
+        Nonces come from the signer's local NonceManager, so concurrent sends do not
+        collide. A nonce error triggers one resync and retry; any other failed
+        broadcast makes the next allocation re-read the count to close the gap.
         
         Returns:
-            Tuple of (transaction_hash, success)
+            Transaction hash
         """
-        try:
-            # Get nonce
-            nonce = await asyncio.to_thread(
-                self.w3.eth.get_transaction_count,
-                self.wallet_address
-            )
-            
-            # Build transaction
-            transaction.update({
-                'from': self.wallet_address,
-                'nonce': nonce,
-                'gas': 500000,  # Conservative gas limit
-                'gasPrice': await asyncio.to_thread(self.w3.eth.gas_price.__get__, self.w3.eth)
-            })
+        for attempt in range(2):
+            transaction['nonce'] = await signer.nonce_manager.allocate()
             
             # Sign transaction
-            signed_txn = self.account.sign_transaction(transaction)
+            signed_txn = signer.account.sign_transaction(transaction)
+            raw_transaction = getattr(signed_txn, 'raw_transaction', None) or signed_txn.rawTransaction
             
             # Send transaction
-            tx_hash = await asyncio.to_thread(
-                self.w3.eth.send_raw_transaction,
-                signed_txn.rawTransaction
-            )
+            try:
+                return await self.rpc.request(
+                    'eth_sendRawTransaction',
+                    [Web3.to_hex(raw_transaction)]
+                )
+            except Exception as e:
+                if is_nonce_error(e) and attempt == 0:
+                    logger.warning(f"Nonce {transaction['nonce']} rejected ({e}), resyncing")
+                    await signer.nonce_manager.resync()
+                    continue
+                await signer.nonce_manager.reset()
+                raise
+    
+    async def _send_transaction(
+        self,
+        transaction: Dict[str, Any],
+        failure_message: str,
+        signer: Signer,
+        on_success: Optional[Callable[[Dict], None]] = None,
+        on_failure: Optional[Callable[[], None]] = None,
+        depends_on: Optional[List[PendingTransaction]] = None
+    ) -> PendingTransaction:
+        """
+        Send a transaction and track its receipt in the background
+        
+        Returns as soon as the transaction is broadcast. The receipt is picked
+        up by the ReceiptTracker polling loop.
+        
+        Args:
+            transaction: Unsigned transaction from _build_transaction
+            failure_message: Error raised by PendingTransaction.wait() on revert
+            signer: Wallet that signs and sends the transaction
+            on_success: Called with the receipt once the transaction succeeds
+            on_failure: Called if the transaction reverts or is never mined
+            depends_on: Earlier transactions PendingTransaction.wait() also waits for
+        
+        Returns:
+            PendingTransaction handle
+        """
+        try:
+            transaction['from'] = signer.address
             
-            # Wait for receipt
-            receipt = await asyncio.to_thread(
-                self.w3.eth.wait_for_transaction_receipt,
-                tx_hash,
-                timeout=120
+            # Fees come from memory; the gas limit is estimated once per function
+            fees, gas_limit, chain_id = await asyncio.gather(
+                self.gas_oracle.fee_fields(),
+                self.gas_oracle.gas_limit(transaction),
+                self.get_chain_id()
             )
             
-            success = receipt['status'] == 1
-            return tx_hash.hex(), success
+            # Build transaction
+            transaction.update({
+                'gas': gas_limit,
+                'chainId': chain_id,
+                **fees
+            })
+            
+            tx_hash = await self._broadcast(transaction, signer)
             
         except Exception as e:
             raise Exception(f"Transaction failed: {str(e)}")
+        
+        def on_receipt(future):
+            if future.cancelled() or future.exception() is not None:
+                if on_failure is not None:
+                    on_failure()
+                return
+            
+            receipt = future.result()
+            self._note_block(int(receipt['blockNumber'], 16))
+            
+            success = int(receipt['status'], 16) == 1
+            gas_used = int(receipt['gasUsed'], 16)
+            self.gas_oracle.record(transaction, gas_used, success)
+            logger.info(
+                f"Transaction {tx_hash} used {gas_used}/{gas_limit} gas "
+                f"({FIXED_GAS_LIMIT - gas_limit} below the fixed {FIXED_GAS_LIMIT} limit)"
+            )
+            
+            if success and on_success is not None:
+                on_success(receipt)
+            elif not success and on_failure is not None:
+                on_failure()
+        
+        # Registered before any caller can await it, so bookkeeping runs first
+        future = self.receipt_tracker.track(tx_hash)
+        future.add_done_callback(on_receipt)
+        
+        return PendingTransaction(tx_hash, future, failure_message, depends_on)
     
-    async def create_market(self, question: str, expiry: int) -> Tuple[str, int]:
+    async def create_market(self, question: str, expiry: int, user_id: Optional[int] = None) -> QueuedTransaction:
         """
         Create a new prediction market
         
+        Queued behind resolutions and bets, and returns immediately. Pass the
+        receipt from wait() to get_created_market_id() for the new market ID.
+        
         Args:
             question: Market question
             expiry: Unix timestamp for market expiry
-            
+            user_id: Telegram user creating the market (for queue fairness)
+        
         Returns:
-            Tuple of (transaction_hash, market_id)
+            QueuedTransaction for the creation
         """
+        return self.tx_scheduler.submit(
+            PRIORITY_CREATION,
+            user_id,
+            lambda: self.signers.run(lambda signer: self._send_create_market(signer, question, expiry))
+        )
+    
+    async def _send_create_market(self, signer: Signer, question: str, expiry: int) -> PendingTransaction:
+        """Build and broadcast a createMarket transaction"""
         try:
             # Build transaction
-            transaction = self.escalate_contract.functions.createMarket(
+            transaction = self._build_transaction(
+                self.escalate_contract,
+                'createMarket',
                 question,
                 expiry
-            ).build_transaction({})
+            )
             
             # Send transaction
-            tx_hash, success = await self._send_transaction(transaction)
-            
-            if not success:
-                raise Exception("Market creation transaction failed")
-            
-            # Get market ID from transaction receipt
-            receipt = await asyncio.to_thread(
-                self.w3.eth.get_transaction_receipt,
-                tx_hash
+            return await self._send_transaction(
+                transaction,
+                "Market creation transaction failed",
+                signer
             )
-            
-            # Get market count to determine the new market ID
-            market_count = await self.get_market_count()
-            
-            return tx_hash, market_count
-            
-        except ContractLogicError as e:
-            raise Exception(f"Contract error: {str(e)}")
+        
+        except RpcError as e:
+            raise Exception(f"Contract error: {e.message}")
         except Exception as e:
             raise Exception(f"Failed to create market: {str(e)}")
     
+    async def get_created_market_id(self, receipt: Dict) -> int:
+        """
+        ID of the market a mined createMarket transaction created
+        
+        The markets created in the receipt's block are the IDs between
+        marketCount before and after that block; ours is the one whose
+        question and expiry encode to the transaction's calldata. Several
+        identical creations in one block are told apart by their position
+        in the block. Creations from other signers or processes mined in
+        the same block therefore never shift the result.
+        
+        Args:
+            receipt: Receipt returned by the creation's wait()
+        
+        Returns:
+            Market ID
+        """
+        tx_hash = receipt['transactionHash']
+        block = int(receipt['blockNumber'], 16)
+        count_call = {'to': self.escalate_contract.address, 'data': self.escalate_contract.encode('marketCount')}
+        transaction, before, after = await self.rpc.batch([
+            ('eth_getTransactionByHash', [tx_hash]),
+            ('eth_call', [count_call, hex(block - 1)]),
+            ('eth_call', [count_call, hex(block)]),
+        ])
+        for result in (transaction, before, after):
+            if isinstance(result, Exception):
+                raise result
+        calldata = (transaction.get('input') or transaction.get('data')).lower()
+        (before,) = self.escalate_contract.decode('marketCount', before)
+        (after,) = self.escalate_contract.decode('marketCount', after)
+        
+        candidates = list(range(before + 1, after + 1))
+        results = await self.rpc.batch([
+            ('eth_call', [
+                {'to': self.escalate_contract.address, 'data': self.escalate_contract.encode('markets', market_id)},
+                hex(block)
+            ])
+            for market_id in candidates
+        ])
+        matches = []
+        for market_id, result in zip(candidates, results):
+            if isinstance(result, Exception):
+                raise result
+            question, expiry = self.escalate_contract.decode('markets', result)[:2]
+            if self.escalate_contract.encode('createMarket', question, expiry).lower() == calldata:
+                matches.append(market_id)
+        
+        if not matches:
+            raise Exception(f"No market created by {tx_hash} in block {block}")
+        if len(matches) == 1:
+            return matches[0]
+        
+        # Identical creations: markets are numbered in transaction order
+        block_data = await self.rpc.request('eth_getBlockByNumber', [hex(block), True])
+        identical = [
+            tx['hash'].lower() for tx in block_data['transactions']
+            if (tx.get('to') or '').lower() == self.escalate_contract.address.lower()
+            and (tx.get('input') or tx.get('data')).lower() == calldata
+        ]
+        position = identical.index(tx_hash.lower())
+        return matches[min(position, len(matches) - 1)]
+    
     async def get_market_count(self) -> int:
         """Get total number of markets"""
         try:
-            count = await asyncio.to_thread(
-                self.escalate_contract.functions.marketCount().call
-            )
+            (count,) = await self._call(self.escalate_contract, 'marketCount')
             return count
         except Exception as e:
             raise Exception(f"Failed to get market count: {str(e)}")
     
+    @staticmethod
+    def _parse_market(market_id: int, market_data: Tuple) -> Dict:
+        """Convert a decoded markets(id) tuple into a market dictionary"""
+        return {
+            'id': market_id,
+            'question': market_data[0],
+            'expiry': market_data[1],
+            'total_yes': market_data[2],
+            'total_no': market_data[3],
+            'resolved': market_data[4],
+            'outcome': market_data[5]
+        }
+    
+    def _remember_markets(self, markets: Iterable[Dict], head_block: Optional[int]):
+        """Feed freshly read markets to the cache, the index and the store (unless read-only)"""
+        # IDs past marketCount decode as empty structs; don't keep those
+        markets = [market for market in markets if market['expiry'] and not self._read_too_early(market['id'], head_block)]
+        for market in markets:
+            self.market_cache.set(market['id'], market, head_block)
+            self.market_index.update(market)
+        
+        if self.market_store is not None and not self.market_store.read_only and markets:
+            self.market_store.save(markets)
+            for market in markets:
+                self._stale_markets.pop(market['id'], None)
+    
+    def _read_too_early(self, market_id: int, head_block: Optional[int]) -> bool:
+        """True if a read started before the block in which our own transaction changed the market"""
+        changed = self._changed_blocks.get(market_id)
+        return changed is not None and (head_block is None or head_block < changed[0])
+    
+    def _store_is_behind(self, market_id: int) -> bool:
+        """True if the store may not have our own latest change to a market yet"""
+        changed_at = self._stale_markets.get(market_id)
+        if changed_at is None:
+            return False
+        if self.market_store.read_only and self.market_store.synced_at > changed_at:
+            # The writer's sync round that started after the change has landed
+            del self._stale_markets[market_id]
+            return False
+        return True
+    
+    @staticmethod
+    def _market_key(market_id: int) -> Tuple:
+        """Single-flight key of a markets(id) read at the latest block"""
+        return ('markets', market_id, 'latest')
+    
+    def _market_changed(self, market_id: int, receipt: Dict):
+        """Forget local copies of a market our own transaction just changed"""
+        self.market_cache.invalidate(market_id)
+        self.read_flight.forget(self._market_key(market_id))
+        self._stale_markets[market_id] = time.time()
+        
+        # Reads still in flight from before this block would bring the old pools back
+        now = time.monotonic()
+        self._changed_blocks[market_id] = (int(receipt['blockNumber'], 16), now)
+        self._changed_blocks.move_to_end(market_id)
+        while next(iter(self._changed_blocks.values()))[1] < now - 2 * Config.RPC_TIMEOUT:
+            # Any read older than that has timed out
+            self._changed_blocks.popitem(last=False)
+    
     async def get_market(self, market_id: int) -> Optional[Dict]:
         """
         Get market details
         
+        Served from the market store when the syncer is running, otherwise
+        from the market cache or the chain. The market becomes hot: the head
+        feed re-reads it every block for a while.
+        
         Args:
             market_id: Market ID
-            
+        
         Returns:
             Dictionary with market details or None if not found
         """
+        market = await self._load_market(market_id)
+        if market is not None and market['expiry']:
+            self.hot_markets.touch(market)
+        return market
+    
+    async def _load_market(self, market_id: int) -> Optional[Dict]:
+        """get_market() without marking the market hot"""
         try:
-            market_data = await asyncio.to_thread(
-                self.escalate_contract.functions.markets(market_id).call
-            )
-            
-            # Parse market data
-            market = {
-                'id': market_id,
-                'question': market_data[0],
-                'expiry': market_data[1],
-                'total_yes': market_data[2],
-                'total_no': market_data[3],
-                'resolved': market_data[4],
-                'outcome': market_data[5]
-            }
-            
-            return market
+            if self.market_store is not None and not self._store_is_behind(market_id):
+                market = self.market_store.get(market_id)
+                if market is not None:
+                    return market
+            
+            head_block = await self.get_block_number()
+            market = self.market_cache.get(market_id, head_block)
+            if market is not None:
+                return market
+            
+            async def read():
+                market_data = await self.rpc.request('eth_call', [
+                    {'to': self.escalate_contract.address, 'data': self.escalate_contract.encode('markets', market_id)},
+                    'latest'
+                ])
+                market = self._parse_market(market_id, self.escalate_contract.decode('markets', market_data))
+                self._remember_markets([market], head_block)
+                return market
+            
+            # Shared with identical reads in flight, including those in fetch_markets batches
+            return await self.read_flight.do(self._market_key(market_id), read)
             
         except Exception as e:
             return None
     
-    async def place_bet(self, market_id: int, side: bool, amount: int) -> str:
+    async def get_markets(self, market_ids: Iterable[int]) -> List[Optional[Dict]]:
         """
-        Place a bet on a market
+        Get details for many markets in as few round trips as possible
+        
+        Markets are served from the market store (when the syncer is running)
+        or the market cache; the rest are read with fetch_markets().
+        
+        Args:
+            market_ids: Market IDs
+        
+        Returns:
+            Market dictionaries in the same order as market_ids (None if not found)
+        """
+        market_ids = list(market_ids)
+        
+        found = {}
+        if self.market_store is not None:
+            found = self.market_store.get_many(
+                market_id for market_id in market_ids if not self._store_is_behind(market_id)
+            )
+        
+        head_block = await self.get_block_number()
+        missing = []
+        for market_id in market_ids:
+            if market_id in found:
+                continue
+            market = self.market_cache.get(market_id, head_block)
+            if market is not None:
+                found[market_id] = market
+            else:
+                missing.append(market_id)
+        
+        for market_id, market in zip(missing, await self.fetch_markets(missing)):
+            if market is not None:
+                found[market_id] = market
+        
+        return [found.get(market_id) for market_id in market_ids]
+    
+    async def fetch_markets(self, market_ids: List[int]) -> List[Optional[Dict]]:
+        """
+        Read markets from the chain, bypassing the cache and the store
+        
+        The IDs are split into chunks of Config.RPC_BATCH_SIZE. Each chunk is
+        read with one Multicall3 aggregate3 call, or with one JSON-RPC batch
+        request when multicall is disabled or unavailable. Chunks are fetched
+        concurrently. Markets another caller is already reading are not read
+        again. The results refresh the cache, the index and the store.
+        
+        Args:
+            market_ids: Market IDs
+        
+        Returns:
+            Market dictionaries in the same order as market_ids (None if not found)
+        """
+        if not market_ids:
+            return []
+        
+        head_block = await self.get_block_number()
+        
+        async def fetch(keys: List[Tuple]) -> List[Optional[Dict]]:
+            ids = [key[1] for key in keys]
+            chunks = [ids[i:i + self.batch_size] for i in range(0, len(ids), self.batch_size)]
+            results = await asyncio.gather(*(self._get_market_chunk(chunk) for chunk in chunks))
+            
+            markets = [market for chunk_markets in results for market in chunk_markets]
+            self._remember_markets([market for market in markets if market is not None], head_block)
+            return markets
+        
+        # Markets already being read (by get_market or another batch) are joined, not re-read
+        return await self.read_flight.do_many([self._market_key(market_id) for market_id in market_ids], fetch)
+    
+    async def sync_market_index(self):
+        """Add markets created since the last sync to the active market index"""
+        if self.market_store is not None:
+            # The MarketSyncer keeps the index current in the background
+            return
+        
+        async with self._index_lock:
+            market_count = await self.get_market_count()
+            if market_count > self.market_index.scanned:
+                await self.get_markets(range(self.market_index.scanned + 1, market_count + 1))
+                self.market_index.scanned = market_count
+    
+    async def get_active_markets_page(
+        self,
+        order: str = ORDER_EXPIRY,
+        cursor: Optional[str] = None,
+        size: int = 5
+    ) -> Tuple[List[Dict], Optional[str], Optional[str]]:
+        """
+        One page of active markets, fetching only the markets on that page
+        
+        The page is looked up in the market index, then its markets are read
+        (usually from the store or the cache). Reading them refreshes the index; if
+        a market turned out to be resolved or its liquidity moved it off the
+        page, the page is looked up again.
+        
+        Args:
+            order: ORDER_EXPIRY or ORDER_LIQUIDITY
+            cursor: Cursor from a previous page (None for the first page)
+            size: Markets per page
+        
+        Returns:
+            (markets, previous page cursor, next page cursor)
+        """
+        await self.sync_market_index()
+        
+        markets_by_id = {}
+        for _ in range(3):
+            market_ids, prev_cursor, next_cursor = self.market_index.page(order, cursor, size)
+            missing = [market_id for market_id in market_ids if market_id not in markets_by_id]
+            for market_id, market in zip(missing, await self.get_markets(missing)):
+                markets_by_id[market_id] = market
+            
+            if self.market_index.page(order, cursor, size)[0] == market_ids:
+                break
+        
+        markets = [markets_by_id[market_id] for market_id in market_ids if markets_by_id.get(market_id)]
+        return markets, prev_cursor, next_cursor
+    
+    async def search_markets(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Active markets whose question matches a search query
+        
+        Matches come from the in-memory search index; only the matched
+        markets are read (usually from the store or the cache), and any that
+        turn out to have closed since are left out.
+        
+        Args:
+            query: Words to search for (empty for the most liquid markets)
+            limit: Maximum number of markets
+        
+        Returns:
+            Markets, best match first
+        """
+        await self.sync_market_index()
+        
+        market_ids = self.market_search.search(query, limit)
+        now = int(time.time())
+        return [
+            market for market in await self.get_markets(market_ids)
+            if market and not market['resolved'] and market['expiry'] > now
+        ]
+    
+    async def _get_market_chunk(self, market_ids: List[int]) -> List[Optional[Dict]]:
+        """Read one chunk of markets via multicall, falling back to a JSON-RPC batch"""
+        if self.multicall_contract is not None:
+            try:
+                return await self._multicall_markets(market_ids)
+            except Exception as e:
+                logger.warning(f"Multicall3 read failed, using JSON-RPC batch instead: {e}")
+        
+        return await self._batch_markets(market_ids)
+    
+    async def _multicall_markets(self, market_ids: List[int]) -> List[Optional[Dict]]:
+        """Read markets through a single Multicall3 aggregate3 eth_call"""
+        calls = [
+            (
+                self.escalate_contract.address,
+                True,  # allowFailure
+                Web3.to_bytes(hexstr=self.escalate_contract.encode('markets', market_id))
+            )
+            for market_id in market_ids
+        ]
+        multicall = self.multicall_contract
+        result = await self.rpc.request('eth_call', [
+            {'to': multicall.address, 'data': multicall.encode('aggregate3', calls)},
+            'latest'
+        ])
+        
+        if result in (None, '0x'):
+            # No contract at the configured address; stop trying multicall
+            self.multicall_contract = None
+            raise Exception(f"No Multicall3 contract at {multicall.address}")
+        
+        (results,) = multicall.decode('aggregate3', result)
+        
+        markets = []
+        for market_id, (success, return_data) in zip(market_ids, results):
+            try:
+                market_data = self.escalate_contract.decode('markets', return_data)
+                markets.append(self._parse_market(market_id, market_data) if success else None)
+            except Exception:
+                markets.append(None)
+        return markets
+    
+    async def _batch_markets(self, market_ids: List[int]) -> List[Optional[Dict]]:
+        """Read markets with one JSON-RPC batch of eth_call requests"""
+        calls = [
+            ('eth_call', [
+                {
+                    'to': self.escalate_contract.address,
+                    'data': self.escalate_contract.encode('markets', market_id)
+                },
+                'latest'
+            ])
+            for market_id in market_ids
+        ]
+        results = await self.rpc.batch(calls)
+        
+        markets = []
+        for market_id, result in zip(market_ids, results):
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                market_data = self.escalate_contract.decode('markets', result)
+                markets.append(self._parse_market(market_id, market_data))
+            except Exception:
+                markets.append(None)
+        return markets
+    
+    async def get_allowance(self, owner: Optional[str] = None) -> int:
+        """Get a bot wallet's MON allowance for the Escalate contract (defaults to the primary wallet)"""
+        (allowance,) = await self._call(
+            self.usdc_contract,
+            'allowance',
+            owner or self.wallet_address,
+            self.escalate_contract.address
+        )
+        return allowance
+    
+    async def place_bet(
+        self,
+        market_id: int,
+        side: bool,
+        amount: int,
+        user_id: Optional[int] = None
+    ) -> QueuedTransaction:
+        """
+        Place a bet on a market, approving MON first only if needed
+        
+        Queued behind resolutions, and returns immediately. The bet is sent
+        from the least busy hot signer. The approval is skipped while that
+        signer's tracked allowance covers the bet. When it runs short, the
+        bot approves max(amount, Config.APPROVAL_BUDGET) and broadcasts the
+        bet right after it.
         
         Args:
             market_id: Market ID
             side: True for YES, False for NO
             amount: Amount in USDC (with decimals)
-            
+            user_id: Telegram user placing the bet (for queue fairness)
+        
         Returns:
-            Transaction hash
+            QueuedTransaction for the bet (its wait() covers the approval too)
         """
+        return self.tx_scheduler.submit(
+            PRIORITY_BET,
+            user_id,
+            lambda: self.signers.run(lambda signer: self._send_bet(signer, market_id, side, amount))
+        )
+    
+    async def _send_bet(self, signer: Signer, market_id: int, side: bool, amount: int) -> PendingTransaction:
+        """Approve if the signer's tracked allowance is short, then broadcast a placeBet transaction"""
+        allowance = signer.allowance
         try:
-            # Build transaction
-            transaction = self.escalate_contract.functions.placeBet(
-                market_id,
-                side,
-                amount
-            ).build_transaction({})
-            
-            # Send transaction
-            tx_hash, success = await self._send_transaction(transaction)
-            
-            if not success:
-                raise Exception("Bet placement transaction failed")
-            
-            return tx_hash
-            
-        except ContractLogicError as e:
-            raise Exception(f"Contract error: {str(e)}")
+            async with allowance.lock:
+                approval = None
+                if await allowance.current() < amount:
+                    budget = self.format_mon_amount(Config.APPROVAL_BUDGET)
+                    approval = await self.approve_mon(max(amount, budget), signer)
+                    allowance.approvals_sent += 1
+                else:
+                    allowance.approvals_skipped += 1
+                
+                # Build transaction
+                transaction = self._build_transaction(
+                    self.escalate_contract,
+                    'placeBet',
+                    market_id,
+                    side,
+                    amount
+                )
+                
+                def on_mined(receipt: Dict):
+                    allowance.settle(amount)
+                    self._market_changed(market_id, receipt)
+                
+                def on_failed():
+                    allowance.settle(amount)
+                    allowance.reset()
+                
+                # Send transaction
+                allowance.consume(amount)
+                try:
+                    return await self._send_transaction(
+                        transaction,
+                        "Bet placement transaction failed",
+                        signer,
+                        on_success=on_mined,
+                        on_failure=on_failed,
+                        depends_on=[approval] if approval else None
+                    )
+                except Exception:
+                    on_failed()
+                    raise
+        
+        except RpcError as e:
+            raise Exception(f"Contract error: {e.message}")
         except Exception as e:
             raise Exception(f"Failed to place bet: {str(e)}")
     
-    async def approve_mon(self, amount: int) -> str:
+    async def approve_mon(self, amount: int, signer: Optional[Signer] = None) -> PendingTransaction:
         """
         Approve MON spending
         
+        Sent directly rather than queued: place_bet() calls it from inside the
+        queued bet when the allowance runs short. Transactions sent after it
+        from the same wallet get later nonces, so they execute after it.
+        
         Args:
             amount: Amount to approve (with decimals)
-            
+            signer: Wallet granting the allowance (defaults to the primary wallet)
+        
         Returns:
-            Transaction hash
+            PendingTransaction for the approval
         """
         try:
             # Build transaction
-            transaction = self.usdc_contract.functions.approve(
+            transaction = self._build_transaction(
+                self.usdc_contract,
+                'approve',
                 Web3.to_checksum_address(Config.CONTRACT_ADDRESS),
                 amount
-            ).build_transaction({})
+            )
             
             # Send transaction
-            tx_hash, success = await self._send_transaction(transaction)
-            
-            if not success:
-                raise Exception("MON approval transaction failed")
-            
-            return tx_hash
-            
+            signer = signer or self.signers.primary
+            pending = await self._send_transaction(
+                transaction,
+                "MON approval transaction failed",
+                signer,
+                on_failure=signer.allowance.reset
+            )
+            signer.allowance.set(amount)
+            return pending
+        
         except Exception as e:
             raise Exception(f"Failed to approve MON: {str(e)}")
     
-    async def resolve_market(self, market_id: int, outcome: bool) -> str:
+    async def resolve_market(
+        self,
+        market_id: int,
+        outcome: bool,
+        user_id: Optional[int] = None
+    ) -> QueuedTransaction:
         """
         Resolve a market (resolver only)
         
+        Queued ahead of all other transactions, and returns immediately.
+        
         Args:
             market_id: Market ID
             outcome: True for YES, False for NO
-            
+            user_id: Telegram user resolving the market (for queue fairness)
+        
         Returns:
-            Transaction hash
+            QueuedTransaction for the resolution
         """
+        # Check if caller is resolver
+        if self.wallet_address.lower() != Config.RESOLVER_ADDRESS.lower():
+            raise Exception("Failed to resolve market: Only the resolver can resolve markets")
+        
+        return self.tx_scheduler.submit(
+            PRIORITY_RESOLUTION,
+            user_id,
+            lambda: self.signers.run(
+                lambda signer: self._send_resolution(signer, market_id, outcome),
+                self.signers.primary
+            )
+        )
+    
+    async def _send_resolution(self, signer: Signer, market_id: int, outcome: bool) -> PendingTransaction:
+        """Build and broadcast a resolveMarket transaction"""
         try:
-            # Check if caller is resolver
-            if self.wallet_address.lower() != Config.RESOLVER_ADDRESS.lower():
-                raise Exception("Only the resolver can resolve markets")
-            
             # Build transaction
-            transaction = self.escalate_contract.functions.resolveMarket(
+            transaction = self._build_transaction(
+                self.escalate_contract,
+                'resolveMarket',
                 market_id,
                 outcome
-            ).build_transaction({})
+            )
             
             # Send transaction
-            tx_hash, success = await self._send_transaction(transaction)
-            
-            if not success:
-                raise Exception("Market resolution transaction failed")
-            
-            return tx_hash
-            
-        except ContractLogicError as e:
-            raise Exception(f"Contract error: {str(e)}")
+            return await self._send_transaction(
+                transaction,
+                "Market resolution transaction failed",
+                signer,
+                on_success=lambda receipt: self._market_changed(market_id, receipt)
+            )
+        
+        except RpcError as e:
+            raise Exception(f"Contract error: {e.message}")
         except Exception as e:
             raise Exception(f"Failed to resolve market: {str(e)}")
     
     async def check_connection(self) -> bool:
-        """Check if Web3 connection is working"""
+        """Check if the RPC connection is working (any endpoint answering counts)"""
         try:
-            await asyncio.to_thread(lambda: self.w3.eth.block_number)
+            await self.rpc.request('eth_blockNumber', [])
             return True
         except Exception:
             return False
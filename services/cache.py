@@ -0,0 +1,89 @@
+"""
+In-process market snapshot cache
+Decoded markets(id) tuples tagged with the block they were read at
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class MarketCache:
+    """
+    LRU cache of market dictionaries keyed by market ID
+    
+    An entry is served while no newer block is known than the one it was
+    read at. Once the chain has moved on, it is still served for up to
+    `ttl` seconds (the maximum staleness), then treated as a miss.
+    """
+    
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Args:
+            max_size: Maximum number of markets kept (least recently used are evicted)
+            ttl: Maximum age in seconds of an entry once newer blocks exist
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        
+        # Counters for tuning
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, market_id: int, head_block: Optional[int] = None) -> Optional[Dict]:
+        """
+        Look up a market snapshot
+        
+        Args:
+            market_id: Market ID
+            head_block: Latest known block number, if any
+        
+        Returns:
+            Copy of the cached market dictionary, or None on a miss
+        """
+        entry = self._entries.get(market_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        market, block, stored_at = entry
+        same_block = head_block is not None and block >= head_block
+        if not same_block and time.monotonic() - stored_at > self.ttl:
+            del self._entries[market_id]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(market_id)
+        self.hits += 1
+        return dict(market)
+    
+    def set(self, market_id: int, market: Dict, block: Optional[int]):
+        """Store a market snapshot read at the given block"""
+        self._entries[market_id] = (dict(market), block if block is not None else -1, time.monotonic())
+        self._entries.move_to_end(market_id)
+        
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, market_id: Optional[int] = None):
+        """Drop one market, or every market when market_id is None"""
+        if market_id is None:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+        elif self._entries.pop(market_id, None) is not None:
+            self.invalidations += 1
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
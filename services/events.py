@@ -0,0 +1,108 @@
+"""
+In-process event bus
+Async publish/subscribe for chain events (new blocks, changed markets)
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Topics published by the head feed (services/heads.py)
+BLOCK = "block"      # payload: block number
+MARKET = "market"    # payload: market dictionary whose pools or resolution changed
+
+# Events a slow subscriber may fall behind by before the oldest are dropped
+DEFAULT_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """
+    A subscriber's queue of (topic, payload) events
+    
+    Iterate it (`async for topic, payload in subscription`) or call get().
+    Publishing never waits for a subscriber: when the queue is full the
+    oldest event is dropped and counted.
+    """
+    
+    def __init__(self, bus: "EventBus", topics: Set[str], max_queue: int):
+        self.bus = bus
+        self.topics = topics
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        
+        # Counters for reporting
+        self.dropped = 0
+    
+    def _put(self, event: Tuple[str, Any]):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+    
+    async def get(self) -> Tuple[str, Any]:
+        """Next (topic, payload) event, waiting for one if needed"""
+        return await self._queue.get()
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> Tuple[str, Any]:
+        return await self.get()
+    
+    def close(self):
+        """Stop receiving events"""
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Fan-out of published events to every subscription of their topic"""
+    
+    def __init__(self):
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        
+        # Counters for reporting
+        self.published: Dict[str, int] = {}
+    
+    def subscribe(self, *topics: str, max_queue: Optional[int] = None) -> Subscription:
+        """
+        Start receiving events of the given topics
+        
+        Args:
+            topics: Topic names (e.g. BLOCK, MARKET)
+            max_queue: Events kept for a slow subscriber (defaults to DEFAULT_QUEUE_SIZE)
+        
+        Returns:
+            Subscription to read events from; close() it when done
+        """
+        subscription = Subscription(self, set(topics), max_queue or DEFAULT_QUEUE_SIZE)
+        for topic in topics:
+            self._subscriptions.setdefault(topic, []).append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            subscribers = self._subscriptions.get(topic, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+    
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self._subscriptions.get(topic))
+    
+    def publish(self, topic: str, payload: Any):
+        """Queue an event for every subscriber of its topic (never waits)"""
+        self.published[topic] = self.published.get(topic, 0) + 1
+        for subscription in self._subscriptions.get(topic, []):
+            subscription._put((topic, payload))
+    
+    def stats(self) -> Dict:
+        """Events published and subscriptions per topic"""
+        return {
+            'published': dict(self.published),
+            'subscribers': {topic: len(subscribers) for topic, subscribers in self._subscriptions.items()},
+            'dropped': sum({
+                id(subscription): subscription.dropped
+                for subscribers in self._subscriptions.values()
+                for subscription in subscribers
+            }.values())
+        }
@@ -0,0 +1,238 @@
+"""
+Gas oracle for bot transactions
+Caches per-function gas limits and keeps fee data fresh in the background
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config import Config
+from services.abi import FUNCTION_NAMES
+
+
+logger = logging.getLogger(__name__)
+
+
+# Gas limit every transaction used before estimation was added
+FIXED_GAS_LIMIT = 500000
+
+# Blocks without a new transaction after which the fee refresh stops (the next transaction restarts it)
+FEE_REFRESH_IDLE_BLOCKS = 150
+
+# Added to every scaled estimate: covers a zero-to-nonzero storage write
+# (about 20k gas) that the cached estimate may not have seen
+GAS_LIMIT_HEADROOM = 25000
+
+# Functions whose storage writes depend on their leading arguments -> how many
+# of those arguments (and the sender) key the cached limit. A placeBet writes
+# the pool of (market, side) and the sender's stake in it; a limit estimated
+# where those slots were already nonzero is about 20k gas short per slot
+# where they are still zero.
+SLOT_KEYED_ARGS = {'placeBet': 2}
+
+# Cached limits kept before expired ones are dropped
+MAX_CACHED_LIMITS = 1000
+
+# Fee strategies: multipliers applied to the node's fee data
+#   price: legacy gasPrice
+#   tip:   EIP-1559 priority fee
+#   base:  EIP-1559 base fee headroom used for maxFeePerGas
+FEE_STRATEGIES = {
+    'cheap': {'price': 1.0, 'tip': 1.0, 'base': 1.25},
+    'normal': {'price': 1.1, 'tip': 1.25, 'base': 2.0},
+    'fast': {'price': 1.3, 'tip': 2.0, 'base': 2.5},
+}
+
+
+class GasOracle:
+    """
+    Gas limits and fees for outgoing transactions
+    
+    Gas limits are estimated once per (contract, function selector, calldata
+    length), or per sender and leading arguments for the SLOT_KEYED_ARGS
+    functions, scaled by a safety multiplier and reused until they expire. Monad charges for
+    the gas limit rather than gas used, so a tight limit is a direct saving.
+    Fee data (legacy gas price, or EIP-1559 base fee and tip) is refreshed
+    once per block by a background task, so building a transaction needs no
+    fee RPC call. The task starts with the first transaction and stops after
+    FEE_REFRESH_IDLE_BLOCKS blocks without one, so processes that never sign
+    (e.g. the front process of a sharded bot) never poll fees.
+    """
+    
+    def __init__(self, rpc, strategy: Optional[str] = None):
+        """
+        Args:
+            rpc: RPC backend
+            strategy: Fee strategy name from FEE_STRATEGIES (defaults to Config.GAS_STRATEGY)
+        """
+        self.rpc = rpc
+        self.set_strategy(strategy or Config.GAS_STRATEGY)
+        self.multiplier = Config.GAS_LIMIT_MULTIPLIER
+        
+        # _key(transaction) -> (gas limit, estimated at)
+        self._limits: Dict[Tuple, Tuple[int, float]] = {}
+        
+        # Latest fee data from the node
+        self._gas_price: Optional[int] = None
+        self._base_fee: Optional[int] = None
+        self._tip: Optional[int] = None
+        self._fees_updated_at = 0.0
+        self._fees_used_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        
+        # Savings report
+        self.transactions = 0
+        self.gas_limit_total = 0
+        self.gas_used_total = 0
+    
+    def set_strategy(self, strategy: str):
+        """Switch fee strategy ('cheap', 'normal' or 'fast')"""
+        if strategy not in FEE_STRATEGIES:
+            raise ValueError(f"Unknown gas strategy '{strategy}', expected one of: {', '.join(FEE_STRATEGIES)}")
+        self.strategy = strategy
+    
+    def start(self):
+        """Refresh fee data in the background until it goes unused"""
+        self._fees_used_at = time.monotonic()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+    
+    async def stop(self):
+        """Stop the background refresh"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _refresh_loop(self):
+        """Refresh fee data once per block while transactions are being sent"""
+        while time.monotonic() - self._fees_used_at < FEE_REFRESH_IDLE_BLOCKS * Config.BLOCK_TIME:
+            try:
+                await self.refresh_fees()
+            except Exception as e:
+                logger.warning(f"Gas oracle refresh failed: {e}")
+            await asyncio.sleep(Config.BLOCK_TIME)
+    
+    async def refresh_fees(self):
+        """Read gas price, latest base fee and priority fee in one batch request"""
+        block, tip, gas_price = await self.rpc.batch([
+            ('eth_getBlockByNumber', ['latest', False]),
+            ('eth_maxPriorityFeePerGas', []),
+            ('eth_gasPrice', []),
+        ])
+        
+        if isinstance(gas_price, Exception):
+            raise gas_price
+        self._gas_price = int(gas_price, 16)
+        
+        base_fee = None if isinstance(block, Exception) or not block else block.get('baseFeePerGas')
+        self._base_fee = int(base_fee, 16) if base_fee else None
+        
+        if self._base_fee is not None:
+            if isinstance(tip, Exception):
+                # Node without eth_maxPriorityFeePerGas: derive the tip from gas price
+                self._tip = max(self._gas_price - self._base_fee, 0)
+            else:
+                self._tip = int(tip, 16)
+        
+        self._fees_updated_at = time.monotonic()
+    
+    async def fee_fields(self) -> Dict[str, int]:
+        """
+        Fee fields for a new transaction under the current strategy
+        
+        Served from memory; only refreshed inline if the background task has
+        not run for a couple of blocks (first transaction, or after idling),
+        which (re)starts it.
+        """
+        if time.monotonic() - self._fees_updated_at > 2 * Config.BLOCK_TIME:
+            await self.refresh_fees()
+        self.start()
+        
+        multipliers = FEE_STRATEGIES[self.strategy]
+        
+        if self._base_fee is None:
+            return {'gasPrice': int(self._gas_price * multipliers['price'])}
+        
+        tip = int(self._tip * multipliers['tip'])
+        return {
+            'type': 2,
+            'maxPriorityFeePerGas': tip,
+            'maxFeePerGas': int(self._base_fee * multipliers['base']) + tip
+        }
+    
+    @staticmethod
+    def _key(transaction: Dict[str, Any]) -> Tuple:
+        """Cache key: calldata length separates e.g. short and long market questions"""
+        data = transaction['data']
+        keyed_args = SLOT_KEYED_ARGS.get(FUNCTION_NAMES.get(data[:10]))
+        if keyed_args:
+            # Selector plus the leading 32-byte arguments, as hex
+            return transaction['to'], transaction['from'], data[:10 + 64 * keyed_args]
+        return transaction['to'], data[:10], len(data)
+    
+    async def gas_limit(self, transaction: Dict[str, Any]) -> int:
+        """
+        Gas limit for a transaction, estimated once per contract function
+        
+        Falls back to the last known limit, or FIXED_GAS_LIMIT, if the node
+        cannot estimate (e.g. the call depends on a transaction still pending).
+        """
+        key = self._key(transaction)
+        cached = self._limits.get(key)
+        if cached is not None and time.monotonic() - cached[1] < Config.GAS_ESTIMATE_TTL:
+            return cached[0]
+        
+        try:
+            estimate = await self.rpc.request('eth_estimateGas', [{
+                'from': transaction['from'],
+                'to': transaction['to'],
+                'data': transaction['data'],
+                'value': hex(transaction.get('value', 0))
+            }])
+        except Exception as e:
+            logger.warning(f"Gas estimation failed for {transaction['data'][:10]}: {e}")
+            return cached[0] if cached is not None else FIXED_GAS_LIMIT
+        
+        limit = int(int(estimate, 16) * self.multiplier) + GAS_LIMIT_HEADROOM
+        now = time.monotonic()
+        if len(self._limits) >= MAX_CACHED_LIMITS:
+            self._limits = {
+                cached_key: entry for cached_key, entry in self._limits.items()
+                if now - entry[1] < Config.GAS_ESTIMATE_TTL
+            }
+        self._limits[key] = (limit, now)
+        return limit
+    
+    def record(self, transaction: Dict[str, Any], gas_used: int, success: bool):
+        """
+        Record a mined transaction for the savings report
+        
+        A failed transaction that used its whole limit ran out of gas, so its
+        cached limit is dropped and the next one is estimated again.
+        """
+        gas_limit = transaction['gas']
+        if not success and gas_used >= gas_limit:
+            logger.warning(f"Transaction to {transaction['to']} ran out of gas at {gas_limit}, re-estimating")
+            self._limits.pop(self._key(transaction), None)
+        
+        self.transactions += 1
+        self.gas_limit_total += gas_limit
+        self.gas_used_total += gas_used
+    
+    def stats(self) -> Dict:
+        """Gas reserved and used versus the old fixed limit"""
+        fixed_total = self.transactions * FIXED_GAS_LIMIT
+        return {
+            'strategy': self.strategy,
+            'transactions': self.transactions,
+            'gas_limit_total': self.gas_limit_total,
+            'gas_used_total': self.gas_used_total,
+            'fixed_limit_total': fixed_total,
+            'gas_limit_saved': fixed_total - self.gas_limit_total,
+            'cached_limits': len(self._limits)
+        }
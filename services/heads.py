@@ -0,0 +1,230 @@
+"""
+New block feed
+Follows the chain head (WebSocket newHeads, or HTTP polling) and refreshes hot markets once per block
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import aiohttp
+
+from config import Config
+from services.events import BLOCK, MARKET
+
+
+logger = logging.getLogger(__name__)
+
+# Fields that change after creation; a market is published when one differs
+MARKET_STATE_FIELDS = ('total_yes', 'total_no', 'resolved', 'outcome')
+
+# Seconds of HTTP polling before trying the WebSocket again (doubles up to the max)
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+
+class HotMarkets:
+    """
+    Markets users are looking at, with the copy they last saw
+    
+    A market becomes hot when a handler reads it (a market card, each step
+    of a bet flow) and cools down `ttl` seconds after the last read. At most
+    `max_size` markets are kept; the least recently read go first.
+    """
+    
+    def __init__(self, ttl: Optional[float] = None, max_size: Optional[int] = None):
+        """
+        Args:
+            ttl: Seconds a market stays hot after its last read (defaults to Config.HOT_MARKET_TTL)
+            max_size: Most markets refreshed per block (defaults to Config.HOT_MARKET_MAX)
+        """
+        self.ttl = ttl or Config.HOT_MARKET_TTL
+        self.max_size = max_size or Config.HOT_MARKET_MAX
+        self._entries: "OrderedDict[int, list]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def touch(self, market: Dict):
+        """A user just read this market"""
+        self._entries[market['id']] = [time.monotonic(), dict(market)]
+        self._entries.move_to_end(market['id'])
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def seen(self, market: Dict):
+        """Record a newer copy of a hot market without making it hotter"""
+        entry = self._entries.get(market['id'])
+        if entry is not None:
+            entry[1] = dict(market)
+    
+    def snapshots(self) -> Dict[int, Dict]:
+        """Last known copy of every market still hot"""
+        cutoff = time.monotonic() - self.ttl
+        while self._entries:
+            market_id, (touched_at, _) = next(iter(self._entries.items()))
+            if touched_at >= cutoff:
+                break
+            del self._entries[market_id]
+        return {market_id: market for market_id, (_, market) in self._entries.items()}
+
+
+def market_state_changed(before: Dict, after: Dict) -> bool:
+    return any(before.get(field) != after.get(field) for field in MARKET_STATE_FIELDS)
+
+
+class HeadFeed:
+    """
+    Learns about new blocks and pushes fresh hot markets to the event bus
+    
+    With a WebSocket URL it subscribes to newHeads; otherwise, or while the
+    socket is down, it polls eth_blockNumber once per `interval` (only while
+    there are hot markets or block subscribers). Each new head is published
+    as a BLOCK event, and the hot markets are read again in one
+    fetch_markets() call, which refreshes the cache and the store; markets
+    whose pools or resolution changed are published as MARKET events.
+    Heads arriving while a refresh runs are folded into one more refresh.
+    """
+    
+    def __init__(self, blockchain, ws_url: Optional[str] = None, interval: Optional[float] = None):
+        """
+        Args:
+            blockchain: BlockchainService whose hot markets, head and event bus are used
+            ws_url: WebSocket RPC endpoint (defaults to Config.MONAD_WS_URL; empty = poll)
+            interval: Seconds between polls (defaults to Config.BLOCK_TIME)
+        """
+        self.blockchain = blockchain
+        self.events = blockchain.events
+        self.ws_url = Config.MONAD_WS_URL if ws_url is None else ws_url
+        self.interval = interval or Config.BLOCK_TIME
+        self.mode = "polling"
+        self.head: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_again = False
+        
+        # Counters for reporting
+        self.blocks = 0
+        self.refreshes = 0
+        self.markets_refreshed = 0
+        self.changes = 0
+        self.reconnects = 0
+    
+    def start(self):
+        """Start following the head in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop following the head"""
+        for task in (self._task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._refresh_task = None
+    
+    async def _run(self):
+        """Follow the WebSocket, polling in between reconnects; or poll for good"""
+        if not self.ws_url:
+            await self._poll()
+            return
+        
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                await self._subscribe()
+                logger.warning("newHeads subscription closed, polling until it is back")
+            except Exception as e:
+                logger.warning(f"newHeads subscription failed ({e}), polling until it is back")
+            if self.mode == "ws":
+                delay = RECONNECT_DELAY
+            self.mode = "polling"
+            self.reconnects += 1
+            await self._poll(time.monotonic() + delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+    
+    async def _subscribe(self):
+        """Subscribe to newHeads and handle heads until the socket closes"""
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self.ws_url, heartbeat=30) as ws:
+                await ws.send_json({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]})
+                reply = await ws.receive_json(timeout=Config.RPC_TIMEOUT)
+                if reply.get("error"):
+                    raise RuntimeError(reply["error"].get("message", reply["error"]))
+                subscription_id = reply["result"]
+                self.mode = "ws"
+                logger.info(f"Following new blocks over {self.ws_url}")
+                
+                async for message in ws:
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    notification = json.loads(message.data)
+                    params = notification.get("params") or {}
+                    if notification.get("method") == "eth_subscription" and params.get("subscription") == subscription_id:
+                        self._on_head(int(params["result"]["number"], 16))
+    
+    async def _poll(self, until: Optional[float] = None):
+        """Poll the head once per interval (until the monotonic deadline, if given)"""
+        while until is None or time.monotonic() < until:
+            if self.blockchain.hot_markets or self.events.has_subscribers(BLOCK):
+                try:
+                    self._on_head(await self.blockchain.get_block_number())
+                except Exception as e:
+                    logger.warning(f"Head poll failed: {e}")
+            await asyncio.sleep(self.interval)
+    
+    def _on_head(self, block_number: int):
+        if self.head is not None and block_number <= self.head:
+            return
+        self.head = block_number
+        self.blocks += 1
+        self.blockchain.note_head(block_number)
+        self.events.publish(BLOCK, block_number)
+        
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        else:
+            self._refresh_again = True
+    
+    async def _refresh(self):
+        """Read the hot markets again and publish the ones that changed"""
+        while True:
+            self._refresh_again = False
+            hot = self.blockchain.hot_markets.snapshots()
+            if hot:
+                try:
+                    markets = await self.blockchain.fetch_markets(list(hot))
+                except Exception as e:
+                    logger.warning(f"Hot market refresh failed: {e}")
+                    markets = []
+                self.refreshes += 1
+                self.markets_refreshed += len(markets)
+                
+                for market in markets:
+                    if market is None or not market['expiry']:
+                        continue
+                    if market_state_changed(hot[market['id']], market):
+                        self.blockchain.hot_markets.seen(market)
+                        self.events.publish(MARKET, market)
+                        self.changes += 1
+            
+            if not self._refresh_again:
+                return
+    
+    def stats(self) -> Dict:
+        """Blocks followed, hot market refreshes and changes published"""
+        return {
+            'mode': self.mode,
+            'head': self.head,
+            'blocks': self.blocks,
+            'hot_markets': len(self.blockchain.hot_markets),
+            'refreshes': self.refreshes,
+            'markets_refreshed': self.markets_refreshed,
+            'changes': self.changes,
+            'reconnects': self.reconnects
+        }
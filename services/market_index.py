@@ -0,0 +1,173 @@
+"""
+Index of active markets for paginated browsing
+Keeps active market IDs sorted by expiry or liquidity so a page is a local lookup
+"""
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from services.market_search import MarketSearchIndex
+
+
+# Sort orders (single letters, they travel in callback data)
+ORDER_EXPIRY = 'e'  # ending soonest first
+ORDER_LIQUIDITY = 'l'  # most liquid first
+ORDERS = (ORDER_EXPIRY, ORDER_LIQUIDITY)
+
+# Longest cursor that fits Telegram's 64-byte callback data after "markets_page_<order>_"
+MAX_CURSOR_LENGTH = 49
+
+BASE36_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def to_base36(number: int) -> str:
+    """Non-negative integer in base 36 (read back with int(text, 36))"""
+    digits = ""
+    while True:
+        number, digit = divmod(number, 36)
+        digits = BASE36_DIGITS[digit] + digits
+        if not number:
+            return digits
+
+
+class MarketIndex:
+    """
+    Active (unresolved, unexpired) market IDs with their expiry and liquidity
+    
+    Market IDs up to `scanned` have been read once; only IDs above it need
+    to be fetched when marketCount grows. Every market read through
+    BlockchainService is fed back with update(), so liquidity stays current
+    and resolved markets drop out.
+    
+    Pages are addressed by cursors of the form "n_<value>_<id>" (markets
+    after that position) or "p_<value>_<id>" (markets before it), where value
+    is the expiry or liquidity of the boundary market, both in base 36 to fit
+    in callback data. A cursor stays valid when markets around it are added
+    or removed. A value too long for MAX_CURSOR_LENGTH (liquidity is a
+    uint256) is left out ("n__<id>"); such a cursor uses the boundary
+    market's current position, or the first page once it is gone.
+    
+    An attached MarketSearchIndex is kept in step with the active set.
+    """
+    
+    def __init__(self, search: Optional[MarketSearchIndex] = None):
+        """
+        Args:
+            search: Full-text index to feed with active markets
+        """
+        self.scanned = 0
+        self.search = search
+        
+        # market ID -> (expiry, liquidity)
+        self._active: Dict[int, Tuple[int, int]] = {}
+        # order -> sorted sort keys, rebuilt after changes
+        self._sorted: Dict[str, Optional[List[Tuple[int, int]]]] = {order: None for order in ORDERS}
+    
+    def __len__(self) -> int:
+        return len(self._active)
+    
+    def ids(self) -> List[int]:
+        """IDs of the indexed markets"""
+        return list(self._active)
+    
+    def update(self, market: Dict):
+        """Record a freshly read market, dropping it if it is no longer active"""
+        now = int(time.time())
+        market_id = market['id']
+        
+        if market['expiry'] and not market['resolved'] and market['expiry'] > now:
+            entry = (market['expiry'], market['total_yes'] + market['total_no'])
+            if self._active.get(market_id) != entry:
+                self._active[market_id] = entry
+                self._changed()
+                if self.search is not None:
+                    self.search.add(market_id, market['question'], entry[1])
+        else:
+            self.remove(market_id)
+    
+    def remove(self, market_id: int):
+        """Drop a market from the index"""
+        if self._active.pop(market_id, None) is not None:
+            self._changed()
+            if self.search is not None:
+                self.search.remove(market_id)
+    
+    def _changed(self):
+        for order in ORDERS:
+            self._sorted[order] = None
+    
+    @staticmethod
+    def _sort_key(order: str, value: int, market_id: int) -> Tuple[int, int]:
+        """Sort key from the order's value (expiry or liquidity)"""
+        return (value, market_id) if order == ORDER_EXPIRY else (-value, market_id)
+    
+    def _keys(self, order: str) -> List[Tuple[int, int]]:
+        """Sort keys of active markets, dropping any that have expired since"""
+        now = int(time.time())
+        expired = [market_id for market_id, (expiry, _) in self._active.items() if expiry <= now]
+        for market_id in expired:
+            self.remove(market_id)
+        
+        if self._sorted[order] is None:
+            self._sorted[order] = sorted(
+                self._sort_key(order, expiry if order == ORDER_EXPIRY else liquidity, market_id)
+                for market_id, (expiry, liquidity) in self._active.items()
+            )
+        return self._sorted[order]
+    
+    def _cursor(self, direction: str, order: str, key: Tuple[int, int]) -> str:
+        value = key[0] if order == ORDER_EXPIRY else -key[0]
+        cursor = f"{direction}_{to_base36(value)}_{to_base36(key[1])}"
+        if len(cursor) > MAX_CURSOR_LENGTH:
+            cursor = f"{direction}__{to_base36(key[1])}"
+        return cursor
+    
+    def page(
+        self,
+        order: str = ORDER_EXPIRY,
+        cursor: Optional[str] = None,
+        size: int = 5
+    ) -> Tuple[List[int], Optional[str], Optional[str]]:
+        """
+        One page of active market IDs
+        
+        Args:
+            order: ORDER_EXPIRY or ORDER_LIQUIDITY
+            cursor: Cursor from a previous page (None for the first page)
+            size: Markets per page
+        
+        Returns:
+            (market IDs, cursor of the previous page, cursor of the next page);
+            a cursor is None when there is no such page
+        """
+        if order not in ORDERS:
+            raise ValueError(f"Unknown market order '{order}'")
+        
+        keys = self._keys(order)
+        start = 0
+        
+        anchor = None
+        if cursor:
+            direction, value, market_id = cursor.split("_")
+            market_id = int(market_id, 36)
+            if value:
+                anchor = self._sort_key(order, int(value, 36), market_id)
+            elif market_id in self._active:
+                expiry, liquidity = self._active[market_id]
+                anchor = self._sort_key(order, expiry if order == ORDER_EXPIRY else liquidity, market_id)
+        if anchor is not None:
+            if direction == "n":
+                start = bisect_right(keys, anchor)
+            else:
+                start = max(0, bisect_left(keys, anchor) - size)
+        
+        page_keys = keys[start:start + size]
+        if not page_keys and keys:
+            # Everything after the cursor is gone; show the last page instead
+            start = max(0, len(keys) - size)
+            page_keys = keys[start:]
+        
+        prev_cursor = self._cursor("p", order, page_keys[0]) if start > 0 else None
+        next_cursor = self._cursor("n", order, page_keys[-1]) if start + size < len(keys) else None
+        
+        return [key[1] for key in page_keys], prev_cursor, next_cursor
@@ -0,0 +1,232 @@
+"""
+Full-text search over active markets for inline queries
+Keeps an inverted index of market question words so a lookup never touches the chain
+"""
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import Config
+
+
+WORD_RE = re.compile(r"\w+")
+
+# Weight of log(1 + liquidity in MON) against the text score
+LIQUIDITY_WEIGHT = 0.5
+
+# A prefix match (the word still being typed) counts this much of an exact one
+PREFIX_WEIGHT = 0.8
+
+# Shortest prefix expanded, and the most vocabulary words one may expand to
+MIN_PREFIX = 2
+MAX_PREFIX_WORDS = 64
+
+# Posting lists longer than this are only probed, never iterated
+SCAN_LIMIT = 2000
+
+# Candidates taken from the liquidity buckets per requested result when
+# every query word is too common to iterate
+POOL_FACTOR = 4
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words of a text, in order"""
+    return WORD_RE.findall(text.lower())
+
+
+class MarketSearchIndex:
+    """
+    Inverted index from question words to active market IDs
+    
+    Fed by MarketIndex, so it holds the same active markets and follows
+    their liquidity. A query's words must all appear in a market's question;
+    the last word also matches as a prefix while it is being typed. Results
+    are ranked by the summed IDF of the query words (prefix matches count
+    PREFIX_WEIGHT) plus LIQUIDITY_WEIGHT * log(1 + liquidity in MON).
+    
+    Cost is bounded by the rarest query word: words matching more than
+    SCAN_LIMIT markets are only probed for the candidates the rarer words
+    produced. When every word is that common (e.g. "will"), candidates are
+    drawn from the most liquid markets first via coarse liquidity buckets,
+    which is exact when all candidates share a text score and close
+    otherwise.
+    """
+    
+    def __init__(self):
+        # word -> market IDs whose question contains it
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        # market ID -> distinct words of its question
+        self._words: Dict[int, Tuple[str, ...]] = {}
+        # market ID -> log(1 + liquidity in MON)
+        self._liquidity: Dict[int, float] = {}
+        # liquidity bucket -> market IDs, for ranking very common words
+        self._buckets: Dict[int, Set[int]] = defaultdict(set)
+        # Sorted vocabulary for prefix lookups, rebuilt after new words appear
+        self._vocabulary: Optional[List[str]] = None
+        
+        self._unit = 10 ** Config.USDC_DECIMALS
+        
+        # Counters for reporting
+        self.searches = 0
+    
+    def __len__(self) -> int:
+        return len(self._words)
+    
+    def add(self, market_id: int, question: str, liquidity: int):
+        """Index a market, or just update its liquidity if already indexed"""
+        if market_id not in self._words:
+            words = tuple(dict.fromkeys(tokenize(question)))
+            self._words[market_id] = words
+            for word in words:
+                postings = self._postings[word]
+                if not postings:
+                    self._vocabulary = None
+                postings.add(market_id)
+        else:
+            self._buckets[self._bucket(self._liquidity[market_id])].discard(market_id)
+        
+        score = math.log1p(liquidity / self._unit)
+        self._liquidity[market_id] = score
+        self._buckets[self._bucket(score)].add(market_id)
+    
+    def remove(self, market_id: int):
+        """Drop a market from the index"""
+        words = self._words.pop(market_id, None)
+        if words is None:
+            return
+        
+        for word in words:
+            postings = self._postings[word]
+            postings.discard(market_id)
+            if not postings:
+                del self._postings[word]
+                self._vocabulary = None
+        
+        score = self._liquidity.pop(market_id)
+        self._buckets[self._bucket(score)].discard(market_id)
+    
+    @staticmethod
+    def _bucket(score: float) -> int:
+        # Quarter steps of log(1 + MON): 1, 2.2, 4.5, 9.5 ... MON
+        return int(score * 4)
+    
+    def _expand(self, prefix: str) -> List[str]:
+        """Vocabulary words starting with `prefix`"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        
+        words = []
+        start = bisect_left(self._vocabulary, prefix)
+        for word in self._vocabulary[start:start + MAX_PREFIX_WORDS]:
+            if not word.startswith(prefix):
+                break
+            words.append(word)
+        return words
+    
+    def _idf(self, count: int) -> float:
+        return math.log(1 + len(self._words) / max(count, 1))
+    
+    def _terms(self, words: List[str]) -> Optional[List[List[Tuple[Set[int], float]]]]:
+        """
+        Posting lists and weights per query word
+        
+        Returns:
+            One list of (market IDs, weight) alternatives per word, or None
+            if some word matches nothing
+        """
+        terms = []
+        for position, word in enumerate(words):
+            alternatives = []
+            postings = self._postings.get(word)
+            if postings:
+                alternatives.append((postings, self._idf(len(postings))))
+            
+            if position == len(words) - 1 and len(word) >= MIN_PREFIX:
+                for other in self._expand(word):
+                    if other != word:
+                        postings = self._postings[other]
+                        alternatives.append((postings, self._idf(len(postings)) * PREFIX_WEIGHT))
+            
+            if not alternatives:
+                return None
+            terms.append(alternatives)
+        return terms
+    
+    @staticmethod
+    def _match(alternatives: List[Tuple[Set[int], float]], market_id: int) -> float:
+        """Best weight among a word's alternatives containing the market (0 if none)"""
+        return max((weight for postings, weight in alternatives if market_id in postings), default=0.0)
+    
+    def search(self, query: str, limit: int = 10) -> List[int]:
+        """
+        IDs of the best matching active markets
+        
+        Args:
+            query: Words typed by the user (empty for the most liquid markets)
+            limit: Maximum number of results
+        
+        Returns:
+            Market IDs, best first
+        """
+        self.searches += 1
+        words = list(dict.fromkeys(tokenize(query)))
+        terms = self._terms(words)
+        if terms is None:
+            return []
+        
+        # Rarest word first: it produces the fewest candidates
+        terms.sort(key=lambda alternatives: sum(len(postings) for postings, _ in alternatives))
+        
+        # market ID -> text score so far, and the words still to check
+        candidates: Dict[int, float] = {}
+        if not terms or sum(len(postings) for postings, _ in terms[0]) > SCAN_LIMIT:
+            def matches(market_id: int) -> bool:
+                return all(self._match(alternatives, market_id) for alternatives in terms)
+            candidates = dict.fromkeys(self._most_liquid(limit * POOL_FACTOR, matches), 0.0)
+            remaining = terms
+        else:
+            for postings, weight in terms[0]:
+                for market_id in postings:
+                    if weight > candidates.get(market_id, 0.0):
+                        candidates[market_id] = weight
+            remaining = terms[1:]
+        
+        scored = []
+        for market_id, score in candidates.items():
+            for alternatives in remaining:
+                weight = self._match(alternatives, market_id)
+                if not weight:
+                    break
+                score += weight
+            else:
+                scored.append((score + LIQUIDITY_WEIGHT * self._liquidity[market_id], -market_id))
+        
+        scored.sort(reverse=True)
+        return [-negated for _, negated in scored[:limit]]
+    
+    def _most_liquid(self, count: int, accept) -> List[int]:
+        """
+        Up to `count` accepted market IDs from the most liquid buckets down
+        
+        Order within a bucket is arbitrary, so the last bucket taken is cut
+        off without regard to liquidity; its markets differ by at most one
+        bucket step.
+        """
+        found = []
+        for bucket in sorted(self._buckets, reverse=True):
+            for market_id in self._buckets[bucket]:
+                if accept(market_id):
+                    found.append(market_id)
+                    if len(found) >= count:
+                        return found
+        return found
+    
+    def stats(self) -> Dict:
+        """Index size and lookup counter"""
+        return {
+            'markets': len(self._words),
+            'words': len(self._postings),
+            'searches': self.searches
+        }
@@ -0,0 +1,141 @@
+"""
+Persistent local market index
+SQLite copy of on-chain market data, kept current by the MarketSyncer
+"""
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS markets (
+    id INTEGER PRIMARY KEY,
+    question TEXT NOT NULL,
+    expiry INTEGER NOT NULL,
+    total_yes TEXT NOT NULL,
+    total_no TEXT NOT NULL,
+    resolved INTEGER NOT NULL,
+    outcome INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS markets_open ON markets (resolved, expiry);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class MarketStore:
+    """
+    Market dictionaries persisted in SQLite
+    
+    Pool totals are stored as text because they are uint256 on chain.
+    `scanned` is the highest market ID read so far, so a restart resumes
+    from there instead of rescanning every market. `synced_at` is the Unix
+    time the last full sync round started; every market read after that.
+    
+    A read-only store (worker processes) never writes, so it never waits on
+    the writer's lock: in WAL mode readers see the last commit meanwhile.
+    """
+    
+    def __init__(self, path: str, read_only: bool = False):
+        """
+        Args:
+            path: SQLite database file (':memory:' for a throwaway store)
+            read_only: Only read a store another process writes (which must have created it)
+        """
+        self.path = path
+        self.read_only = read_only
+        self._db = sqlite3.connect(path)
+        self._db.row_factory = sqlite3.Row
+        if read_only:
+            self._db.execute("PRAGMA query_only=ON")
+        else:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+        
+        self.scanned = 0
+        self.synced_at = 0
+        self.refresh()
+    
+    def refresh(self):
+        """Re-read the scanned ID and sync time (another process may have advanced them)"""
+        state = dict(self._db.execute("SELECT key, value FROM sync_state").fetchall())
+        self.scanned = state.get('scanned', 0)
+        self.synced_at = state.get('synced_at', 0)
+    
+    @staticmethod
+    def _to_market(row: sqlite3.Row) -> Dict:
+        return {
+            'id': row['id'],
+            'question': row['question'],
+            'expiry': row['expiry'],
+            'total_yes': int(row['total_yes']),
+            'total_no': int(row['total_no']),
+            'resolved': bool(row['resolved']),
+            'outcome': bool(row['outcome'])
+        }
+    
+    def get(self, market_id: int) -> Optional[Dict]:
+        """Stored market, or None if it has not been synced"""
+        row = self._db.execute("SELECT * FROM markets WHERE id = ?", (market_id,)).fetchone()
+        return self._to_market(row) if row else None
+    
+    def get_many(self, market_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Stored markets by ID (IDs not synced yet are left out)"""
+        market_ids = list(market_ids)
+        if not market_ids:
+            return {}
+        placeholders = ",".join("?" * len(market_ids))
+        rows = self._db.execute(f"SELECT * FROM markets WHERE id IN ({placeholders})", market_ids)
+        return {row['id']: self._to_market(row) for row in rows}
+    
+    def open_markets(self, now: int) -> List[Dict]:
+        """Markets that are neither resolved nor expired"""
+        rows = self._db.execute(
+            "SELECT * FROM markets WHERE resolved = 0 AND expiry > ? ORDER BY id",
+            (now,)
+        )
+        return [self._to_market(row) for row in rows]
+    
+    def unresolved_markets(self) -> List[Dict]:
+        """Markets not resolved yet, open or expired"""
+        rows = self._db.execute("SELECT * FROM markets WHERE resolved = 0 ORDER BY id")
+        return [self._to_market(row) for row in rows]
+    
+    def save(self, markets: Iterable[Dict], scanned: Optional[int] = None, synced_at: Optional[int] = None):
+        """Insert or update markets (and the scanned ID and sync time) in one transaction"""
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO markets "
+                "(id, question, expiry, total_yes, total_no, resolved, outcome) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        market['id'],
+                        market['question'],
+                        market['expiry'],
+                        str(market['total_yes']),
+                        str(market['total_no']),
+                        int(market['resolved']),
+                        int(market['outcome'])
+                    )
+                    for market in markets
+                ]
+            )
+            if scanned is not None and scanned > self.scanned:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('scanned', ?)",
+                    (scanned,)
+                )
+                self.scanned = scanned
+            if synced_at is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('synced_at', ?)",
+                    (synced_at,)
+                )
+                self.synced_at = synced_at
+    
+    def close(self):
+        """Close the database"""
+        self._db.close()
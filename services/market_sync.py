@@ -0,0 +1,148 @@
+"""
+Background market syncer
+Keeps the persistent market store in step with the chain
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from config import Config
+from services.market_store import MarketStore
+
+
+logger = logging.getLogger(__name__)
+
+
+class MarketSyncer:
+    """
+    Polls the chain and writes market data to a MarketStore
+    
+    Each round reads marketCount, fetches markets created since the last
+    round, and re-reads every unresolved market, all through
+    BlockchainService.fetch_markets (one multicall per chunk). Expired
+    markets stay in the round until they are resolved, whoever resolves
+    them; resolved markets are stored once more and not polled again. On start the store is attached to the service and its
+    open markets seed the in-memory index, so a restart resumes from the
+    last synced market instead of rescanning the chain.
+    
+    With `follow=True` the syncer reads nothing from the chain and only
+    reloads the index from the store each round; worker processes use this,
+    with a read-only store, while one process (the front process) does the
+    actual syncing and is the only writer.
+    """
+    
+    def __init__(
+        self,
+        blockchain,
+        store: MarketStore,
+        interval: Optional[float] = None,
+        follow: bool = False
+    ):
+        """
+        Args:
+            blockchain: Shared BlockchainService
+            store: Persistent market store
+            interval: Seconds between sync rounds (defaults to Config.MARKET_SYNC_INTERVAL)
+            follow: Only follow a store that another process syncs
+        """
+        self.blockchain = blockchain
+        self.store = store
+        self.interval = interval or Config.MARKET_SYNC_INTERVAL
+        self.follow = follow
+        self._task: Optional[asyncio.Task] = None
+        
+        # Counters for reporting
+        self.rounds = 0
+        self.markets_read = 0
+        self.last_synced_at = 0.0
+    
+    def start(self):
+        """Attach the store, seed the index and start syncing in the background"""
+        for market in self.store.open_markets(int(time.time())):
+            self.blockchain.market_index.update(market)
+        self.blockchain.market_index.scanned = self.store.scanned
+        self.blockchain.market_store = self.store
+        
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop syncing and detach the store"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        self.blockchain.market_store = None
+    
+    async def _run(self):
+        """Sync once per interval"""
+        while True:
+            try:
+                if self.follow:
+                    self.reload()
+                else:
+                    await self.sync()
+            except Exception as e:
+                logger.warning(f"Market sync failed: {e}")
+            await asyncio.sleep(self.interval)
+    
+    async def sync(self):
+        """Pick up new markets and refresh the unresolved ones"""
+        started = int(time.time())
+        market_count = await self.blockchain.get_market_count()
+        scanned = self.store.scanned
+        
+        # Expired markets too: their resolution may come from anyone, at any time
+        unresolved_ids = [market['id'] for market in self.store.unresolved_markets()]
+        new_ids = list(range(scanned + 1, market_count + 1))
+        
+        # Results are written to the store by fetch_markets itself
+        markets = await self.blockchain.fetch_markets(unresolved_ids + new_ids)
+        
+        # Only advance past new markets that were actually read
+        for market_id, market in zip(new_ids, markets[len(unresolved_ids):]):
+            if market is None or not market['expiry']:
+                break
+            scanned = market_id
+        if scanned > self.store.scanned:
+            logger.info(f"Market index synced up to market #{scanned}")
+        # Followers take the store's copy again of markets they changed before this round
+        self.store.save([], scanned, started)
+        self.blockchain.market_index.scanned = self.store.scanned
+        
+        self.rounds += 1
+        self.markets_read += len(markets)
+        self.last_synced_at = time.time()
+    
+    def reload(self):
+        """Rebuild the index from the store's open markets"""
+        self.store.refresh()
+        open_markets = self.store.open_markets(int(time.time()))
+        
+        index = self.blockchain.market_index
+        open_ids = set()
+        for market in open_markets:
+            index.update(market)
+            open_ids.add(market['id'])
+        for market_id in index.ids():
+            if market_id not in open_ids:
+                index.remove(market_id)
+        index.scanned = self.store.scanned
+        
+        self.rounds += 1
+        self.last_synced_at = time.time()
+    
+    def stats(self) -> Dict:
+        """Sync progress counters"""
+        return {
+            'scanned': self.store.scanned,
+            'indexed_active': len(self.blockchain.market_index),
+            'rounds': self.rounds,
+            'markets_read': self.markets_read,
+            'last_synced_at': self.last_synced_at
+        }
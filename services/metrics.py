@@ -0,0 +1,303 @@
+"""
+Prometheus metrics for Escalate Bot
+Counters, gauges and histograms kept in process and served in the Prometheus text format on /metrics
+"""
+import bisect
+import logging
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# Request latencies in seconds (Prometheus client defaults)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds from broadcast to receipt; Monad blocks are about a second apart
+CONFIRMATION_BUCKETS = (0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """A metric family: one value (or histogram) per combination of label values"""
+    
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        """
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labels: Label names, given as positional values to labels()
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], object] = {}
+    
+    def labels(self, *values: str):
+        """The child for these label values, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.label_names, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+    
+    def render(self) -> List[str]:
+        """Lines of the text exposition format for this family"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+    
+    def _render_child(self, values: Tuple[str, ...], child) -> List[str]:
+        return [f"{self.name}{self._label_text(values)} {_format_value(child.value)}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+    
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+    
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric):
+    """Monotonic count; name it with a _total suffix"""
+    
+    kind = "counter"
+    
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(Metric):
+    """Value that goes up and down"""
+    
+    kind = "gauge"
+    
+    def _new_child(self):
+        return _Value()
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        """
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labels: Label names
+            buckets: Upper bounds of the buckets (+Inf is added)
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+    
+    def _new_child(self):
+        return _Histogram(self.buckets)
+    
+    def _render_child(self, values: Tuple[str, ...], child: _Histogram) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(child.bounds, child.counts):
+            cumulative += count
+            labels = self._label_text(values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = self._label_text(values, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{labels} {child.count}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{self._label_text(values)} {child.count}")
+        return lines
+
+
+class Registry:
+    """The metric families served together"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """Every family in the Prometheus text format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# JSON-RPC. eth_call is labelled with the contract function it calls;
+# batches are timed once, under their methods joined with "+" when mixed.
+RPC_LATENCY = REGISTRY.register(Histogram(
+    "escalate_rpc_request_duration_seconds",
+    "JSON-RPC round trip time",
+    ("method", "function", "batch")
+))
+RPC_CALLS = REGISTRY.register(Counter(
+    "escalate_rpc_calls_total",
+    "JSON-RPC calls sent, counting each entry of a batch",
+    ("method", "function")
+))
+RPC_ERRORS = REGISTRY.register(Counter(
+    "escalate_rpc_errors_total",
+    "JSON-RPC calls that failed, by exception type",
+    ("method", "function", "error")
+))
+RPC_IN_FLIGHT = REGISTRY.register(Gauge(
+    "escalate_rpc_requests_in_flight",
+    "JSON-RPC requests sent and not yet answered",
+    ("method",)
+))
+
+# Multi-endpoint routing (services/rpc_router.py), labelled host[:port]
+RPC_ENDPOINT_HEALTHY = REGISTRY.register(Gauge(
+    "escalate_rpc_endpoint_healthy",
+    "1 while the endpoint takes requests, 0 while ejected",
+    ("endpoint",)
+))
+RPC_ENDPOINT_LATENCY = REGISTRY.register(Gauge(
+    "escalate_rpc_endpoint_latency_seconds",
+    "Moving average of the endpoint's round trip time",
+    ("endpoint",)
+))
+RPC_HEDGES = REGISTRY.register(Counter(
+    "escalate_rpc_hedges_total",
+    "Reads duplicated to a second endpoint after missing their p95 deadline, and how many the duplicate answered first",
+    ("outcome",)
+))
+
+# Single-flight reads (services/singleflight.py), by kind of read
+READS_REQUESTED = REGISTRY.register(Counter(
+    "escalate_reads_requested_total",
+    "Chain reads asked for by BlockchainService callers",
+    ("kind",)
+))
+READS_COALESCED = REGISTRY.register(Counter(
+    "escalate_reads_coalesced_total",
+    "Chain reads answered by joining an identical read already in flight",
+    ("kind",)
+))
+
+# Transactions
+TX_CONFIRMATION = REGISTRY.register(Histogram(
+    "escalate_tx_confirmation_seconds",
+    "Time from broadcast to receipt (or giving up)",
+    ("status",),
+    CONFIRMATION_BUCKETS
+))
+
+# aiogram handlers, labelled <module>.<function>
+HANDLER_LATENCY = REGISTRY.register(Histogram(
+    "escalate_handler_duration_seconds",
+    "Time spent in an update handler",
+    ("handler",)
+))
+HANDLER_ERRORS = REGISTRY.register(Counter(
+    "escalate_handler_errors_total",
+    "Update handlers that raised, by exception type",
+    ("handler", "error")
+))
+HANDLER_IN_FLIGHT = REGISTRY.register(Gauge(
+    "escalate_handlers_in_flight",
+    "Update handlers currently running",
+    ("handler",)
+))
+
+
+class MetricsServer:
+    """Serves a registry on GET /metrics"""
+    
+    def __init__(self, registry: Registry = REGISTRY, host: Optional[str] = None, port: Optional[int] = None):
+        """
+        Args:
+            registry: Metrics to serve
+            host: Listen address (defaults to Config.METRICS_HOST)
+            port: Listen port (defaults to Config.METRICS_PORT)
+        """
+        self.registry = registry
+        self.host = host or Config.METRICS_HOST
+        self.port = port or Config.METRICS_PORT
+        self._runner: Optional[web.AppRunner] = None
+    
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics on http://{self.host}:{self.port}/metrics")
+    
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
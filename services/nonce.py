@@ -0,0 +1,151 @@
+"""
+Local nonce allocation for a sending wallet
+Lets several transactions from the same address be in flight at once
+"""
+import asyncio
+import sqlite3
+from typing import Optional
+
+from services.rpc import RpcError
+
+
+# Node error fragments meaning our local nonce is out of step with the chain
+NONCE_ERROR_MARKERS = (
+    "nonce too low",
+    "nonce too high",
+    "invalid nonce",
+    "nonce gap",
+    "replacement transaction underpriced",
+    "already known",
+)
+
+
+def is_nonce_error(error: Exception) -> bool:
+    """True if an RPC error was caused by a stale or conflicting nonce"""
+    return isinstance(error, RpcError) and any(
+        marker in error.message.lower() for marker in NONCE_ERROR_MARKERS
+    )
+
+
+class NonceManager:
+    """
+    Async nonce allocator for one address
+    
+    Seeded once from the node's `pending` transaction count, then handed out
+    locally so concurrent sends never receive the same nonce. Call resync()
+    after a nonce error, or reset() after a failed broadcast that may have
+    left a gap, and the next allocation re-reads the count from the node.
+    """
+    
+    def __init__(self, rpc, address: str):
+        """
+        Args:
+            rpc: RPC backend used to read the pending transaction count
+            address: Sending address
+        """
+        self.rpc = rpc
+        self.address = address
+        self._next_nonce: Optional[int] = None
+        self._lock = asyncio.Lock()
+    
+    async def _fetch_pending_count(self) -> int:
+        """Read the pending transaction count from the node"""
+        count = await self.rpc.request('eth_getTransactionCount', [self.address, 'pending'])
+        return int(count, 16)
+    
+    async def allocate(self) -> int:
+        """Reserve the next nonce"""
+        async with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = await self._fetch_pending_count()
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+    
+    async def resync(self):
+        """Re-read the pending count from the node immediately"""
+        async with self._lock:
+            self._next_nonce = await self._fetch_pending_count()
+    
+    async def reset(self):
+        """Forget the local counter; the next allocation re-reads it from the node"""
+        self._next_nonce = None
+
+
+class SharedNonceManager(NonceManager):
+    """
+    Nonce allocator for an address that several processes send from
+    
+    The next nonce lives in a SQLite file instead of process memory, and
+    each allocation is one atomic increment, so worker processes signing
+    with the same key never hand out the same nonce. Seeding, resync() and
+    reset() behave like NonceManager's but apply to every process. The
+    SQLite calls, which may wait on another process's write lock, run in
+    a thread so they never block the event loop.
+    """
+    
+    def __init__(self, rpc, address: str, path: str):
+        """
+        Args:
+            rpc: RPC backend used to read the pending transaction count
+            address: Sending address
+            path: SQLite file shared by the processes
+        """
+        super().__init__(rpc, address)
+        self.path = path
+        # Used from worker threads, one call at a time under self._lock
+        self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS nonces (address TEXT PRIMARY KEY, next INTEGER)")
+    
+    def _take(self) -> Optional[int]:
+        """Increment the stored nonce, returning the one reserved (None if unseeded)"""
+        row = self._db.execute(
+            "UPDATE nonces SET next = next + 1 WHERE address = ? AND next IS NOT NULL RETURNING next - 1",
+            (self.address,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def _seed(self, count: int) -> int:
+        """Store the node's count and reserve its first nonce"""
+        # Another process may have seeded it meanwhile; then just take the next one
+        row = self._db.execute(
+            "INSERT INTO nonces (address, next) VALUES (?, ?) "
+            "ON CONFLICT(address) DO UPDATE SET next = COALESCE(next + 1, excluded.next) "
+            "RETURNING next - 1",
+            (self.address, count + 1)
+        ).fetchone()
+        return row[0]
+    
+    def _store(self, next_nonce: Optional[int]):
+        """Overwrite the stored counter (None = unseeded)"""
+        self._db.execute(
+            "INSERT INTO nonces (address, next) VALUES (?, ?) "
+            "ON CONFLICT(address) DO UPDATE SET next = excluded.next",
+            (self.address, next_nonce)
+        )
+    
+    async def allocate(self) -> int:
+        """Reserve the next nonce"""
+        async with self._lock:
+            nonce = await asyncio.to_thread(self._take)
+            if nonce is not None:
+                return nonce
+            
+            count = await self._fetch_pending_count()
+            return await asyncio.to_thread(self._seed, count)
+    
+    async def resync(self):
+        """Re-read the pending count from the node immediately"""
+        async with self._lock:
+            count = await self._fetch_pending_count()
+            await asyncio.to_thread(self._store, count)
+    
+    async def reset(self):
+        """Forget the stored counter; the next allocation re-reads it from the node"""
+        async with self._lock:
+            await asyncio.to_thread(self._store, None)
+    
+    def close(self):
+        """Close the SQLite connection"""
+        self._db.close()
@@ -0,0 +1,147 @@
+"""
+Bet quotes for Escalate markets
+Exact payout, profit and implied probability in integer token units, for one amount or a whole ladder
+"""
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional, Sequence, Tuple
+
+from config import Config
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: ladders are then computed with Python ints
+    np = None
+
+
+# Implied probabilities are given in basis points
+BPS = 10_000
+
+# Pools and amounts must stay below this for the NumPy path, so they are
+# exact as float64; bigger ladders use Python ints
+FLOAT_EXACT = 2 ** 53
+
+# Shortest ladder worth handing to NumPy (conversion costs more below this)
+NUMPY_MIN_LADDER = 64
+
+
+@dataclass(frozen=True)
+class Quote:
+    """What a bet of `amount` returns if its side wins, in token units"""
+    amount: int
+    payout: int  # stake included
+    profit: int
+    probability_bps: int  # the side's implied probability after the bet
+
+
+def to_units(text: str) -> int:
+    """
+    Parse a MON amount typed by a user into token units, exactly
+    
+    Raises:
+        ValueError: Not a number, or finer than USDC_DECIMALS allows
+    """
+    try:
+        amount = Decimal(text.strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount '{text}'")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount '{text}'")
+    
+    units = amount.scaleb(Config.USDC_DECIMALS)
+    if units != units.to_integral_value():
+        raise ValueError(f"At most {Config.USDC_DECIMALS} decimal places")
+    return int(units)
+
+
+def format_units(units: int, places: Optional[int] = 2) -> str:
+    """Token units as a MON amount rounded to `places` decimals (None: as many as needed)"""
+    amount = Decimal(units).scaleb(-Config.USDC_DECIMALS)
+    if places is None:
+        return f"{amount.normalize():f}"
+    return f"{amount:.{places}f}"
+
+
+def quote(total_yes: int, total_no: int, side: bool, amount: int) -> Quote:
+    """Quote a single bet (see quote_ladder)"""
+    return quote_ladder(total_yes, total_no, side, [amount])[0]
+
+
+def quote_ladder(total_yes: int, total_no: int, side: bool, amounts: Sequence[int]) -> List[Quote]:
+    """
+    Quote bets of several sizes on one side of a market
+    
+    Pools are parimutuel: if the side wins, a bet is paid its share of the
+    side's pool times the whole pool, i.e. amount * total / side pool with
+    both pools including the bet, rounded down like the contract does.
+    
+    Args:
+        total_yes: YES pool in token units
+        total_no: NO pool in token units
+        side: True for YES, False for NO
+        amounts: Bet sizes in token units
+    
+    Returns:
+        One Quote per amount, in order
+    """
+    payouts, profits, probabilities = ladder_columns(total_yes, total_no, side, amounts)
+    return [
+        Quote(amount, payout, profit, probability)
+        for amount, payout, profit, probability in zip(amounts, payouts, profits, probabilities)
+    ]
+
+
+def ladder_columns(
+    total_yes: int,
+    total_no: int,
+    side: bool,
+    amounts: Sequence[int]
+) -> Tuple[Sequence[int], Sequence[int], Sequence[int]]:
+    """
+    Payouts, profits and implied probabilities (bps) for a ladder of amounts
+    
+    Uses one vectorised NumPy pass when NumPy is installed, the ladder is
+    long enough to gain from it and all values stay below 2**53 (about nine
+    billion MON); otherwise the same integer arithmetic runs on Python
+    ints. Both give identical results.
+    """
+    side_pool = total_yes if side else total_no
+    other_pool = total_no if side else total_yes
+    if not amounts:
+        return [], [], []
+    
+    largest = max(amounts)
+    if min(amounts) <= 0:
+        raise ValueError("Bet amounts must be positive")
+    
+    if np is not None and len(amounts) >= NUMPY_MIN_LADDER and largest + side_pool + other_pool < FLOAT_EXACT:
+        stake = np.asarray(amounts, dtype=np.int64)
+        side_after = stake + side_pool
+        # payout = amount * (side + other) / side, split so the quotient stays small
+        profit = _muldiv(stake, other_pool, side_after)
+        payout = stake + profit
+        probability = _muldiv(side_after, BPS, side_after + other_pool)
+        return payout.tolist(), profit.tolist(), probability.tolist()
+    
+    profits = [amount * other_pool // (amount + side_pool) for amount in amounts]
+    payouts = [amount + profit for amount, profit in zip(amounts, profits)]
+    probabilities = [
+        (amount + side_pool) * BPS // (amount + side_pool + other_pool)
+        for amount in amounts
+    ]
+    return payouts, profits, probabilities
+
+
+def _muldiv(x, y, d):
+    """
+    floor(x * y / d) for int64 arrays, exactly, with x, y, d below 2**53
+    
+    x * y may not fit in int64, so the quotient is estimated in float64
+    (off by a few units at most) and corrected with the remainder. The
+    remainder's products wrap around in int64, but its true value is small,
+    so the wrapped difference is exact.
+    """
+    q = np.floor(x.astype(np.float64) * y / d).astype(np.int64)
+    r = x * y - q * d
+    return q + r // d
@@ -0,0 +1,199 @@
+"""
+Background transaction receipt tracking
+One polling loop watches every pending transaction so handlers can return
+as soon as a transaction is broadcast
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from config import Config
+from services.metrics import TX_CONFIRMATION
+
+
+logger = logging.getLogger(__name__)
+
+
+# Strong references to running confirmation callbacks
+_callback_tasks: Set[asyncio.Task] = set()
+
+
+class PendingTransaction:
+    """Handle for a broadcast transaction awaiting its receipt"""
+    
+    def __init__(
+        self,
+        tx_hash: str,
+        future: asyncio.Future,
+        failure_message: str,
+        depends_on: Optional[List["PendingTransaction"]] = None
+    ):
+        """
+        Args:
+            tx_hash: Transaction hash
+            future: Resolves with the receipt once mined
+            failure_message: Error raised by wait() if the transaction reverts
+            depends_on: Earlier transactions this one needs (e.g. an approval)
+        """
+        self.tx_hash = tx_hash
+        self._future = future
+        self.failure_message = failure_message
+        self.depends_on = depends_on or []
+    
+    def done(self) -> bool:
+        """True once the transaction is mined or tracking gave up"""
+        return self._future.done()
+    
+    async def wait(self) -> Dict:
+        """
+        Wait for the receipt (after any transactions this one depends on)
+        
+        Returns:
+            Receipt of the successful transaction
+        
+        Raises:
+            Exception: If this transaction or a dependency reverted
+            TimeoutError: If it was not mined within Config.RECEIPT_TIMEOUT
+        """
+        for dependency in self.depends_on:
+            await dependency.wait()
+        
+        receipt = await asyncio.shield(self._future)
+        if int(receipt['status'], 16) != 1:
+            raise Exception(self.failure_message)
+        return receipt
+    
+    def add_callback(self, callback: Callable[["PendingTransaction"], Awaitable]):
+        """
+        Run a coroutine once the transaction is mined (or fails)
+        
+        The callback receives this handle and can call wait() to get the
+        receipt or the error without blocking.
+        """
+        self._future.add_done_callback(lambda _: spawn_callback(callback, self, self.tx_hash))
+
+
+def spawn_callback(callback: Callable[[Any], Awaitable], handle: Any, label: str):
+    """Run a confirmation callback in the background, logging instead of raising errors"""
+    async def run():
+        try:
+            await callback(handle)
+        except Exception as e:
+            logger.error(f"Confirmation callback for {label} failed: {e}")
+    
+    task = asyncio.create_task(run())
+    _callback_tasks.add(task)
+    task.add_done_callback(_callback_tasks.discard)
+
+
+class ReceiptTracker:
+    """
+    Polls receipts for all pending transactions in one batched loop
+    
+    The loop sleeps while nothing is pending and otherwise polls once per
+    block time, sending a single JSON-RPC batch for every tracked hash.
+    """
+    
+    def __init__(self, rpc, poll_interval: Optional[float] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            rpc: RPC backend
+            poll_interval: Seconds between polls (defaults to Config.BLOCK_TIME)
+            timeout: Seconds before giving up on a transaction (defaults to Config.RECEIPT_TIMEOUT)
+        """
+        self.rpc = rpc
+        self.poll_interval = poll_interval or Config.BLOCK_TIME
+        self.timeout = timeout or Config.RECEIPT_TIMEOUT
+        
+        # tx hash -> (future, deadline, time tracking started)
+        self._pending: Dict[str, Tuple[asyncio.Future, float, float]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of transactions awaiting a receipt"""
+        return len(self._pending)
+    
+    def track(self, tx_hash: str) -> asyncio.Future:
+        """
+        Start watching a transaction
+        
+        Returns:
+            Future resolving with the receipt (or TimeoutError)
+        """
+        if tx_hash in self._pending:
+            return self._pending[tx_hash][0]
+        
+        future = asyncio.get_running_loop().create_future()
+        now = time.monotonic()
+        self._pending[tx_hash] = (future, now + self.timeout, now)
+        self._wakeup.set()
+        self.start()
+        return future
+    
+    def start(self):
+        """Start the polling loop (also started on the first track())"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop polling and cancel every pending future"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        for future, _, _ in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+    
+    async def _run(self):
+        """Poll while anything is pending, otherwise sleep until track() is called"""
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            
+            await asyncio.sleep(self.poll_interval)
+            
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.warning(f"Receipt polling failed: {e}")
+    
+    async def poll(self):
+        """Fetch receipts for every pending transaction and settle the finished ones"""
+        hashes = list(self._pending)
+        batch_size = max(1, Config.RPC_BATCH_SIZE)
+        
+        for i in range(0, len(hashes), batch_size):
+            chunk = hashes[i:i + batch_size]
+            receipts = await self.rpc.batch([
+                ('eth_getTransactionReceipt', [tx_hash]) for tx_hash in chunk
+            ])
+            now = time.monotonic()
+            
+            for tx_hash, receipt in zip(chunk, receipts):
+                entry = self._pending.get(tx_hash)
+                if entry is None:
+                    continue
+                future, deadline, tracked_at = entry
+                
+                if isinstance(receipt, dict):
+                    del self._pending[tx_hash]
+                    status = "success" if int(receipt['status'], 16) == 1 else "reverted"
+                    TX_CONFIRMATION.labels(status).observe(now - tracked_at)
+                    if not future.done():
+                        future.set_result(receipt)
+                elif now >= deadline:
+                    del self._pending[tx_hash]
+                    TX_CONFIRMATION.labels("timeout").observe(now - tracked_at)
+                    if not future.done():
+                        future.set_exception(TimeoutError(
+                            f"Transaction {tx_hash} not mined after {self.timeout} seconds"
+                        ))
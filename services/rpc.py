@@ -0,0 +1,305 @@
+"""
+JSON-RPC transport backends for BlockchainService
+Both backends expose the same coroutine API so the service does not care
+whether requests run on the event loop or in worker threads
+"""
+import asyncio
+import itertools
+import time
+from typing import Any, List, Optional, Tuple
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+from config import Config
+from services import metrics
+from services.abi import FUNCTION_NAMES
+
+
+class RpcError(Exception):
+    """JSON-RPC error returned by the node"""
+    
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(f"RPC error {code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def unwrap_response(response: dict) -> Any:
+    """Return the result of a JSON-RPC response or raise RpcError"""
+    if response.get('error'):
+        error = response['error']
+        raise RpcError(error.get('code', -1), error.get('message', ''), error.get('data'))
+    return response.get('result')
+
+
+def build_batch_payload(ids, calls: List[Tuple[str, List]]) -> List[dict]:
+    """Build a JSON-RPC batch payload from (method, params) pairs"""
+    return [
+        {'jsonrpc': '2.0', 'id': next(ids), 'method': method, 'params': params}
+        for method, params in calls
+    ]
+
+
+def unwrap_batch(payload: List[dict], responses: Any) -> List[Any]:
+    """
+    Match batch responses to their requests by id
+    
+    Returns:
+        Results in request order; failed entries are RpcError instances
+    """
+    if not isinstance(responses, list):
+        # Some nodes answer a rejected batch with a single error object
+        error = (responses or {}).get('error') or {}
+        failure = RpcError(error.get('code', -1), error.get('message', "Unexpected batch response"))
+        return [failure] * len(payload)
+    
+    by_id = {response.get('id'): response for response in responses}
+    results = []
+    for request in payload:
+        response = by_id.get(request['id'])
+        if response is None:
+            results.append(RpcError(-1, "Missing response in batch"))
+            continue
+        try:
+            results.append(unwrap_response(response))
+        except RpcError as e:
+            results.append(e)
+    return results
+
+
+class ThreadedRpcBackend:
+    """
+    web3 HTTPProvider driven through asyncio.to_thread
+    
+    Each request occupies a worker of the default executor for its full
+    round trip, so concurrency is bounded by the executor size.
+    """
+    
+    def __init__(self, rpc_url: str, pool_size: int, timeout: int):
+        """
+        Args:
+            rpc_url: RPC endpoint
+            pool_size: Keep-alive HTTP connections
+            timeout: Seconds per request
+        """
+        self.rpc_url = rpc_url
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        
+        # Keep-alive HTTP session shared by every RPC call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        self.provider = Web3.HTTPProvider(
+            rpc_url,
+            request_kwargs={'timeout': timeout},
+            session=self.session
+        )
+    
+    async def request(self, method: str, params: List) -> Any:
+        """Send one JSON-RPC request"""
+        response = await asyncio.to_thread(self.provider.make_request, method, params)
+        return unwrap_response(response)
+    
+    def _post_batch(self, payload: List[dict]) -> Any:
+        """POST a batch payload on the pooled session (runs in a worker thread)"""
+        response = self.session.post(self.rpc_url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    async def batch(self, calls: List[Tuple[str, List]]) -> List[Any]:
+        """
+        Send several JSON-RPC requests in one HTTP round trip
+        
+        Returns:
+            Results in request order; failed entries are RpcError instances
+        """
+        payload = build_batch_payload(self._ids, calls)
+        responses = await asyncio.to_thread(self._post_batch, payload)
+        return unwrap_batch(payload, responses)
+    
+    async def close(self):
+        """Release pooled connections"""
+        self.session.close()
+
+
+class AsyncRpcBackend:
+    """
+    Thin aiohttp JSON-RPC client running on the event loop
+    
+    Requests are plain coroutines, so concurrency scales with the loop and
+    the connector limit rather than with a thread count.
+    """
+    
+    def __init__(self, rpc_url: str, pool_size: int, timeout: int):
+        """
+        Args:
+            rpc_url: RPC endpoint
+            pool_size: Maximum simultaneous HTTP connections
+            timeout: Seconds per request
+        """
+        self.rpc_url = rpc_url
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ids = itertools.count(1)
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the client session lazily, inside the running loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=self.timeout
+            )
+        return self._session
+    
+    async def _post(self, payload: Any) -> Any:
+        """POST a JSON-RPC payload and return the decoded body"""
+        async with self._get_session().post(self.rpc_url, json=payload) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+    
+    async def request(self, method: str, params: List) -> Any:
+        """Send one JSON-RPC request"""
+        payload = {
+            'jsonrpc': '2.0',
+            'id': next(self._ids),
+            'method': method,
+            'params': params
+        }
+        return unwrap_response(await self._post(payload))
+    
+    async def batch(self, calls: List[Tuple[str, List]]) -> List[Any]:
+        """
+        Send several JSON-RPC requests in one HTTP round trip
+        
+        Returns:
+            Results in request order; failed entries are RpcError instances
+        """
+        payload = build_batch_payload(self._ids, calls)
+        return unwrap_batch(payload, await self._post(payload))
+    
+    async def close(self):
+        """Close the client session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+def call_function(method: str, params: List) -> str:
+    """Contract function an eth_call invokes, for metric labels ("" for other methods)"""
+    if method != 'eth_call' or not params or not isinstance(params[0], dict):
+        return ""
+    data = params[0].get('data') or params[0].get('input') or ""
+    return FUNCTION_NAMES.get(data[:10], "unknown")
+
+
+class InstrumentedBackend:
+    """
+    Records latency, call and error counts and in-flight requests of another backend
+    
+    Errors are counted by exception type where they happen, before
+    BlockchainService wraps them into its own messages.
+    """
+    
+    def __init__(self, backend):
+        """
+        Args:
+            backend: ThreadedRpcBackend or AsyncRpcBackend
+        """
+        self.backend = backend
+    
+    async def request(self, method: str, params: List) -> Any:
+        """Send one JSON-RPC request"""
+        function = call_function(method, params)
+        metrics.RPC_CALLS.labels(method, function).inc()
+        in_flight = metrics.RPC_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            return await self.backend.request(method, params)
+        except Exception as e:
+            metrics.RPC_ERRORS.labels(method, function, type(e).__name__).inc()
+            raise
+        finally:
+            metrics.RPC_LATENCY.labels(method, function, "false").observe(time.perf_counter() - start)
+            in_flight.dec()
+    
+    async def batch(self, calls: List[Tuple[str, List]]) -> List[Any]:
+        """Send several JSON-RPC requests in one HTTP round trip"""
+        labels = [(method, call_function(method, params)) for method, params in calls]
+        for method, function in labels:
+            metrics.RPC_CALLS.labels(method, function).inc()
+        
+        # Timed under the shared method and function, or every method joined with "+"
+        if len(set(labels)) == 1:
+            method, function = labels[0]
+        else:
+            method, function = "+".join(sorted({method for method, _ in labels})), ""
+        in_flight = metrics.RPC_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            results = await self.backend.batch(calls)
+        except Exception as e:
+            for entry_method, entry_function in labels:
+                metrics.RPC_ERRORS.labels(entry_method, entry_function, type(e).__name__).inc()
+            raise
+        finally:
+            metrics.RPC_LATENCY.labels(method, function, "true").observe(time.perf_counter() - start)
+            in_flight.dec()
+        
+        for (entry_method, entry_function), result in zip(labels, results):
+            if isinstance(result, RpcError):
+                metrics.RPC_ERRORS.labels(entry_method, entry_function, "RpcError").inc()
+        return results
+    
+    async def close(self):
+        await self.backend.close()
+
+
+BACKENDS = {
+    'thread': ThreadedRpcBackend,
+    'async': AsyncRpcBackend,
+}
+
+
+def create_backend(
+    rpc_urls: Optional[List[str]] = None,
+    backend: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    timeout: Optional[int] = None
+):
+    """
+    Build the RPC backend selected in Config
+    
+    With several endpoints, one backend per endpoint behind an RpcRouter.
+    The result is wrapped in InstrumentedBackend when metrics are served
+    (Config.METRICS_PORT).
+    
+    Args:
+        rpc_urls: RPC endpoints (defaults to Config.MONAD_RPC_URLS)
+        backend: 'thread' or 'async' (defaults to Config.RPC_BACKEND)
+        pool_size: Connection pool size per endpoint (defaults to Config.RPC_POOL_SIZE)
+        timeout: Seconds per request (defaults to Config.RPC_TIMEOUT)
+    """
+    backend = backend or Config.RPC_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown RPC backend '{backend}', expected one of: {', '.join(BACKENDS)}")
+    
+    def build(url: str):
+        return BACKENDS[backend](url, pool_size or Config.RPC_POOL_SIZE, timeout or Config.RPC_TIMEOUT)
+    
+    urls = rpc_urls or Config.MONAD_RPC_URLS
+    if len(urls) > 1:
+        # Imported here: the router builds on this module
+        from services.rpc_router import RpcRouter
+        rpc = RpcRouter(urls, build)
+    else:
+        rpc = build(urls[0])
+    return InstrumentedBackend(rpc) if Config.METRICS_PORT else rpc
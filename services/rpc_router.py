@@ -0,0 +1,336 @@
+"""
+Multi-endpoint JSON-RPC routing for BlockchainService
+Picks the healthiest node per request, hedges slow reads and keeps writes on one node
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from config import Config
+from services import metrics
+from services.rpc import RpcError
+
+
+logger = logging.getLogger(__name__)
+
+# Methods whose answer depends on the node's own mempool: sends and
+# `pending` nonce lookups go to one node so they see each other
+STICKY_METHODS = frozenset({'eth_sendRawTransaction', 'eth_sendTransaction', 'eth_getTransactionCount'})
+
+# Weight of the newest sample in the latency and error averages
+EWMA_ALPHA = 0.2
+
+# An endpoint's score is its latency average times (1 + ERROR_PENALTY * error rate)
+ERROR_PENALTY = 10
+
+# Latency samples per endpoint for the hedge deadline, and how many are
+# needed before the percentile is trusted (INITIAL_HEDGE_DELAY until then)
+LATENCY_WINDOW = 256
+MIN_LATENCY_SAMPLES = 20
+INITIAL_HEDGE_DELAY = 0.5
+
+# Hedges are paid for by reads: each read adds HEDGE_BUDGET_RATIO of a
+# hedge, up to HEDGE_BUDGET_BURST, so a slow cluster is not hit twice as hard
+HEDGE_BUDGET_RATIO = 0.1
+HEDGE_BUDGET_BURST = 10.0
+
+
+def endpoint_label(url: str) -> str:
+    """host[:port] of an RPC URL, for logs and metrics (paths often carry API keys)"""
+    parts = urlsplit(url)
+    return f"{parts.hostname}:{parts.port}" if parts.port else (parts.hostname or url)
+
+
+class Endpoint:
+    """One RPC node with its backend and live health data"""
+    
+    def __init__(self, url: str, backend):
+        self.url = url
+        self.label = endpoint_label(url)
+        self.backend = backend
+        
+        self.latency: Optional[float] = None  # EWMA of successful round trips, seconds
+        self.error_rate = 0.0  # EWMA of transport failures (0..1)
+        self.failures = 0  # consecutive transport failures
+        self.ejected = False
+        self.block_number = 0  # head block seen by the last probe
+        self.in_flight = 0
+        
+        self._samples: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._p95: Optional[float] = None
+        
+        # Counters for reporting
+        self.served = 0
+        self.errors = 0
+        self.ejections = 0
+    
+    @property
+    def score(self) -> float:
+        """Expected cost of a request here; lower is better, unmeasured endpoints go first"""
+        latency = self.latency if self.latency is not None else 0.0
+        return latency * (1 + ERROR_PENALTY * self.error_rate) * (1 + self.in_flight / 100)
+    
+    def record_success(self, elapsed: float):
+        self.latency = elapsed if self.latency is None else self.latency + EWMA_ALPHA * (elapsed - self.latency)
+        self.error_rate -= EWMA_ALPHA * self.error_rate
+        self.failures = 0
+        self._samples.append(elapsed)
+        if len(self._samples) % 16 == 0:
+            self._p95 = None
+    
+    def record_failure(self):
+        self.error_rate += EWMA_ALPHA * (1 - self.error_rate)
+        self.failures += 1
+        self.errors += 1
+    
+    def hedge_delay(self) -> float:
+        """Seconds to wait for this endpoint before hedging: its recent p95 latency"""
+        if len(self._samples) < MIN_LATENCY_SAMPLES:
+            return INITIAL_HEDGE_DELAY
+        if self._p95 is None:
+            ordered = sorted(self._samples)
+            self._p95 = ordered[int(len(ordered) * 0.95)]
+        return max(self._p95, Config.RPC_HEDGE_MIN_DELAY)
+
+
+class RpcRouter:
+    """
+    Routes JSON-RPC requests over several endpoints
+    
+    Reads go to the endpoint with the lowest score (latency EWMA weighted by
+    error EWMA). If it has not answered by its p95 latency a copy goes to
+    the next best endpoint and the first answer wins; transport failures
+    fail over to the next endpoint at once. Writes and nonce lookups stick
+    to one healthy endpoint until it fails.
+    
+    An endpoint is ejected after Config.RPC_EJECT_AFTER consecutive
+    transport failures, or when its head falls more than
+    Config.RPC_MAX_BLOCK_LAG blocks behind the others. A background loop
+    probes every endpoint each Config.RPC_PROBE_INTERVAL seconds and
+    readmits ejected ones that answer and have caught up. JSON-RPC errors
+    are answers, not failures: they are returned without failing over.
+    
+    Exposes the same coroutine API as the single-endpoint backends.
+    """
+    
+    def __init__(self, urls: List[str], backend_factory, hedge: Optional[bool] = None):
+        """
+        Args:
+            urls: RPC endpoints
+            backend_factory: Builds the single-endpoint backend for a URL
+            hedge: Send hedged reads (defaults to Config.RPC_HEDGE)
+        """
+        self.endpoints = [Endpoint(url, backend_factory(url)) for url in urls]
+        self.hedge = Config.RPC_HEDGE if hedge is None else hedge
+        self._sticky: Optional[Endpoint] = None
+        self._hedge_tokens = HEDGE_BUDGET_BURST
+        self._probe_task: Optional[asyncio.Task] = None
+        
+        # Counters for reporting
+        self.reads = 0
+        self.writes = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+    
+    def start(self):
+        """Start the probe loop (also started on the first request)"""
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_loop())
+    
+    async def close(self):
+        """Stop probing and close every endpoint's backend"""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        for endpoint in self.endpoints:
+            await endpoint.backend.close()
+    
+    async def request(self, method: str, params: List) -> Any:
+        """Send one JSON-RPC request"""
+        if method in STICKY_METHODS:
+            return await self._write(lambda backend: backend.request(method, params))
+        return await self._read(lambda backend: backend.request(method, params))
+    
+    async def batch(self, calls: List[Tuple[str, List]]) -> List[Any]:
+        """
+        Send several JSON-RPC requests in one HTTP round trip
+        
+        Returns:
+            Results in request order; failed entries are RpcError instances
+        """
+        if any(method in STICKY_METHODS for method, _ in calls):
+            return await self._write(lambda backend: backend.batch(calls))
+        return await self._read(lambda backend: backend.batch(calls))
+    
+    def _ranked(self) -> List[Endpoint]:
+        """Healthy endpoints best first, or every endpoint if all are ejected"""
+        healthy = [endpoint for endpoint in self.endpoints if not endpoint.ejected]
+        return sorted(healthy or self.endpoints, key=lambda endpoint: endpoint.score)
+    
+    async def _attempt(self, endpoint: Endpoint, send) -> Any:
+        """Send on one endpoint, recording the outcome in its health data"""
+        endpoint.in_flight += 1
+        start = time.perf_counter()
+        try:
+            result = await send(endpoint.backend)
+        except RpcError:
+            # The node answered; the error is the answer
+            endpoint.record_success(time.perf_counter() - start)
+            raise
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            endpoint.record_failure()
+            if endpoint.failures >= Config.RPC_EJECT_AFTER:
+                self._eject(endpoint, f"{endpoint.failures} failures in a row")
+            raise
+        else:
+            endpoint.record_success(time.perf_counter() - start)
+            endpoint.served += 1
+            return result
+        finally:
+            endpoint.in_flight -= 1
+    
+    async def _write(self, send) -> Any:
+        """Send on the sticky endpoint, choosing a new one if it was ejected"""
+        self.start()
+        self.writes += 1
+        if self._sticky is None or self._sticky.ejected:
+            self._sticky = self._ranked()[0]
+            logger.info(f"Writes go to {self._sticky.label}")
+        return await self._attempt(self._sticky, send)
+    
+    def _launch(self, attempts: Dict[asyncio.Future, Endpoint], endpoint: Endpoint, send) -> asyncio.Future:
+        task = asyncio.ensure_future(self._attempt(endpoint, send))
+        attempts[task] = endpoint
+        return task
+    
+    async def _read(self, send) -> Any:
+        """
+        Send to the best endpoint, hedging past its p95 and failing over on errors
+        
+        Each endpoint is tried at most once; the last transport error is
+        raised when none of them answers.
+        """
+        self.start()
+        self.reads += 1
+        self._hedge_tokens = min(HEDGE_BUDGET_BURST, self._hedge_tokens + HEDGE_BUDGET_RATIO)
+        
+        candidates = self._ranked()
+        attempts: Dict[asyncio.Future, Endpoint] = {}
+        hedged: Set[asyncio.Future] = set()
+        last_error: Optional[BaseException] = None
+        try:
+            while True:
+                if not attempts:
+                    if not candidates:
+                        raise last_error
+                    if last_error is not None:
+                        self.failovers += 1
+                    self._launch(attempts, candidates.pop(0), send)
+                
+                # Wait for an answer, or until the only attempt misses its hedge deadline
+                timeout = None
+                if self.hedge and candidates and len(attempts) == 1 and self._hedge_tokens >= 1:
+                    timeout = next(iter(attempts.values())).hedge_delay()
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    self._hedge_tokens -= 1
+                    self.hedges += 1
+                    metrics.RPC_HEDGES.labels("sent").inc()
+                    hedged.add(self._launch(attempts, candidates.pop(0), send))
+                    continue
+                
+                for task in done:
+                    endpoint = attempts.pop(task)
+                    error = task.exception()
+                    if error is None or isinstance(error, RpcError):
+                        if task in hedged:
+                            self.hedge_wins += 1
+                            metrics.RPC_HEDGES.labels("won").inc()
+                        return task.result()
+                    logger.debug(f"Read on {endpoint.label} failed: {error}")
+                    last_error = error
+        finally:
+            for task in attempts:
+                task.cancel()
+    
+    def _eject(self, endpoint: Endpoint, reason: str):
+        if endpoint.ejected:
+            return
+        endpoint.ejected = True
+        endpoint.ejections += 1
+        metrics.RPC_ENDPOINT_HEALTHY.labels(endpoint.label).set(0)
+        logger.warning(f"RPC endpoint {endpoint.label} ejected: {reason}")
+    
+    def _readmit(self, endpoint: Endpoint):
+        endpoint.ejected = False
+        endpoint.failures = 0
+        metrics.RPC_ENDPOINT_HEALTHY.labels(endpoint.label).set(1)
+        logger.info(f"RPC endpoint {endpoint.label} readmitted")
+    
+    async def _probe(self, endpoint: Endpoint):
+        """eth_blockNumber on one endpoint; updates its health data and head"""
+        try:
+            endpoint.block_number = int(
+                await self._attempt(endpoint, lambda backend: backend.request('eth_blockNumber', [])), 16
+            )
+        except Exception:
+            pass
+    
+    async def probe(self):
+        """Probe every endpoint once, then eject laggards and readmit recovered ones"""
+        await asyncio.gather(*(self._probe(endpoint) for endpoint in self.endpoints))
+        
+        head = max(endpoint.block_number for endpoint in self.endpoints)
+        for endpoint in self.endpoints:
+            lag = head - endpoint.block_number
+            answered = endpoint.failures == 0
+            if answered and lag > Config.RPC_MAX_BLOCK_LAG:
+                self._eject(endpoint, f"{lag} blocks behind")
+            elif answered and endpoint.ejected:
+                self._readmit(endpoint)
+            if endpoint.latency is not None:
+                metrics.RPC_ENDPOINT_LATENCY.labels(endpoint.label).set(endpoint.latency)
+    
+    async def _probe_loop(self):
+        for endpoint in self.endpoints:
+            metrics.RPC_ENDPOINT_HEALTHY.labels(endpoint.label).set(1)
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.warning(f"RPC probe failed: {e}")
+            await asyncio.sleep(Config.RPC_PROBE_INTERVAL)
+    
+    def stats(self) -> Dict:
+        """Routing counters and per-endpoint health"""
+        return {
+            'reads': self.reads,
+            'writes': self.writes,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'failovers': self.failovers,
+            'sticky': self._sticky.label if self._sticky else None,
+            'endpoints': {
+                endpoint.label: {
+                    'healthy': not endpoint.ejected,
+                    'latency_ms': round(endpoint.latency * 1000, 1) if endpoint.latency is not None else None,
+                    'error_rate': round(endpoint.error_rate, 3),
+                    'block': endpoint.block_number,
+                    'served': endpoint.served,
+                    'errors': endpoint.errors,
+                    'ejections': endpoint.ejections
+                }
+                for endpoint in self.endpoints
+            }
+        }
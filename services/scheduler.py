@@ -0,0 +1,260 @@
+"""
+Transaction submission queue
+Orders outgoing transactions by priority and bounds how many are in flight
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+from config import Config
+from services.receipts import PendingTransaction, spawn_callback
+
+
+logger = logging.getLogger(__name__)
+
+
+# Priorities (lower is sent first)
+PRIORITY_RESOLUTION = 0
+PRIORITY_BET = 1
+PRIORITY_CREATION = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_RESOLUTION: 'resolution',
+    PRIORITY_BET: 'bet',
+    PRIORITY_CREATION: 'creation',
+}
+
+# Recent queue wait times kept per priority for the percentiles in stats()
+WAIT_SAMPLES = 1000
+
+
+class QueuedTransaction:
+    """
+    Handle for a transaction waiting in the submission queue
+    
+    Behaves like a PendingTransaction: wait() returns the receipt once the
+    transaction is sent and mined, and add_callback() runs a coroutine once
+    it is mined or has failed. tx_hash is None until it is broadcast.
+    """
+    
+    def __init__(self, priority: int, user_id: Hashable):
+        """
+        Args:
+            priority: One of the PRIORITY_* constants
+            user_id: Telegram user the transaction is sent for (None if unknown)
+        """
+        loop = asyncio.get_running_loop()
+        self.priority = priority
+        self.user_id = user_id
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.pending: Optional[PendingTransaction] = None
+        
+        # Resolves with the PendingTransaction once broadcast
+        self._sent = loop.create_future()
+        # A send error may only be read through a callback; mark it retrieved
+        self._sent.add_done_callback(lambda f: f.cancelled() or f.exception())
+        # Resolves once the transaction is mined or has failed
+        self._settled = loop.create_future()
+    
+    @property
+    def tx_hash(self) -> Optional[str]:
+        """Transaction hash, once broadcast"""
+        return self.pending.tx_hash if self.pending is not None else None
+    
+    def done(self) -> bool:
+        """True once the transaction is mined or has failed"""
+        return self._settled.done()
+    
+    async def sent(self) -> PendingTransaction:
+        """
+        Wait until the transaction leaves the queue and is broadcast
+        
+        Raises:
+            Exception: If building or broadcasting the transaction failed
+        """
+        return await asyncio.shield(self._sent)
+    
+    async def wait(self) -> Dict:
+        """
+        Wait for the transaction to be sent and mined
+        
+        Returns:
+            Receipt of the successful transaction
+        
+        Raises:
+            Exception: If sending failed or the transaction reverted
+        """
+        pending = await self.sent()
+        return await pending.wait()
+    
+    def add_callback(self, callback: Callable[["QueuedTransaction"], Awaitable]):
+        """
+        Run a coroutine once the transaction is mined (or fails)
+        
+        The callback receives this handle and can call wait() to get the
+        receipt or the error without blocking.
+        """
+        self._settled.add_done_callback(
+            lambda _: spawn_callback(callback, self, self.tx_hash or PRIORITY_NAMES[self.priority])
+        )
+
+
+class TxScheduler:
+    """
+    Priority queue in front of every transaction the bot sends
+    
+    Jobs are taken by priority (resolutions, then bets, then market
+    creation) and, within a priority, round-robin across users, so one
+    user's burst cannot delay everyone else's. At most `max_in_flight`
+    jobs are being sent or awaiting their receipt at once; a slot is freed
+    when the transaction is mined or fails.
+    """
+    
+    def __init__(self, max_in_flight: Optional[int] = None):
+        """
+        Args:
+            max_in_flight: Transactions sent but not yet mined (defaults to Config.TX_MAX_IN_FLIGHT)
+        """
+        self.max_in_flight = max(1, max_in_flight or Config.TX_MAX_IN_FLIGHT)
+        self.in_flight = 0
+        
+        # priority -> user -> queued jobs (users are served in rotation)
+        self._queues: Dict[int, "OrderedDict[Hashable, Deque]"] = {
+            priority: OrderedDict() for priority in PRIORITY_NAMES
+        }
+        self._tasks = set()
+        
+        # Metrics
+        self.submitted = {priority: 0 for priority in PRIORITY_NAMES}
+        self.failed = {priority: 0 for priority in PRIORITY_NAMES}
+        self._waits: Dict[int, Deque[float]] = {
+            priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITY_NAMES
+        }
+    
+    def submit(
+        self,
+        priority: int,
+        user_id: Hashable,
+        send: Callable[[], Awaitable[PendingTransaction]]
+    ) -> QueuedTransaction:
+        """
+        Queue a transaction
+        
+        Args:
+            priority: One of the PRIORITY_* constants
+            user_id: Telegram user the transaction is sent for (None if unknown)
+            send: Coroutine function that builds and broadcasts the transaction
+        
+        Returns:
+            QueuedTransaction handle
+        """
+        if priority not in PRIORITY_NAMES:
+            raise ValueError(f"Unknown transaction priority {priority}")
+        
+        handle = QueuedTransaction(priority, user_id)
+        self._queues[priority].setdefault(user_id, deque()).append((handle, send))
+        self._dispatch()
+        return handle
+    
+    def queue_depth(self, priority: Optional[int] = None) -> int:
+        """Number of queued jobs, for one priority or in total"""
+        priorities = PRIORITY_NAMES if priority is None else [priority]
+        return sum(
+            len(jobs)
+            for p in priorities
+            for jobs in self._queues[p].values()
+        )
+    
+    def _next_job(self) -> Optional[tuple]:
+        """Pop the next job: highest priority first, then the next user in rotation"""
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            if not users:
+                continue
+            
+            user_id, jobs = next(iter(users.items()))
+            job = jobs.popleft()
+            if jobs:
+                users.move_to_end(user_id)
+            else:
+                del users[user_id]
+            return job
+        return None
+    
+    def _dispatch(self):
+        """Start queued jobs while there are free in-flight slots"""
+        while self.in_flight < self.max_in_flight:
+            job = self._next_job()
+            if job is None:
+                return
+            
+            self.in_flight += 1
+            task = asyncio.create_task(self._run(*job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, handle: QueuedTransaction, send: Callable[[], Awaitable[PendingTransaction]]):
+        """Send one job and hold its slot until the transaction is mined"""
+        handle.started_at = time.monotonic()
+        self._waits[handle.priority].append(handle.started_at - handle.enqueued_at)
+        
+        try:
+            pending = await send()
+        except Exception as e:
+            logger.warning(f"Queued {PRIORITY_NAMES[handle.priority]} transaction was not sent: {e}")
+            self.failed[handle.priority] += 1
+            handle._sent.set_exception(e)
+            handle._settled.set_result(None)
+            self._release()
+            return
+        
+        self.submitted[handle.priority] += 1
+        handle.pending = pending
+        handle._sent.set_result(pending)
+        
+        async def on_mined(_):
+            handle._settled.set_result(None)
+            self._release()
+        
+        pending.add_callback(on_mined)
+    
+    def _release(self):
+        """Free an in-flight slot and start the next job"""
+        self.in_flight -= 1
+        self._dispatch()
+    
+    async def stop(self):
+        """Fail every queued job and wait for jobs currently being sent"""
+        for users in self._queues.values():
+            for jobs in users.values():
+                for handle, _ in jobs:
+                    handle._sent.set_exception(Exception("Transaction queue stopped"))
+                    handle._settled.set_result(None)
+            users.clear()
+        
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight count and queue wait times per priority"""
+        priorities = {}
+        for priority, name in PRIORITY_NAMES.items():
+            waits = sorted(self._waits[priority])
+            priorities[name] = {
+                'queued': self.queue_depth(priority),
+                'submitted': self.submitted[priority],
+                'failed': self.failed[priority],
+                'wait_mean': sum(waits) / len(waits) if waits else 0.0,
+                'wait_p95': waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                'wait_max': waits[-1] if waits else 0.0
+            }
+        
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'queued': self.queue_depth(),
+            'priorities': priorities
+        }
@@ -0,0 +1,143 @@
+"""
+Signing wallets for outgoing transactions
+A pool of hot keys lets bets and market creation use parallel nonce streams
+"""
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from eth_account import Account
+
+from services.allowance import AllowanceTracker
+from services.nonce import NonceManager, SharedNonceManager
+from services.receipts import PendingTransaction
+
+
+class Signer:
+    """One signing key with its own nonce stream and token allowance"""
+    
+    def __init__(
+        self,
+        rpc,
+        private_key: str,
+        read_allowance: Callable[[str], Awaitable[int]],
+        nonce_db: Optional[str] = None
+    ):
+        """
+        Args:
+            rpc: RPC backend
+            private_key: Hex private key
+            read_allowance: Coroutine function returning an owner's on-chain allowance
+            nonce_db: SQLite file for nonces shared with other processes (None = in memory)
+        """
+        self.account = Account.from_key(private_key)
+        self.address = self.account.address
+        if nonce_db:
+            self.nonce_manager = SharedNonceManager(rpc, self.address, nonce_db)
+        else:
+            self.nonce_manager = NonceManager(rpc, self.address)
+        self.allowance = AllowanceTracker(lambda: read_allowance(self.address))
+        
+        # Jobs assigned to this signer whose transactions are not mined yet
+        self.busy = 0
+        self.sent = 0
+
+
+class SignerPool:
+    """
+    The bot's signing keys
+    
+    The primary key (Config.PRIVATE_KEY) signs resolutions. Bets and market
+    creation go to the least busy key in the hot pool: Config.SIGNER_PRIVATE_KEYS
+    if set, otherwise the primary key alone. Each hot key must hold the MON
+    its bets spend.
+    
+    When several bot processes run, each gets its own share of the hot keys,
+    and the primary key (used by all of them) takes nonces from `nonce_db`.
+    """
+    
+    def __init__(
+        self,
+        rpc,
+        primary_key: str,
+        hot_keys: List[str],
+        read_allowance: Callable[[str], Awaitable[int]],
+        nonce_db: Optional[str] = None
+    ):
+        """
+        Args:
+            rpc: RPC backend
+            primary_key: Private key of the main (resolver) wallet
+            hot_keys: Private keys for bets and market creation (may be empty)
+            read_allowance: Coroutine function returning an owner's on-chain allowance
+            nonce_db: SQLite file for the primary key's nonces when other processes share it
+        """
+        self.primary = Signer(rpc, primary_key, read_allowance, nonce_db)
+        
+        self.hot: List[Signer] = []
+        for key in hot_keys:
+            signer = Signer(rpc, key, read_allowance)
+            if signer.address == self.primary.address:
+                # Reuse the primary so one address never has two nonce streams
+                signer = self.primary
+            if signer not in self.hot:
+                self.hot.append(signer)
+        if not self.hot:
+            self.hot = [self.primary]
+    
+    def acquire(self, signer: Optional[Signer] = None) -> Signer:
+        """
+        Reserve a signer for one job (the least busy hot key unless one is given)
+        
+        Call release() once the job's transaction is mined or has failed.
+        """
+        if signer is None:
+            signer = min(self.hot, key=lambda s: s.busy)
+        signer.busy += 1
+        return signer
+    
+    def release(self, signer: Signer):
+        """Return a signer reserved with acquire()"""
+        signer.busy -= 1
+    
+    async def run(
+        self,
+        send: Callable[[Signer], Awaitable[PendingTransaction]],
+        signer: Optional[Signer] = None
+    ) -> PendingTransaction:
+        """
+        Send a job from a reserved signer, holding it until the transaction settles
+        
+        Args:
+            send: Coroutine function that sends the transaction from the given signer
+            signer: Specific signer to use (defaults to the least busy hot key)
+        
+        Returns:
+            PendingTransaction returned by send
+        """
+        signer = self.acquire(signer)
+        try:
+            pending = await send(signer)
+        except Exception:
+            self.release(signer)
+            raise
+        
+        signer.sent += 1
+        
+        async def on_settled(_):
+            self.release(signer)
+        
+        pending.add_callback(on_settled)
+        return pending
+    
+    def stats(self) -> List[Dict]:
+        """Per-signer load and allowance, primary first"""
+        signers = [self.primary] + [s for s in self.hot if s is not self.primary]
+        return [
+            {
+                'address': signer.address,
+                'primary': signer is self.primary,
+                'busy': signer.busy,
+                'sent': signer.sent,
+                **signer.allowance.stats()
+            }
+            for signer in signers
+        ]
@@ -0,0 +1,139 @@
+"""
+Single-flight request coalescing
+Concurrent identical reads share one in-flight call instead of each going to the RPC
+"""
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Sequence
+
+from services import metrics
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; later callers await the same result
+    
+    A key should say everything that decides the answer (method, arguments,
+    block tag). Only calls still in flight are shared, so a joined result
+    is never older than the call it joins; nothing is kept afterwards.
+    The shared call runs in its own task, so a caller being cancelled does
+    not cancel it for the others.
+    """
+    
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled: False runs every call on its own (for comparison)
+        """
+        self.enabled = enabled
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        
+        # Counters for reporting, per kind (the first element of the key)
+        self.requested: Counter = Counter()
+        self.coalesced: Counter = Counter()
+    
+    def _count(self, key: Hashable, joined: bool):
+        kind = key[0] if isinstance(key, tuple) else key
+        self.requested[kind] += 1
+        metrics.READS_REQUESTED.labels(kind).inc()
+        if joined:
+            self.coalesced[kind] += 1
+            metrics.READS_COALESCED.labels(kind).inc()
+    
+    def _register(self, key: Hashable, future: asyncio.Future):
+        self._in_flight[key] = future
+        
+        def done(_):
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+            # Mark failures as seen even if every caller went away
+            if not future.cancelled():
+                future.exception()
+        
+        future.add_done_callback(done)
+    
+    async def do(self, key: Hashable, call: Callable[[], Awaitable]) -> Any:
+        """Result of call(), shared with every concurrent do() for the same key"""
+        if not self.enabled:
+            self._count(key, False)
+            return await call()
+        
+        future = self._in_flight.get(key)
+        self._count(key, future is not None)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._register(key, future)
+        return await asyncio.shield(future)
+    
+    async def do_many(self, keys: Sequence[Hashable], fetch: Callable[[List[Hashable]], Awaitable[List]]) -> List:
+        """
+        Batched do(): keys in flight are joined, the rest go to one fetch() call
+        
+        Args:
+            keys: One key per wanted result
+            fetch: Takes the keys nobody is fetching yet, returns their results in order
+        
+        Returns:
+            Results in the order of keys
+        """
+        if not self.enabled:
+            for key in keys:
+                self._count(key, False)
+            return await fetch(list(keys))
+        
+        futures = {}
+        missing = []
+        seen = set()
+        for key in keys:
+            if key in seen:
+                self._count(key, True)
+                continue
+            seen.add(key)
+            future = self._in_flight.get(key)
+            self._count(key, future is not None)
+            if future is None:
+                missing.append(key)
+            else:
+                futures[key] = future
+        
+        if missing:
+            loop = asyncio.get_running_loop()
+            batch = asyncio.ensure_future(fetch(missing))
+            for key in missing:
+                futures[key] = loop.create_future()
+                self._register(key, futures[key])
+            
+            def distribute(_):
+                for index, key in enumerate(missing):
+                    future = futures[key]
+                    if future.done():
+                        continue
+                    if batch.cancelled():
+                        future.cancel()
+                    elif batch.exception() is not None:
+                        future.set_exception(batch.exception())
+                    else:
+                        future.set_result(batch.result()[index])
+            
+            batch.add_done_callback(distribute)
+        
+        return [await asyncio.shield(futures[key]) for key in keys]
+    
+    def forget(self, key: Hashable):
+        """Let the next call for `key` start afresh (its data just changed)"""
+        self._in_flight.pop(key, None)
+    
+    def stats(self) -> Dict:
+        """Reads requested and coalesced, per kind and overall"""
+        requested = sum(self.requested.values())
+        coalesced = sum(self.coalesced.values())
+        return {
+            'requested': requested,
+            'coalesced': coalesced,
+            'coalescing_ratio': round(coalesced / requested, 3) if requested else 0.0,
+            'in_flight': len(self._in_flight),
+            'by_kind': {
+                kind: {'requested': count, 'coalesced': self.coalesced[kind]}
+                for kind, count in self.requested.items()
+            }
+        }
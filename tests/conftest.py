@@ -0,0 +1,16 @@
+"""
+Shared test setup
+Makes the project importable and gives Config the variables it requires
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Placeholders so importing config does not warn; no test talks to these
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:test")
+os.environ.setdefault("MONAD_RPC_URL", "http://127.0.0.1:8545")
+os.environ.setdefault("PRIVATE_KEY", "0x" + "11" * 32)
+os.environ.setdefault("CONTRACT_ADDRESS", "0x" + "22" * 20)
+os.environ.setdefault("USDC_ADDRESS", "0x" + "33" * 20)
+os.environ.setdefault("RESOLVER_ADDRESS", "0x" + "44" * 20)
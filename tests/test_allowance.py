@@ -0,0 +1,71 @@
+"""Tests for services/allowance.py"""
+import asyncio
+
+from services.allowance import AllowanceTracker
+
+
+class Chain:
+    """On-chain allowance as the node reports it at `latest`"""
+    
+    def __init__(self, allowance):
+        self.allowance = allowance
+        self.reads = 0
+    
+    async def read(self):
+        self.reads += 1
+        return self.allowance
+
+
+def test_reads_once_then_tracks_locally():
+    async def run():
+        chain = Chain(100)
+        tracker = AllowanceTracker(chain.read)
+        assert await tracker.current() == 100
+        tracker.consume(30)
+        tracker.consume(80)
+        assert await tracker.current() == 0
+        assert chain.reads == 1
+    asyncio.run(run())
+
+
+def test_approval_overwrites():
+    async def run():
+        tracker = AllowanceTracker(Chain(10).read)
+        await tracker.current()
+        tracker.set(500)
+        tracker.consume(20)
+        assert await tracker.current() == 480
+    asyncio.run(run())
+
+
+def test_reset_deducts_bets_in_flight():
+    async def run():
+        chain = Chain(100)
+        tracker = AllowanceTracker(chain.read)
+        await tracker.current()
+        tracker.consume(30)
+        tracker.consume(20)
+        
+        # One bet mined, the other still pending: latest shows only the first
+        chain.allowance = 70
+        tracker.settle(30)
+        tracker.reset()
+        assert await tracker.current() == 50
+        assert tracker.stats()['in_flight'] == 20
+        
+        # The pending bet is dropped; the next re-read trusts the chain again
+        tracker.settle(20)
+        tracker.reset()
+        assert await tracker.current() == 70
+        assert chain.reads == 3
+    asyncio.run(run())
+
+
+def test_consume_before_first_read():
+    async def run():
+        tracker = AllowanceTracker(Chain(40).read)
+        tracker.consume(50)
+        assert await tracker.current() == 0
+        tracker.settle(100)
+        assert tracker.stats()['in_flight'] == 0
+    asyncio.run(run())
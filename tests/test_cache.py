@@ -0,0 +1,81 @@
+"""Tests for services/cache.py"""
+import pytest
+
+from services import cache
+from services.cache import MarketCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def test_entry_served_at_its_block_regardless_of_age(clock):
+    markets = MarketCache(max_size=10, ttl=2)
+    markets.set(1, {'id': 1}, block=5)
+    clock.now += 60
+    assert markets.get(1, head_block=5) == {'id': 1}
+    assert markets.get(1, head_block=4) == {'id': 1}
+
+
+def test_entry_expires_once_chain_moves_on(clock):
+    markets = MarketCache(max_size=10, ttl=2)
+    markets.set(1, {'id': 1}, block=5)
+    clock.now += 1
+    assert markets.get(1, head_block=6) == {'id': 1}
+    clock.now += 2
+    assert markets.get(1, head_block=6) is None
+    # Dropped, not just hidden
+    assert markets.get(1, head_block=5) is None
+    assert markets.stats()['misses'] == 2
+
+
+def test_unknown_block_uses_ttl(clock):
+    markets = MarketCache(max_size=10, ttl=2)
+    markets.set(1, {'id': 1}, block=None)
+    assert markets.get(1, head_block=0) == {'id': 1}
+    clock.now += 3
+    assert markets.get(1) is None
+
+
+def test_returns_copies(clock):
+    markets = MarketCache(max_size=10, ttl=2)
+    market = {'id': 1, 'total_yes': 5}
+    markets.set(1, market, block=1)
+    market['total_yes'] = 6
+    markets.get(1)['total_yes'] = 7
+    assert markets.get(1)['total_yes'] == 5
+
+
+def test_least_recently_used_evicted(clock):
+    markets = MarketCache(max_size=2, ttl=2)
+    markets.set(1, {'id': 1}, block=1)
+    markets.set(2, {'id': 2}, block=1)
+    markets.get(1)
+    markets.set(3, {'id': 3}, block=1)
+    assert markets.get(2) is None
+    assert markets.get(1) is not None and markets.get(3) is not None
+    assert markets.stats()['evictions'] == 1
+
+
+def test_invalidate(clock):
+    markets = MarketCache(max_size=10, ttl=2)
+    for market_id in range(3):
+        markets.set(market_id, {'id': market_id}, block=1)
+    markets.invalidate(0)
+    markets.invalidate(0)
+    assert markets.get(0) is None
+    markets.invalidate()
+    stats = markets.stats()
+    assert stats['size'] == 0
+    assert stats['invalidations'] == 3
@@ -0,0 +1,135 @@
+"""Tests for services/market_index.py"""
+import time
+
+import pytest
+
+from services.market_index import (
+    MAX_CURSOR_LENGTH, ORDER_EXPIRY, ORDER_LIQUIDITY, MarketIndex, to_base36
+)
+from services.market_search import MarketSearchIndex
+
+
+def market(market_id, expiry_in=3600, liquidity=0, resolved=False, question="Will it rain?"):
+    return {
+        'id': market_id,
+        'question': question,
+        'expiry': int(time.time()) + expiry_in if expiry_in is not None else 0,
+        'total_yes': liquidity,
+        'total_no': 0,
+        'resolved': resolved
+    }
+
+
+def walk(index, order, size):
+    """Every page from the first forwards, then back again from the last"""
+    ids, prev_cursor, next_cursor = index.page(order, None, size)
+    assert prev_cursor is None
+    pages = [ids]
+    while next_cursor:
+        ids, prev_cursor, next_cursor = index.page(order, next_cursor, size)
+        pages.append(ids)
+    
+    back = [ids]
+    while prev_cursor:
+        ids, prev_cursor, _ = index.page(order, prev_cursor, size)
+        back.append(ids)
+    return pages, back[::-1]
+
+
+@pytest.mark.parametrize("number", [0, 1, 35, 36, 1295, 2 ** 64, 2 ** 256 - 1])
+def test_base36_round_trip(number):
+    assert int(to_base36(number), 36) == number
+
+
+def test_update_keeps_only_active_markets():
+    index = MarketIndex()
+    index.update(market(1))
+    index.update(market(2, resolved=True))
+    index.update(market(3, expiry_in=-10))
+    index.update(market(4, expiry_in=None))
+    assert index.ids() == [1]
+    
+    index.update(market(1, resolved=True))
+    assert len(index) == 0
+
+
+def test_pages_by_expiry_forwards_and_back():
+    index = MarketIndex()
+    for market_id in range(1, 13):
+        index.update(market(market_id, expiry_in=1000 + 100 * (13 - market_id)))
+    
+    pages, back = walk(index, ORDER_EXPIRY, 5)
+    assert pages == [[12, 11, 10, 9, 8], [7, 6, 5, 4, 3], [2, 1]]
+    assert back == pages
+
+
+def test_pages_by_liquidity_break_ties_by_id():
+    index = MarketIndex()
+    for market_id in range(1, 8):
+        index.update(market(market_id, liquidity=100 if market_id % 2 else 500))
+    
+    pages, back = walk(index, ORDER_LIQUIDITY, 3)
+    assert pages == [[2, 4, 6], [1, 3, 5], [7]]
+    assert back == pages
+
+
+def test_cursor_survives_changes_around_it():
+    index = MarketIndex()
+    for market_id in range(1, 11):
+        index.update(market(market_id, expiry_in=1000 + market_id))
+    
+    _, _, next_cursor = index.page(ORDER_EXPIRY, None, 3)
+    index.remove(2)
+    index.update(market(11, expiry_in=10))
+    
+    ids, prev_cursor, _ = index.page(ORDER_EXPIRY, next_cursor, 3)
+    assert ids == [4, 5, 6]
+    assert index.page(ORDER_EXPIRY, prev_cursor, 3)[0] == [11, 1, 3]
+
+
+def test_cursor_past_the_end_shows_last_page():
+    index = MarketIndex()
+    for market_id in range(1, 8):
+        index.update(market(market_id, expiry_in=1000 + market_id))
+    
+    _, _, next_cursor = index.page(ORDER_EXPIRY, None, 5)
+    for market_id in (6, 7):
+        index.remove(market_id)
+    
+    ids, prev_cursor, next_cursor = index.page(ORDER_EXPIRY, next_cursor, 5)
+    assert ids == [1, 2, 3, 4, 5]
+    assert prev_cursor is None and next_cursor is None
+
+
+def test_huge_liquidity_falls_back_to_id_only_cursor():
+    index = MarketIndex()
+    huge = 2 ** 255
+    for market_id in range(1, 5):
+        index.update(market(market_id, liquidity=huge - market_id))
+    
+    ids, _, next_cursor = index.page(ORDER_LIQUIDITY, None, 2)
+    assert ids == [1, 2]
+    assert len(next_cursor) <= MAX_CURSOR_LENGTH
+    assert next_cursor == f"n__{to_base36(2)}"
+    assert index.page(ORDER_LIQUIDITY, next_cursor, 2)[0] == [3, 4]
+    
+    # Boundary market gone: the cursor falls back to the first page
+    index.remove(2)
+    assert index.page(ORDER_LIQUIDITY, next_cursor, 2)[0] == [1, 3]
+
+
+def test_unknown_order_is_rejected():
+    with pytest.raises(ValueError):
+        MarketIndex().page('x')
+
+
+def test_search_index_follows_active_set():
+    search = MarketSearchIndex()
+    index = MarketIndex(search)
+    index.update(market(1, question="Will ETH flip BTC?"))
+    index.update(market(2, question="Will it snow?"))
+    assert search.search("eth") == [1]
+    
+    index.update(market(1, resolved=True))
+    assert search.search("eth") == []
+    assert len(search) == 1
@@ -0,0 +1,81 @@
+"""Tests for services/market_search.py"""
+from config import Config
+from services import market_search
+from services.market_search import MarketSearchIndex, tokenize
+
+UNIT = 10 ** Config.USDC_DECIMALS
+
+
+def build(markets):
+    index = MarketSearchIndex()
+    for market_id, (question, liquidity) in markets.items():
+        index.add(market_id, question, liquidity * UNIT)
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Will BTC hit $100k by 2025?") == ["will", "btc", "hit", "100k", "by", "2025"]
+
+
+def test_all_words_must_match():
+    index = build({
+        1: ("Will BTC hit 100k?", 10),
+        2: ("Will ETH hit 10k?", 10),
+        3: ("Will BTC dominance fall?", 10),
+    })
+    assert sorted(index.search("btc")) == [1, 3]
+    assert index.search("btc hit") == [1]
+    assert index.search("btc solana") == []
+    assert index.search("BTC?") == index.search("btc")
+
+
+def test_last_word_matches_as_prefix():
+    index = build({
+        1: ("Will Ethereum flip Bitcoin?", 10),
+        2: ("Will ETH ETFs launch?", 10),
+        3: ("Will it rain?", 10),
+    })
+    assert sorted(index.search("eth")) == [1, 2]
+    assert index.search("ethe") == [1]
+    # Only the word being typed is a prefix
+    assert index.search("eth flip") == []
+    # Too short to expand
+    assert index.search("e") == []
+
+
+def test_exact_match_ranks_above_prefix():
+    index = build({
+        1: ("Will ETH flip BTC?", 10),
+        2: ("Will Ethereum flip BTC?", 10),
+    })
+    assert index.search("eth") == [1, 2]
+
+
+def test_liquidity_breaks_ties_and_updates():
+    index = build({
+        1: ("Will it rain?", 1),
+        2: ("Will it snow?", 1000),
+    })
+    assert index.search("will") == [2, 1]
+    
+    index.add(1, "Will it rain?", 100_000 * UNIT)
+    assert index.search("will") == [1, 2]
+    assert index.search("") == [1, 2]
+    assert index.search("will", limit=1) == [1]
+
+
+def test_remove():
+    index = build({1: ("Will it rain?", 1), 2: ("Will it snow?", 1)})
+    index.remove(1)
+    index.remove(1)
+    assert index.search("rain") == []
+    assert index.search("r") == []
+    assert index.search("will") == [2]
+    assert index.stats()['markets'] == 1
+
+
+def test_common_words_draw_from_most_liquid(monkeypatch):
+    monkeypatch.setattr(market_search, "SCAN_LIMIT", 5)
+    index = build({market_id: (f"Will market {market_id} close?", market_id ** 3) for market_id in range(1, 41)})
+    assert index.search("will close", limit=3) == [40, 39, 38]
+    assert index.search("market 7") == [7]
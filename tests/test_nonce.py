@@ -0,0 +1,100 @@
+"""Tests for services/nonce.py"""
+import asyncio
+
+from services.nonce import NonceManager, SharedNonceManager, is_nonce_error
+from services.rpc import RpcError
+
+ADDRESS = "0x" + "ab" * 20
+
+
+class Node:
+    """RPC stand-in answering eth_getTransactionCount"""
+    
+    def __init__(self, pending):
+        self.pending = pending
+        self.calls = 0
+    
+    async def request(self, method, params):
+        assert method == 'eth_getTransactionCount'
+        assert params == [ADDRESS, 'pending']
+        self.calls += 1
+        return hex(self.pending)
+
+
+def test_is_nonce_error():
+    assert is_nonce_error(RpcError(-32000, "Nonce too low"))
+    assert not is_nonce_error(RpcError(-32000, "insufficient funds"))
+    assert not is_nonce_error(ValueError("nonce too low"))
+
+
+def test_concurrent_allocations_are_unique():
+    async def run():
+        node = Node(7)
+        nonces = NonceManager(node, ADDRESS)
+        allocated = await asyncio.gather(*(nonces.allocate() for _ in range(20)))
+        assert sorted(allocated) == list(range(7, 27))
+        assert node.calls == 1
+    asyncio.run(run())
+
+
+def test_resync_and_reset_reread_the_node():
+    async def run():
+        node = Node(3)
+        nonces = NonceManager(node, ADDRESS)
+        assert await nonces.allocate() == 3
+        node.pending = 10
+        await nonces.resync()
+        assert await nonces.allocate() == 10
+        
+        node.pending = 5
+        await nonces.reset()
+        assert node.calls == 2
+        assert await nonces.allocate() == 5
+        assert node.calls == 3
+    asyncio.run(run())
+
+
+def test_shared_manager_spans_instances(tmp_path):
+    async def run():
+        node = Node(4)
+        path = str(tmp_path / "nonces.db")
+        first = SharedNonceManager(node, ADDRESS, path)
+        second = SharedNonceManager(node, ADDRESS, path)
+        try:
+            allocated = await asyncio.gather(*(
+                manager.allocate() for _ in range(10) for manager in (first, second)
+            ))
+            assert sorted(allocated) == list(range(4, 24))
+            # Both may read the node before either seeded the file
+            assert node.calls <= 2
+            
+            # A reset in one process makes every process re-read the node
+            node.pending = 30
+            await first.reset()
+            assert await second.allocate() == 30
+            assert await first.allocate() == 31
+            
+            node.pending = 50
+            await second.resync()
+            assert await first.allocate() == 50
+        finally:
+            first.close()
+            second.close()
+    asyncio.run(run())
+
+
+def test_shared_seed_race_takes_next(tmp_path):
+    async def run():
+        node = Node(9)
+        path = str(tmp_path / "nonces.db")
+        first = SharedNonceManager(node, ADDRESS, path)
+        second = SharedNonceManager(node, ADDRESS, path)
+        try:
+            # Both read the node before either stored the count
+            assert await asyncio.to_thread(first._seed, 9) == 9
+            assert await asyncio.to_thread(second._seed, 9) == 10
+            assert await first.allocate() == 11
+        finally:
+            first.close()
+            second.close()
+    asyncio.run(run())
@@ -0,0 +1,89 @@
+"""Tests for services/quotes.py"""
+import random
+
+import pytest
+
+from config import Config
+from services import quotes
+from services.quotes import BPS, format_units, quote, quote_ladder, to_units
+
+UNIT = 10 ** Config.USDC_DECIMALS
+
+
+@pytest.mark.parametrize("text, units", [
+    ("10", 10 * UNIT),
+    (" 25.50 ", 25_500_000),
+    ("0.000001", 1),
+    ("1e2", 100 * UNIT),
+    ("-3", -3 * UNIT),
+])
+def test_to_units(text, units):
+    assert to_units(text) == units
+
+
+@pytest.mark.parametrize("text", ["abc", "", "NaN", "Infinity", "0.0000001", "1,5"])
+def test_to_units_rejects(text):
+    with pytest.raises(ValueError):
+        to_units(text)
+
+
+def test_format_units():
+    assert format_units(25_500_000) == "25.50"
+    assert format_units(1) == "0.00"
+    assert format_units(1, None) == "0.000001"
+    assert format_units(10 * UNIT, None) == "10"
+    assert format_units(1_234_567, 4) == "1.2346"
+
+
+def test_quote_matches_parimutuel_payout():
+    # 10 MON on YES into 30 YES / 60 NO: paid 10 * 100 / 40
+    result = quote(30 * UNIT, 60 * UNIT, True, 10 * UNIT)
+    assert result.payout == 25 * UNIT
+    assert result.profit == 15 * UNIT
+    assert result.probability_bps == 4000
+
+
+def test_quote_rounds_down():
+    result = quote(0, 1, False, 3)
+    # NO pool after the bet is 4, whole pool 4: payout 3 * 4 / 4
+    assert result.payout == 3
+    result = quote(2, 1, True, 1)
+    # 1 * 1 // 3 = 0 profit
+    assert result.profit == 0
+    assert result.probability_bps == 3 * BPS // 4
+
+
+def test_quote_ladder_rejects_non_positive_amounts():
+    with pytest.raises(ValueError):
+        quote_ladder(UNIT, UNIT, True, [UNIT, 0])
+    assert quote_ladder(UNIT, UNIT, True, []) == []
+
+
+def expected(total_yes, total_no, side, amount):
+    side_pool = (total_yes if side else total_no) + amount
+    total = total_yes + total_no + amount
+    payout = amount * total // side_pool
+    return payout, payout - amount, side_pool * BPS // total
+
+
+@pytest.mark.skipif(quotes.np is None, reason="NumPy not installed")
+def test_numpy_ladder_is_exact(monkeypatch):
+    rng = random.Random(7)
+    # Near the 2**53 limit, where float64 products lose precision
+    total_yes = rng.randrange(2 ** 51)
+    total_no = rng.randrange(2 ** 51)
+    amounts = [rng.randrange(1, 2 ** 51) for _ in range(quotes.NUMPY_MIN_LADDER * 4)]
+    
+    fast = quote_ladder(total_yes, total_no, False, amounts)
+    monkeypatch.setattr(quotes, "np", None)
+    assert quote_ladder(total_yes, total_no, False, amounts) == fast
+    
+    for result in fast:
+        assert (result.payout, result.profit, result.probability_bps) == expected(total_yes, total_no, False, result.amount)
+
+
+def test_python_ladder_handles_huge_pools():
+    total_yes, total_no = 2 ** 200, 3 ** 120
+    amounts = [2 ** 190 + step for step in range(quotes.NUMPY_MIN_LADDER)]
+    for result in quote_ladder(total_yes, total_no, True, amounts):
+        assert (result.payout, result.profit, result.probability_bps) == expected(total_yes, total_no, True, result.amount)